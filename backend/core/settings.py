@@ -46,6 +46,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'dashboard.middleware.RequestProfilingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -82,14 +83,42 @@ WSGI_APPLICATION = 'core.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'dristi_ai_db',
-        'USER': 'dristi_ai_user',
-        'PASSWORD': 'your_secure_password',  
-        'HOST': 'localhost',
-        'PORT': '5432', 
+        'NAME': config('DB_NAME', default='dristi_ai_db'),
+        'USER': config('DB_USER', default='dristi_ai_user'),
+        'PASSWORD': config('DB_PASSWORD', default='your_secure_password'),
+        'HOST': config('DB_HOST', default='localhost'),
+        'PORT': config('DB_PORT', default='5432'),
+        # Seconds a connection is reused across requests (0: one per request)
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+        # Check a reused connection before each request instead of failing on it
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
     }
 }
 
+# psycopg's connection pool (needs `psycopg[pool]` instead of psycopg2). It
+# replaces persistent connections and is the option to use under ASGI, where
+# connections are not reused between requests.
+if config('DB_POOL', default=False, cast=bool):
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+            'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+            'timeout': config('DB_POOL_TIMEOUT', default=10, cast=int),  # seconds to wait for a connection
+        },
+    }
+
+# Read replica for manager reports and payroll exports (see dashboard.db)
+if config('DB_REPLICA_HOST', default=''):
+    DATABASES['replica'] = dict(
+        DATABASES['default'],
+        HOST=config('DB_REPLICA_HOST'),
+        PORT=config('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+        TEST={'MIRROR': 'default'},
+    )
+
+DATABASE_ROUTERS = ['dashboard.db.ReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -115,7 +144,8 @@ AUTH_PASSWORD_VALIDATORS = [
 
 LANGUAGE_CODE = 'en-us'
 
-TIME_ZONE = 'UTC'
+# Default time zone of work days; users can have their own (User.timezone)
+TIME_ZONE = config('TIME_ZONE', default='UTC')
 
 USE_I18N = True
 
@@ -140,8 +170,23 @@ CORS_ALLOWED_ORIGINS = [
 # Django REST Framework and JWT configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'dashboard.authentication.CachedUserJWTAuthentication',
     ],
+    # Encodes with orjson when it is installed, like JSONRenderer otherwise
+    'DEFAULT_RENDERER_CLASSES': [
+        'dashboard.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    # Token buckets of dashboard.throttling: n/period allows bursts of n,
+    # then one request every period/n; an empty value turns a limit off
+    'DEFAULT_THROTTLE_RATES': {
+        'punch_user': config('THROTTLE_PUNCH_USER', default='6/min') or None,
+        'punch_ip': config('THROTTLE_PUNCH_IP', default='120/min') or None,
+        'token_user': config('THROTTLE_TOKEN_USER', default='5/min') or None,
+        'token_ip': config('THROTTLE_TOKEN_IP', default='60/min') or None,
+    },
+    # Reverse proxies in front of the app, for the client address of the IP limits
+    'NUM_PROXIES': config('NUM_PROXIES', default=0, cast=int),
 }
 
 # JWT settings
@@ -177,10 +222,98 @@ SIMPLE_JWT = {
     "SLIDING_TOKEN_REFRESH_LIFETIME": timedelta(days=1),
     
     # This is the important change
-    "TOKEN_OBTAIN_PAIR_SERIALIZER": "dashboard.serializers.MyTokenObtainPairSerializer", 
+    "TOKEN_OBTAIN_SERIALIZER": "dashboard.serializers.MyTokenObtainPairSerializer",
 }
 
 AUTH_USER_MODEL = 'dashboard.User'
 
-USE_TZ = True
-TIME_ZONE = 'UTC'
\ No newline at end of file
+# Live event stream (api/events/, served by core.asgi)
+DASHBOARD_EVENT_BROKER = 'dashboard.events.InProcessBroker'
+DASHBOARD_EVENT_HEARTBEAT = 15  # seconds between keepalive comments
+DASHBOARD_EVENT_TICKET_TTL = 30  # seconds a stream ticket can be used to connect
+DASHBOARD_EVENT_STREAM_LIFETIME = 300  # seconds before a stream is closed to re-authenticate
+
+# Caches; set CACHE_BACKEND/CACHE_LOCATION to a shared cache (e.g. Redis)
+# when running more than one worker process
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='dashboard'),
+    }
+}
+
+# Per-user cached snapshot of today's logs and logsheet status
+DASHBOARD_SNAPSHOT_CACHE = 'default'
+DASHBOARD_SNAPSHOT_TIMEOUT = 300  # seconds
+
+# Authenticated users are served from this cache instead of a query per request;
+# it must be shared between workers in production (see `check --deploy`)
+DASHBOARD_AUTH_CACHE = 'default'
+DASHBOARD_AUTH_CACHE_TIMEOUT = 60  # seconds
+
+# Where throttle buckets live: InProcessBucketStore keeps at most
+# DASHBOARD_THROTTLE_MAX_KEYS of them per process, CacheBucketStore shares
+# them between workers through DASHBOARD_THROTTLE_CACHE
+DASHBOARD_THROTTLE_STORE = config('DASHBOARD_THROTTLE_STORE', default='dashboard.throttling.InProcessBucketStore')
+DASHBOARD_THROTTLE_MAX_KEYS = 10000
+DASHBOARD_THROTTLE_CACHE = 'default'
+
+# Results of punches sent with an Idempotency-Key, replayed for repeats
+DASHBOARD_IDEMPOTENCY_CACHE = 'default'
+DASHBOARD_IDEMPOTENCY_TTL = 86400  # seconds
+
+# Check-ins later than this after the start of the user's work day (midnight
+# by default, see User.day_starts_at) count as late in reports
+DASHBOARD_LATE_CHECK_IN = config('DASHBOARD_LATE_CHECK_IN', default='09:30')
+
+# Months of raw punches kept in TimeLog, the current one included; older
+# months are moved out by `manage.py archive_timelogs` (run it monthly)
+DASHBOARD_TIMELOG_RETENTION_MONTHS = config('DASHBOARD_TIMELOG_RETENTION_MONTHS', default=3, cast=int)
+
+# Background jobs (dashboard.jobs): DatabaseExecutor leaves them to
+# `manage.py run_jobs`, InProcessExecutor runs them in the process that
+# queued them, once its transaction commits
+DASHBOARD_JOB_EXECUTOR = config('DASHBOARD_JOB_EXECUTOR', default='dashboard.jobs.DatabaseExecutor')
+DASHBOARD_JOB_MAX_ATTEMPTS = 5
+DASHBOARD_JOB_RETRY_DELAY = 30  # seconds before the first retry, doubled after every failure
+DASHBOARD_JOB_MAX_RETRY_DELAY = 3600  # seconds
+DASHBOARD_JOB_TIMEOUT = 600  # seconds after which a running job is presumed lost and requeued
+
+# Issue tracker checked for the JIRA keys of submitted logsheets; without
+# JIRA_URL a local fake that knows every well-formed key is used
+JIRA_URL = config('JIRA_URL', default='')
+JIRA_USER = config('JIRA_USER', default='')
+JIRA_API_TOKEN = config('JIRA_API_TOKEN', default='')
+JIRA_TIMEOUT = 10  # seconds
+DASHBOARD_ISSUE_TRACKER = 'dashboard.tracker.JiraTracker' if JIRA_URL else 'dashboard.tracker.FakeTracker'
+
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.console.EmailBackend')
+DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='dashboard@localhost')
+
+# Serve the punch and status endpoints with async views (run under core.asgi)
+DASHBOARD_ASYNC_VIEWS = config('DASHBOARD_ASYNC_VIEWS', default=False, cast=bool)
+
+# Request instrumentation (dashboard.middleware): share of requests run
+# under cProfile, and the duration from which their profile is kept
+DASHBOARD_PROFILE_SAMPLE_RATE = config('DASHBOARD_PROFILE_SAMPLE_RATE', default=0.0, cast=float)
+DASHBOARD_PROFILE_SLOW_MS = config('DASHBOARD_PROFILE_SLOW_MS', default=500, cast=int)
+DASHBOARD_PROFILE_DIR = config('DASHBOARD_PROFILE_DIR', default=str(BASE_DIR / 'profiles'))
+
+# One JSON line per request on the dashboard.requests logger
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'requests': {'class': 'logging.StreamHandler', 'formatter': 'message'},
+    },
+    'loggers': {
+        'dashboard.requests': {
+            'handlers': ['requests'],
+            'level': config('DASHBOARD_REQUEST_LOG_LEVEL', default='INFO'),
+            'propagate': False,
+        },
+    },
+}
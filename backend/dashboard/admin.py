@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, TimeLog, LogSheetApproval
+from .models import User, TimeLog, LogSheetApproval, DailyWorkSummary, ArchivedMonth, Job
 
 
 
@@ -8,7 +8,7 @@ from .models import User, TimeLog, LogSheetApproval
 @admin.register(User)
 class CustomUserAdmin(BaseUserAdmin):
     fieldsets = BaseUserAdmin.fieldsets + (
-        (None, {'fields': ('is_manager',)}),
+        (None, {'fields': ('is_manager', 'timezone', 'day_starts_at')}),
     )
 
 # Register the other models
@@ -17,5 +17,18 @@ class TimeLogAdmin(admin.ModelAdmin):
 admin.site.register(TimeLog, TimeLogAdmin)
     
 class LogSheetApprovalAdmin(admin.ModelAdmin):
-    list_display = ('user', 'date', 'jira_key','status')
-admin.site.register(LogSheetApproval,LogSheetApprovalAdmin)
\ No newline at end of file
+    list_display = ('user', 'date', 'jira_key','status', 'jira_status')
+admin.site.register(LogSheetApproval,LogSheetApprovalAdmin)
+
+class DailyWorkSummaryAdmin(admin.ModelAdmin):
+    list_display = ('user', 'work_date', 'state', 'worked_seconds', 'break_seconds')
+admin.site.register(DailyWorkSummary, DailyWorkSummaryAdmin)
+
+class ArchivedMonthAdmin(admin.ModelAdmin):
+    list_display = ('month', 'rows', 'location', 'archived_at')
+admin.site.register(ArchivedMonth, ArchivedMonthAdmin)
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'attempts', 'run_at', 'created_at', 'finished_at')
+    list_filter = ('status', 'name')
+admin.site.register(Job, JobAdmin)
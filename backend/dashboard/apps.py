@@ -4,3 +4,19 @@ from django.apps import AppConfig
 class DashboardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'dashboard'
+
+    def ready(self):
+        from django.core import checks
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import m2m_changed, post_delete, post_save
+        from .authentication import check_auth_cache, forget_saved_user, forget_users_of_m2m_change
+        from .middleware import instrument_connection
+        from .models import User
+        from . import tasks  # registers the job handlers
+
+        checks.register(check_auth_cache, checks.Tags.caches, deploy=True)
+        connection_created.connect(instrument_connection)
+        post_save.connect(forget_saved_user, sender=User)
+        post_delete.connect(forget_saved_user, sender=User)
+        m2m_changed.connect(forget_users_of_m2m_change, sender=User.groups.through)
+        m2m_changed.connect(forget_users_of_m2m_change, sender=User.user_permissions.through)
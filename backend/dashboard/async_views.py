@@ -0,0 +1,203 @@
+"""
+Async versions of the hot employee endpoints, served by core.asgi.
+
+They are routed instead of the DRF views when DASHBOARD_ASYNC_VIEWS is on, so
+a worker does not hold a thread for every request waiting on the database
+during the morning punch spike. Responses match the DRF views.
+"""
+import json
+import math
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .events import MANAGERS_CHANNEL, get_broker, user_channel
+from .authentication import aget_cached_user, read_stream_ticket, token_rejection
+from .idempotency import HEADER as IDEMPOTENCY_HEADER, IdempotencyError, afind_replay, arun_idempotent
+from .throttling import athrottle_wait
+from .conditional import is_fresh, make_etag, not_modified, with_etag
+from .snapshots import aget_today_snapshot, asnapshot_version
+from .workdays import user_work_date
+from .views import CheckInView, BreakStartView, BreakEndView, CheckOutView
+
+
+class AuthenticationFailed(Exception):
+    pass
+
+
+def get_access_token(request):
+    """Validates the Bearer token of the request."""
+    header = request.headers.get('Authorization', '')
+    if not header.startswith('Bearer '):
+        raise AuthenticationFailed('Authentication credentials were not provided.')
+    try:
+        return AccessToken(header[len('Bearer '):])
+    except TokenError:
+        raise AuthenticationFailed('Given token not valid for any token type')
+
+
+async def authenticate(request):
+    """Async counterpart of CachedUserJWTAuthentication: returns the user of the token."""
+    token = get_access_token(request)
+    user = await aget_cached_user(token[api_settings.USER_ID_CLAIM])
+    rejection = token_rejection(user, token)
+    if rejection is not None:
+        raise AuthenticationFailed(str(rejection))
+    return user
+
+
+def async_api_view(method):
+    """
+    Wraps an ``async def view(request, user)``: only allows the given HTTP
+    method and authenticates the request, answering like the DRF views do.
+    """
+    def decorator(view):
+        @csrf_exempt
+        async def wrapper(request, *args, **kwargs):
+            if request.method != method:
+                return JsonResponse(
+                    {'detail': f'Method "{request.method}" not allowed.'},
+                    status=status.HTTP_405_METHOD_NOT_ALLOWED,
+                )
+            try:
+                user = await authenticate(request)
+            except AuthenticationFailed as exc:
+                return JsonResponse({'detail': str(exc)}, status=status.HTTP_401_UNAUTHORIZED)
+            return await view(request, user, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def throttled(wait):
+    # Same answer as DRF's Throttled exception
+    seconds = math.ceil(wait)
+    response = JsonResponse(
+        {'detail': f"Request was throttled. Expected available in {seconds} second{'' if seconds == 1 else 's'}."},
+        status=status.HTTP_429_TOO_MANY_REQUESTS,
+    )
+    response['Retry-After'] = str(seconds)
+    return response
+
+
+def punch_view(view_class):
+    """Builds the async view of one of the DRF punch views."""
+    punch = view_class.apunch
+
+    @async_api_view('POST')
+    async def view(request, user):
+        request.user = user
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        # Replays are answered from the cache and cost no throttle tokens
+        if not key or await afind_replay(user.pk, key, request.path) is None:
+            wait = await athrottle_wait(view_class.throttle_classes, request)
+            if wait is not None:
+                return throttled(wait)
+
+        if not key:
+            status_code, data = await punch(user)
+            return JsonResponse(data, status=status_code)
+        try:
+            status_code, data, replayed = await arun_idempotent(user.pk, key, request.path, lambda: punch(user))
+        except IdempotencyError as exc:
+            return JsonResponse({'detail': exc.detail}, status=exc.status_code)
+        response = JsonResponse(data, status=status_code)
+        if replayed:
+            response['Idempotent-Replayed'] = 'true'
+        return response
+    return view
+
+
+check_in = punch_view(CheckInView)
+break_start = punch_view(BreakStartView)
+break_end = punch_view(BreakEndView)
+check_out = punch_view(CheckOutView)
+
+
+@async_api_view('GET')
+async def time_logs(request, user):
+    today = user_work_date(user)
+    etag = make_etag('time-logs', user.pk, await asnapshot_version(user.pk, today))
+    if is_fresh(request, etag):
+        return not_modified(etag)
+    snapshot = await aget_today_snapshot(user.pk, today)
+    return with_etag(JsonResponse(snapshot['logs'], safe=False), etag)
+
+
+@async_api_view('GET')
+async def logsheet_status(request, user):
+    today = user_work_date(user)
+    etag = make_etag('logsheet-status', user.pk, await asnapshot_version(user.pk, today))
+    if is_fresh(request, etag):
+        return not_modified(etag)
+    snapshot = await aget_today_snapshot(user.pk, today)
+    return with_etag(JsonResponse({'has_submitted': snapshot['has_submitted']}), etag)
+
+
+# Event stream (Server-Sent Events), served by the ASGI application
+async def authenticate_stream(request):
+    """Returns the user of the ``ticket`` query parameter, or of the Bearer token without one."""
+    ticket = request.GET.get('ticket')
+    if not ticket:
+        return await authenticate(request)
+    try:
+        claims = read_stream_ticket(ticket)
+    except signing.BadSignature:
+        raise AuthenticationFailed('Invalid or expired stream ticket.')
+    user = await aget_cached_user(claims['user_id'])
+    rejection = token_rejection(user, claims)
+    if rejection is not None:
+        raise AuthenticationFailed(str(rejection))
+    return user
+
+
+async def event_stream(request):
+    """
+    Pushes punch events to the employee and logsheet events to managers.
+
+    EventSource cannot send headers, so browsers pass a ticket from
+    event-stream-ticket as the ``ticket`` query parameter. The stream ends
+    after DASHBOARD_EVENT_STREAM_LIFETIME seconds, and the client reconnects
+    with a new ticket, so revoked or deactivated users drop off.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'detail': 'The event stream is only served by the ASGI application.'}, status=status.HTTP_501_NOT_IMPLEMENTED)
+
+    try:
+        user = await authenticate_stream(request)
+    except AuthenticationFailed as exc:
+        return JsonResponse({'detail': str(exc)}, status=status.HTTP_401_UNAUTHORIZED)
+
+    channels = [user_channel(user.pk)]
+    if user.is_manager:
+        channels.append(MANAGERS_CHANNEL)
+
+    broker = get_broker()
+    heartbeat = settings.DASHBOARD_EVENT_HEARTBEAT
+
+    async def stream():
+        subscription = broker.subscribe(channels)
+        ends_at = time.monotonic() + settings.DASHBOARD_EVENT_STREAM_LIFETIME
+        try:
+            yield 'retry: 5000\n\n'
+            while (remaining := ends_at - time.monotonic()) > 0:
+                event = await broker.listen(subscription, min(heartbeat, remaining))
+                if event is None:
+                    yield ': keepalive\n\n'
+                else:
+                    yield f"event: {event['type']}\ndata: {json.dumps(event['data'], cls=DjangoJSONEncoder)}\n\n"
+        finally:
+            broker.unsubscribe(channels, subscription)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,147 @@
+"""
+JWT authentication without a user query per request.
+
+simplejwt's JWTAuthentication loads the User row on every request. Here the
+user (password deferred, permissions preloaded) comes from a cache kept for
+DASHBOARD_AUTH_CACHE_TIMEOUT seconds and dropped whenever the user, or their
+groups or permissions, change, so a deactivation applies on the next request.
+
+The views need more than the token claims (username, time zone, day start,
+staff flag, permissions), so the cached user is a real User rather than one
+built from the claims: claims would have to carry the whole row and would
+stay stale until the token expires. Dropping a user from the cache only
+reaches other workers through a shared cache, so DASHBOARD_AUTH_CACHE must
+not be a per-process LocMemCache in production (checked by `check --deploy`).
+
+Access tokens carry the user's ``token_version``; revoke_tokens() bumps it,
+which rejects every token issued before.
+
+EventSource cannot send an Authorization header, so the event stream is
+opened with a stream ticket instead of the access token: a signed user id
+and token version valid for DASHBOARD_EVENT_TICKET_TTL seconds, which keeps
+access tokens out of URLs and server logs.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import checks, signing
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+
+
+def get_cache():
+    return caches[settings.DASHBOARD_AUTH_CACHE]
+
+
+def user_key(user_id):
+    return f'dashboard:auth-user:{user_id}'
+
+
+def _load_user(user_id):
+    user = User.objects.defer('password').filter(pk=user_id).first()
+    if user is not None:
+        # Fills the permission caches of the instance, which are cached with it
+        user.get_all_permissions()
+    return user
+
+
+def get_cached_user(user_id):
+    cache = get_cache()
+    user = cache.get(user_key(user_id))
+    if user is None:
+        user = _load_user(user_id)
+        if user is not None:
+            cache.set(user_key(user_id), user, settings.DASHBOARD_AUTH_CACHE_TIMEOUT)
+    return user
+
+
+async def aget_cached_user(user_id):
+    cache = get_cache()
+    user = await cache.aget(user_key(user_id))
+    if user is None:
+        user = await sync_to_async(_load_user)(user_id)
+        if user is not None:
+            await cache.aset(user_key(user_id), user, settings.DASHBOARD_AUTH_CACHE_TIMEOUT)
+    return user
+
+
+def check_auth_cache(app_configs, **kwargs):
+    backend = settings.CACHES[settings.DASHBOARD_AUTH_CACHE]['BACKEND']
+    if backend == 'django.core.cache.backends.locmem.LocMemCache':
+        return [checks.Error(
+            'DASHBOARD_AUTH_CACHE uses LocMemCache, a per-process cache.',
+            hint='Deactivated or revoked users would stay signed in on other workers until '
+                 'DASHBOARD_AUTH_CACHE_TIMEOUT expires; use a shared cache such as Redis or Memcached.',
+            id='dashboard.E001',
+        )]
+    return []
+
+
+def forget_user(user_id):
+    get_cache().delete(user_key(user_id))
+
+
+def revoke_tokens(user_id):
+    """Invalidates every token issued to the user so far."""
+    User.objects.filter(pk=user_id).update(token_version=F('token_version') + 1)
+    forget_user(user_id)
+
+
+def token_rejection(user, token):
+    """Returns why the token may no longer be used for the user, or None."""
+    if user is None:
+        return _('User not found')
+    if not user.is_active:
+        return _('User is inactive')
+    if token.get('token_version', 0) != user.token_version:
+        return _('Token has been revoked')
+    return None
+
+
+STREAM_TICKET_SALT = 'dashboard.event-stream'
+
+
+def issue_stream_ticket(user):
+    return signing.dumps({'user_id': user.pk, 'token_version': user.token_version}, salt=STREAM_TICKET_SALT)
+
+
+def read_stream_ticket(ticket):
+    """Returns the claims of a stream ticket; raises signing.BadSignature if it is forged or expired."""
+    return signing.loads(ticket, salt=STREAM_TICKET_SALT, max_age=settings.DASHBOARD_EVENT_TICKET_TTL)
+
+
+class CachedUserJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        user = get_cached_user(user_id)
+        rejection = token_rejection(user, validated_token)
+        if rejection is not None:
+            raise AuthenticationFailed(rejection)
+        return user
+
+
+def forget_saved_user(sender, instance, **kwargs):
+    forget_user(instance.pk)
+    # Again once committed, in case a request cached the old row meanwhile
+    transaction.on_commit(lambda: forget_user(instance.pk))
+
+
+def forget_users_of_m2m_change(sender, instance, action, model, pk_set, **kwargs):
+    """Drops users whose groups or permissions changed, from either side of the relation."""
+    if not action.startswith('post_'):
+        return
+    if isinstance(instance, User):
+        forget_user(instance.pk)
+    elif model is User:
+        for pk in pk_set or ():
+            forget_user(pk)
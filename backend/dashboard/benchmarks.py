@@ -0,0 +1,305 @@
+"""
+Benchmark suite for the dashboard API, run by `manage.py benchmark_api`.
+
+seed_dataset() seeds users, a few weeks of punches, day summaries and
+logsheets with dashboard.seeding; build_scenarios() turns them into a series
+of requests for every endpoint of dashboard/urls.py, which run_client() sends
+through the Django test client (in process, counting queries) and run_http()
+through loadgen to a running server. Both report latency percentiles and throughput per endpoint.
+
+compare_serializers() measures the DRF serializers against the values() path
+of dashboard.rows, for `manage.py benchmark_serializers`.
+"""
+import asyncio
+import random
+import time
+from datetime import timedelta
+from itertools import cycle, islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Permission
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from . import urls as dashboard_urls
+from .loadgen import latency_report, run_concurrently
+from .models import User, TimeLog, LogSheetApproval
+from .renderers import ORJSONRenderer, orjson
+from .rows import LOGSHEET_FIELDS, TIMELOG_FIELDS, serialize_logsheets, serialize_timelogs
+from .serializers import LogSheetApprovalSerializer, MyTokenObtainPairSerializer, TimeLogSerializer
+from .seeding import PASSWORD, Profile, day_punches, employee_random, seed_data, weekdays_until
+
+BATCH_SIZE = 2000
+
+# Endpoints that cannot be measured request by request
+SKIPPED = {
+    'event-stream': 'long-lived stream; measured by loadtest_event_stream',
+}
+
+INGEST_USERS = 10  # users per ingestion request, a day of punches each
+BULK_IDS = 20  # logsheets per bulk approval
+
+
+class Dataset:
+    def __init__(self, prefix, seed, employees, manager, device, first_day, last_day):
+        self.prefix = prefix
+        self.seed = seed
+        self.employees = employees
+        self.manager = manager
+        self.device = device
+        self.first_day = first_day
+        self.last_day = last_day
+
+    def delete(self):
+        User.objects.filter(username__startswith=self.prefix).delete()
+
+
+def seed_dataset(prefix, users=100, days=20, seed=0):
+    """
+    Seeds ``users`` employees and a manager with dashboard.seeding on the
+    ``days`` weekdays up to the day before yesterday, so the current work day
+    of every employee, night shifts included, is left free for the punch
+    endpoints, and adds a device account. Returns a Dataset.
+    """
+    last_day = timezone.localdate() - timedelta(days=2)
+    seed_data(prefix, users, 1, days, seed=seed, batch_size=BATCH_SIZE, last_day=last_day)
+    # In creation order, which is the index each employee was generated with
+    employees = list(User.objects.filter(username__startswith=f'{prefix}employee').order_by('pk'))
+    manager = User.objects.get(username=f'{prefix}manager0')
+    device = User.objects.create(username=f'{prefix}device', password=make_password(PASSWORD))
+    device.user_permissions.add(Permission.objects.get(codename='ingest_punches'))
+    work_days = weekdays_until(days, last_day)
+    return Dataset(prefix, seed, employees, manager, device, work_days[0], work_days[-1])
+
+
+def build_scenarios(dataset, requests):
+    """
+    Returns [(url name, [(user, method, path, body), ...])] in url order.
+
+    Stateful endpoints get fresh state for every request: the punch endpoints
+    walk the day of a different employee each, in order, and approvals take
+    distinct pending logsheets.
+    """
+    employees = dataset.employees[:requests]
+    manager = dataset.manager
+    date_range = {'date_from': dataset.first_day.isoformat(), 'date_to': dataset.last_day.isoformat()}
+    pending = list(
+        LogSheetApproval.objects.filter(user__in=dataset.employees, status='pending')
+        .order_by('id').values_list('id', flat=True)
+    )
+    single, bulk = pending[:requests], pending[requests:requests + requests * BULK_IDS]
+
+    def ingest_batch(index):
+        # Days before the seeded range, so every punch is accepted
+        day = dataset.first_day - timedelta(days=index + 1)
+        rng = random.Random(index)
+        first = (index * INGEST_USERS) % len(dataset.employees)
+        punches = []
+        for number, user in enumerate(dataset.employees[first:first + INGEST_USERS], first):
+            # The employee's seeded habits, so a night shift stays on one work day
+            profile = Profile(employee_random(dataset.seed, number), user.timezone or settings.TIME_ZONE)
+            punches += [
+                {
+                    'user': user.pk,
+                    'type': punch_type,
+                    'timestamp': timestamp.isoformat(),
+                    'idempotency_key': f'{user.pk}-{day.isoformat()}-{step}',
+                }
+                for step, (punch_type, timestamp) in enumerate(day_punches(rng, profile, day))
+            ]
+        return {'device_id': f'{dataset.prefix}kiosk', 'punches': punches}
+
+    builders = {
+        'user-profile': lambda: [(user, 'GET', reverse('user-profile'), None) for user in employees],
+        'check-in': lambda: [(user, 'POST', reverse('check-in'), None) for user in employees],
+        'break-start': lambda: [(user, 'POST', reverse('break-start'), None) for user in employees],
+        'break-end': lambda: [(user, 'POST', reverse('break-end'), None) for user in employees],
+        'check-out': lambda: [(user, 'POST', reverse('check-out'), None) for user in employees],
+        'time-logs': lambda: [(user, 'GET', reverse('time-logs'), None) for user in employees],
+        'submit-logsheet': lambda: [
+            (user, 'POST', reverse('submit-logsheet'), {'jira_key': 'PM-1'}) for user in employees
+        ],
+        'logsheet-status': lambda: [(user, 'GET', reverse('logsheet-status'), None) for user in employees],
+        'ingest-punches': lambda: [
+            (dataset.device, 'POST', reverse('ingest-punches'), ingest_batch(index)) for index in range(requests)
+        ],
+        'manager-logsheets': lambda: [
+            (manager, 'GET', reverse('manager-logsheets') + f'?status={logsheet_status}', None)
+            for logsheet_status in islice(cycle(['pending', 'approved', 'rejected']), requests)
+        ],
+        'approve-reject-logsheet': lambda: [
+            (manager, 'POST', reverse('approve-reject-logsheet', args=[pk]), {'action': 'approve', 'work_day_credit': 1.0})
+            for pk in single
+        ],
+        'bulk-approve-reject-logsheets': lambda: [
+            (manager, 'POST', reverse('bulk-approve-reject-logsheets'),
+             {'ids': bulk[start:start + BULK_IDS], 'action': 'reject'})
+            for start in range(0, len(bulk), BULK_IDS)
+        ],
+        'export-logsheets': lambda: [
+            (manager, 'GET', reverse('export-logsheets') + '?date_from={date_from}&date_to={date_to}'.format(**date_range), None)
+        ] * requests,
+        'manager-reports': lambda: [
+            (manager, 'GET', reverse('manager-reports') + '?period=week&date_from={date_from}&date_to={date_to}'.format(**date_range), None)
+        ] * requests,
+        'employee-bootstrap': lambda: [(user, 'GET', reverse('employee-bootstrap'), None) for user in employees],
+        'manager-bootstrap': lambda: [(manager, 'GET', reverse('manager-bootstrap'), None)] * requests,
+        'db-pool-stats': lambda: [(manager, 'GET', reverse('db-pool-stats'), None)] * requests,
+        'event-stream-ticket': lambda: [(user, 'POST', reverse('event-stream-ticket'), None) for user in employees],
+        'batch-time-logs': lambda: [
+            (manager, 'POST', reverse('batch-time-logs'), {
+                'pairs': [{'user': user.pk, 'date': dataset.last_day.isoformat()} for user in dataset.employees[:50]],
+            })
+        ] * requests,
+        'user-time-logs': lambda: [
+            (manager, 'GET', reverse('user-time-logs', args=[user.pk, dataset.last_day.isoformat()]), None)
+            for user in employees
+        ],
+    }
+    scenarios = []
+    for pattern in dashboard_urls.urlpatterns:
+        if pattern.name in SKIPPED:
+            continue
+        scenarios.append((pattern.name, builders[pattern.name]()))
+    return scenarios
+
+
+def access_tokens(users):
+    return {user.pk: str(MyTokenObtainPairSerializer.get_token(user).access_token) for user in users}
+
+
+def _test_client_host():
+    for host in settings.ALLOWED_HOSTS:
+        if host != '*' and not host.startswith('.'):
+            return host
+    return 'localhost'
+
+
+def _client_address(user):
+    return f'10.{user.pk >> 16 & 255}.{user.pk >> 8 & 255}.{user.pk & 255}'
+
+
+def run_client(scenarios, tokens):
+    """Sends the scenarios through the test client; reports include query counts."""
+    client = APIClient(HTTP_HOST=_test_client_host())
+    results = {}
+    for name, requests in scenarios:
+        latencies = []
+        queries = []
+        statuses = {}
+        started = time.perf_counter()
+        for user, method, path, body in requests:
+            # An address per user, so the per-IP throttles see separate clients
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {tokens[user.pk]}', REMOTE_ADDR=_client_address(user))
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                if method == 'GET':
+                    response = client.get(path)
+                else:
+                    response = client.post(path, body, format='json')
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                latencies.append(time.perf_counter() - start)
+            queries.append(len(context))
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        results[name] = {
+            **latency_report(latencies, time.perf_counter() - started),
+            'queries_per_request': round(sum(queries) / len(queries), 2) if queries else None,
+            'max_queries': max(queries, default=None),
+            'statuses': statuses,
+        }
+    return results
+
+
+def run_http(base_url, scenarios, tokens, concurrency):
+    """Sends the scenarios to a running server, ``concurrency`` requests at a time."""
+    results = {}
+    for name, requests in scenarios:
+        jobs = [
+            (method, path, {'Authorization': f'Bearer {tokens[user.pk]}'}, body)
+            for user, method, path, body in requests
+        ]
+        latencies, statuses, elapsed = asyncio.run(run_concurrently(base_url, jobs, concurrency))
+        results[name] = {
+            **latency_report(latencies, elapsed),
+            'concurrency': concurrency,
+            'statuses': statuses,
+        }
+    return results
+
+
+def compare(results, baseline):
+    """
+    Relative change of p95 latency and the change in queries per request of
+    every endpoint also present in ``baseline`` (a previous report).
+    """
+    changes = {}
+    for driver, endpoints in results.items():
+        for name, result in endpoints.items():
+            before = baseline.get(driver, {}).get(name)
+            if not before:
+                continue
+            change = {}
+            if before.get('p95_ms') and result.get('p95_ms') is not None:
+                change['p95_change'] = round(result['p95_ms'] / before['p95_ms'] - 1, 3)
+            if before.get('queries_per_request') is not None and result.get('queries_per_request') is not None:
+                change['queries_change'] = round(result['queries_per_request'] - before['queries_per_request'], 2)
+            changes.setdefault(driver, {})[name] = change
+    return changes
+
+
+def _best_of(repeat, function):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def compare_serializers(dataset, rows, repeat=3):
+    """
+    Times the ModelSerializer and values() paths over ``rows`` TimeLog and
+    LogSheetApproval rows of the dataset (query and serialization, best of
+    ``repeat``), then the rendering of the result by JSONRenderer and
+    ORJSONRenderer, and checks that every path gives the same bytes.
+    """
+    timelogs = TimeLog.objects.filter(user__username__startswith=dataset.prefix).order_by('id')
+    logsheets = LogSheetApproval.objects.filter(user__username__startswith=dataset.prefix).order_by('-date', '-id')
+    cases = {
+        'timelogs': (
+            lambda: TimeLogSerializer(list(timelogs[:rows]), many=True).data,
+            lambda: serialize_timelogs(timelogs.values(*TIMELOG_FIELDS)[:rows]),
+        ),
+        'logsheets': (
+            lambda: LogSheetApprovalSerializer(list(logsheets.select_related('user', 'manager')[:rows]), many=True).data,
+            lambda: serialize_logsheets(logsheets.values(*LOGSHEET_FIELDS)[:rows]),
+        ),
+    }
+    json_renderer, orjson_renderer = JSONRenderer(), ORJSONRenderer()
+    results = {}
+    for name, (model_path, lean_path) in cases.items():
+        model_seconds, model_data = _best_of(repeat, model_path)
+        lean_seconds, lean_data = _best_of(repeat, lean_path)
+        json_seconds, rendered = _best_of(repeat, lambda: json_renderer.render(lean_data))
+        outputs = [json_renderer.render(model_data), rendered]
+        result = {
+            'rows': len(lean_data),
+            'model_serializer_ms': round(model_seconds * 1000, 2),
+            'values_ms': round(lean_seconds * 1000, 2),
+            'speedup': round(model_seconds / lean_seconds, 2) if lean_seconds else None,
+            'json_render_ms': round(json_seconds * 1000, 2),
+            'orjson_render_ms': None,
+        }
+        if orjson is not None:
+            orjson_seconds, rendered = _best_of(repeat, lambda: orjson_renderer.render(lean_data))
+            outputs.append(rendered)
+            result['orjson_render_ms'] = round(orjson_seconds * 1000, 2)
+        result['identical'] = len(set(outputs)) == 1
+        results[name] = result
+    return results
@@ -0,0 +1,63 @@
+"""
+Everything a dashboard needs on load, in one response per role.
+
+The employee payload comes from the cached snapshot of today (no query when
+it is warm), the manager payload from two queries on the status index: the
+number of pending logsheets (skipped with ``count=false``, as on the
+manager-logsheets endpoint) and the first page of the pending queue. Rows are
+read with values() and shaped here rather than through ModelSerializers.
+"""
+from .models import LogSheetApproval
+from .pagination import encode_cursor
+from .services import STATE_AFTER
+from .snapshots import get_today_snapshot
+
+LOG_FIELDS = ('id', 'type', 'timestamp')
+LOGSHEET_FIELDS = ('id', 'date', 'jira_key', 'hours_worked', 'status', 'jira_status', 'user_id', 'user__username')
+
+
+def profile_data(user):
+    return {'id': user.pk, 'username': user.username, 'is_manager': user.is_manager}
+
+
+def build_employee_bootstrap(user, day):
+    snapshot = get_today_snapshot(user.pk, day)
+    logs = snapshot['logs']
+    return {
+        'profile': profile_data(user),
+        'date': day,
+        'state': STATE_AFTER[logs[-1]['type'] if logs else None],
+        'logs': [{field: log[field] for field in LOG_FIELDS} for log in logs],
+        'has_submitted': snapshot['has_submitted'],
+        'logsheet_status': snapshot['logsheet_status'],
+        'hours_worked': snapshot['hours_worked'],
+    }
+
+
+def build_manager_bootstrap(user, page_size, include_count=True):
+    pending = LogSheetApproval.objects.filter(status='pending')
+    # Same order and cursor as the manager-logsheets endpoint, so the next
+    # pages come from there
+    rows = list(pending.order_by('-date', '-id').values(*LOGSHEET_FIELDS)[:page_size + 1])
+    next_cursor = encode_cursor(rows[page_size - 1]['date'], rows[page_size - 1]['id']) if len(rows) > page_size else None
+    first_page = {'next_cursor': next_cursor}
+    if include_count:
+        first_page['count'] = pending.count()
+    return {
+        'profile': profile_data(user),
+        'pending': {
+            **first_page,
+            'results': [
+                {
+                    'id': row['id'],
+                    'user': {'id': row['user_id'], 'username': row['user__username']},
+                    'date': row['date'],
+                    'jira_key': row['jira_key'],
+                    'hours_worked': row['hours_worked'],
+                    'status': row['status'],
+                    'jira_status': row['jira_status'],
+                }
+                for row in rows[:page_size]
+            ],
+        },
+    }
@@ -0,0 +1,42 @@
+"""
+Conditional GET for the dashboard read endpoints.
+
+ETags are built from change counters (see dashboard.snapshots) or from fields
+already in hand, never from the payload, so a request whose If-None-Match
+still matches is answered 304 before anything is read or serialized.
+"""
+import hashlib
+
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+
+
+def make_etag(*parts):
+    return '"' + '-'.join(str(part) for part in parts) + '"'
+
+
+def digest(value):
+    return hashlib.md5(value.encode(), usedforsecurity=False).hexdigest()[:16]
+
+
+def is_fresh(request, etag):
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    # Weak comparison, as for GET requests
+    etags = {tag.removeprefix('W/') for tag in parse_etags(header)}
+    return '*' in etags or etag in etags
+
+
+def with_etag(response, etag):
+    response['ETag'] = etag
+    # Browsers may keep the response but must revalidate it on every use, and
+    # each user gets their own copy
+    response['Cache-Control'] = 'private, no-cache'
+    patch_vary_headers(response, ['Authorization'])
+    return response
+
+
+def not_modified(etag):
+    return with_etag(HttpResponseNotModified(), etag)
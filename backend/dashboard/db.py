@@ -0,0 +1,74 @@
+"""
+Database routing and connection pool metrics.
+
+When a 'replica' database is configured, reads made inside reporting_reads()
+(manager reports and payroll exports) go to it; everything else, punches and
+any read inside a transaction included, uses the primary.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+REPLICA = 'replica'
+
+_reporting = ContextVar('dashboard_reporting_reads', default=False)
+
+
+@contextmanager
+def reporting_reads():
+    """Sends the reads made in the block to the replica, if there is one."""
+    token = _reporting.set(True)
+    try:
+        yield
+    finally:
+        _reporting.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if (
+            _reporting.get()
+            and REPLICA in settings.DATABASES
+            and not connections['default'].in_atomic_block
+        ):
+            return REPLICA
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPLICA
+
+
+def pool_stats():
+    """
+    Connection settings of every database and, for those using the psycopg
+    pool, the pool counters of this process with its saturation (share of
+    the maximum size in use).
+    """
+    stats = {}
+    for alias in connections:
+        connection = connections[alias]
+        entry = {
+            'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+            'health_checks': connection.settings_dict['CONN_HEALTH_CHECKS'],
+            'pooled': False,
+        }
+        pool = getattr(connection, 'pool', None)
+        if pool is not None:
+            counters = pool.get_stats()
+            in_use = counters.get('pool_size', 0) - counters.get('pool_available', 0)
+            entry.update(
+                pooled=True,
+                saturation=round(in_use / counters['pool_max'], 3) if counters.get('pool_max') else None,
+                **counters,
+            )
+        stats[alias] = entry
+    return stats
@@ -0,0 +1,100 @@
+import asyncio
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+MANAGERS_CHANNEL = 'managers'
+
+
+def user_channel(user_id):
+    return f'user.{user_id}'
+
+
+class InProcessBroker:
+    """
+    Fans events out to the event streams open in this process.
+
+    Every subscriber gets a bounded asyncio queue, so an idle or slow client
+    costs a fixed amount of memory; when its queue is full the oldest event is
+    dropped. Any other broker (e.g. one backed by Redis pub/sub) only needs
+    the same subscribe/unsubscribe/publish methods.
+    """
+    queue_size = 100
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self, channels):
+        """Registers a queue on the given channels; must run in an event loop."""
+        subscription = (asyncio.get_running_loop(), asyncio.Queue(maxsize=self.queue_size))
+        with self._lock:
+            for channel in channels:
+                self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, channels, subscription):
+        with self._lock:
+            for channel in channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[channel]
+
+    def publish(self, channel, event):
+        """Delivers the event to every subscriber of the channel; safe to call from any thread."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_put_dropping_oldest, queue, event)
+            except RuntimeError:
+                # The subscriber's loop is closed; it unsubscribes on its way out
+                pass
+
+    async def listen(self, subscription, timeout):
+        """Waits for the next event, returning None if none arrives within timeout seconds."""
+        _, queue = subscription
+        try:
+            return await asyncio.wait_for(queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+def _put_dropping_oldest(queue, event):
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(event)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.DASHBOARD_EVENT_BROKER)()
+    return _broker
+
+
+def publish_event(channels, event_type, data):
+    """
+    Publishes an event to the given channels once the current transaction
+    commits, so clients never hear about rows they cannot read yet.
+    """
+    transaction.on_commit(lambda: send_event(channels, event_type, data))
+
+
+def send_event(channels, event_type, data):
+    """Publishes an event right away, for code running outside a transaction (the async views)."""
+    event = {'type': event_type, 'data': data}
+    broker = get_broker()
+    for channel in channels:
+        broker.publish(channel, event)
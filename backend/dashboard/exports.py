@@ -0,0 +1,99 @@
+"""
+Streaming payroll export of approved logsheets.
+
+Rows are read with values_list() through a chunked iterator (a server-side
+cursor on Postgres) and written out in blocks, so memory stays flat no matter
+how large the date range is.
+"""
+import csv
+import io
+import json
+
+from asgiref.sync import sync_to_async
+from django.db import router
+
+from .models import LogSheetApproval
+
+# (column name, ORM lookup)
+EXPORT_COLUMNS = [
+    ('logsheet_id', 'id'),
+    ('user_id', 'user_id'),
+    ('username', 'user__username'),
+    ('date', 'date'),
+    ('jira_key', 'jira_key'),
+    ('hours_worked', 'hours_worked'),
+    ('work_day_credit', 'work_day_credit'),
+    ('approved_by', 'manager__username'),
+]
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+CHUNK_SIZE = 2000
+
+
+def approved_logsheet_rows(date_from, date_to, chunk_size=CHUNK_SIZE):
+    # The database is picked now: the rows are only read once the view has
+    # returned its streaming response
+    return (
+        LogSheetApproval.objects.using(router.db_for_read(LogSheetApproval))
+        .filter(status='approved', date__gte=date_from, date__lte=date_to)
+        .order_by('date', 'id')
+        .values_list(*(lookup for _, lookup in EXPORT_COLUMNS))
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def _blocks(rows, block_size):
+    block = []
+    for row in rows:
+        block.append(row)
+        if len(block) >= block_size:
+            yield block
+            block = []
+    if block:
+        yield block
+
+
+def stream_csv(rows, block_size=CHUNK_SIZE):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in EXPORT_COLUMNS])
+    for block in _blocks(rows, block_size):
+        writer.writerows(block)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def stream_ndjson(rows, block_size=CHUNK_SIZE):
+    names = [name for name, _ in EXPORT_COLUMNS]
+    for block in _blocks(rows, block_size):
+        yield ''.join(
+            json.dumps(dict(zip(names, row)), default=str) + '\n'
+            for row in block
+        )
+
+
+def stream_export(export_format, date_from, date_to):
+    rows = approved_logsheet_rows(date_from, date_to)
+    if export_format == 'csv':
+        return stream_csv(rows)
+    return stream_ndjson(rows)
+
+
+async def aiterate(blocks):
+    """
+    Serves a sync block iterator to the ASGI handler, which would otherwise
+    read the whole export into memory before sending it.
+    """
+    done = object()
+    while True:
+        block = await sync_to_async(next)(blocks, done)
+        if block is done:
+            break
+        yield block
@@ -0,0 +1,118 @@
+"""
+Idempotency-Key support for the punch endpoints.
+
+A client may send an ``Idempotency-Key`` header with a punch. The result of
+the first request carrying a key is kept in the cache for
+DASHBOARD_IDEMPOTENCY_TTL seconds, and a request repeating the key gets that
+result back, marked ``Idempotent-Replayed: true``, without touching the
+database, and without using up a throttle token. While the first request
+is still running, a repeat gets 409.
+Keys are scoped to the user and bound to the endpoint they were first used on.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+IN_PROGRESS = 'in-progress'
+DONE = 'done'
+# A request that dies without finishing frees its key after this long
+LOCK_TIMEOUT = 60  # seconds
+
+
+class IdempotencyError(Exception):
+    def __init__(self, status_code, detail):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def get_cache():
+    return caches[settings.DASHBOARD_IDEMPOTENCY_CACHE]
+
+
+def record_key(user_id, key):
+    return f'dashboard:idempotency:{user_id}:{hashlib.sha256(key.encode()).hexdigest()}'
+
+
+def check_key(key):
+    if len(key) > MAX_KEY_LENGTH:
+        raise IdempotencyError(
+            status.HTTP_400_BAD_REQUEST, f'{HEADER} must be at most {MAX_KEY_LENGTH} characters.',
+        )
+
+
+def _replay(record, fingerprint):
+    state, stored_fingerprint, result = record
+    if stored_fingerprint != fingerprint:
+        raise IdempotencyError(
+            status.HTTP_422_UNPROCESSABLE_ENTITY, f'This {HEADER} was already used for another request.',
+        )
+    if state == IN_PROGRESS:
+        raise IdempotencyError(
+            status.HTTP_409_CONFLICT, f'A request with this {HEADER} is still being processed.',
+        )
+    return result
+
+
+def _finished(record, fingerprint):
+    if record is None or record[0] != DONE or record[1] != fingerprint:
+        return None
+    return record[2]
+
+
+def find_replay(user_id, key, fingerprint):
+    """
+    Returns the stored (status code, data) of a finished request with the key,
+    or None; lets the views skip throttling for replays.
+    """
+    return _finished(get_cache().get(record_key(user_id, key)), fingerprint)
+
+
+async def afind_replay(user_id, key, fingerprint):
+    return _finished(await get_cache().aget(record_key(user_id, key)), fingerprint)
+
+
+def run_idempotent(user_id, key, fingerprint, run):
+    """
+    Returns (status code, data, replayed): the stored result of an earlier
+    request with the key, or the result of ``run()``, which is then stored.
+    """
+    check_key(key)
+    cache = get_cache()
+    cache_key = record_key(user_id, key)
+    if not cache.add(cache_key, (IN_PROGRESS, fingerprint, None), LOCK_TIMEOUT):
+        record = cache.get(cache_key)
+        if record is not None:
+            return (*_replay(record, fingerprint), True)
+        # Expired in between
+        cache.set(cache_key, (IN_PROGRESS, fingerprint, None), LOCK_TIMEOUT)
+    try:
+        result = run()
+    except BaseException:
+        cache.delete(cache_key)
+        raise
+    cache.set(cache_key, (DONE, fingerprint, result), settings.DASHBOARD_IDEMPOTENCY_TTL)
+    return (*result, False)
+
+
+async def arun_idempotent(user_id, key, fingerprint, run):
+    """run_idempotent() for async views; ``run`` is a coroutine function."""
+    check_key(key)
+    cache = get_cache()
+    cache_key = record_key(user_id, key)
+    if not await cache.aadd(cache_key, (IN_PROGRESS, fingerprint, None), LOCK_TIMEOUT):
+        record = await cache.aget(cache_key)
+        if record is not None:
+            return (*_replay(record, fingerprint), True)
+        await cache.aset(cache_key, (IN_PROGRESS, fingerprint, None), LOCK_TIMEOUT)
+    try:
+        result = await run()
+    except BaseException:
+        await cache.adelete(cache_key)
+        raise
+    await cache.aset(cache_key, (DONE, fingerprint, result), settings.DASHBOARD_IDEMPOTENCY_TTL)
+    return (*result, False)
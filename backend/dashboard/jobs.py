@@ -0,0 +1,156 @@
+"""
+Background jobs for the work that must not hold up a request (calls to the
+issue tracker, e-mails, recomputations).
+
+enqueue() stores Job rows in the current transaction, so a job exists if and
+only if the change that asked for it is committed. A job runs the handler
+registered under its name (see dashboard.tasks) with its payload as keyword
+arguments, inside a transaction; a handler that raises is retried with
+exponential backoff until DASHBOARD_JOB_MAX_ATTEMPTS attempts have failed.
+
+DASHBOARD_JOB_EXECUTOR decides what happens once the transaction commits:
+DatabaseExecutor leaves the jobs to `manage.py run_jobs`, InProcessExecutor
+runs them right away in the process that queued them (tests, development
+without a worker). Either way a job is claimed before it runs, so it never
+runs twice at once.
+"""
+import logging
+import os
+import random
+import socket
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger('dashboard.jobs')
+
+_handlers = {}
+
+
+def job(name):
+    """Registers the decorated function as the handler of the jobs named ``name``."""
+    def register(handler):
+        _handlers[name] = handler
+        return handler
+    return register
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+class DatabaseExecutor:
+    def submit(self, jobs):
+        # Picked up by the next poll of a run_jobs worker
+        pass
+
+
+class InProcessExecutor:
+    def submit(self, jobs):
+        run_pending(ids=[queued.pk for queued in jobs])
+
+
+def get_executor():
+    return import_string(settings.DASHBOARD_JOB_EXECUTOR)()
+
+
+def enqueue(name, payload=None, delay=0):
+    return enqueue_many([(name, payload or {})], delay)[0]
+
+
+def enqueue_many(jobs, delay=0):
+    """Queues (name, payload) pairs with a single INSERT; they run once the transaction commits."""
+    run_at = timezone.now() + timedelta(seconds=delay)
+    created = Job.objects.bulk_create([
+        Job(name=name, payload=payload, max_attempts=settings.DASHBOARD_JOB_MAX_ATTEMPTS, run_at=run_at)
+        for name, payload in jobs
+    ])
+    executor = get_executor()
+    transaction.on_commit(lambda: executor.submit(created))
+    return created
+
+
+def retry_delay(attempts):
+    """Seconds before the next attempt: doubled after every failure, capped, with jitter."""
+    delay = min(settings.DASHBOARD_JOB_RETRY_DELAY * 2 ** (attempts - 1), settings.DASHBOARD_JOB_MAX_RETRY_DELAY)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def requeue_stale():
+    """Requeues the jobs of workers that died while running them."""
+    stale = Job.objects.filter(
+        status='running', locked_at__lt=timezone.now() - timedelta(seconds=settings.DASHBOARD_JOB_TIMEOUT),
+    )
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status='failed', finished_at=timezone.now(), locked_at=None, locked_by='',
+        last_error='Worker lost while running the job',
+    )
+    return failed + stale.update(status='queued', locked_at=None, locked_by='')
+
+
+def claim(worker, limit, ids=None):
+    """Marks up to ``limit`` due jobs as running for ``worker`` and returns them."""
+    now = timezone.now()
+    with transaction.atomic():
+        due = Job.objects.filter(status='queued', run_at__lte=now)
+        if ids is not None:
+            due = due.filter(pk__in=ids)
+        if connection.features.has_select_for_update_skip_locked:
+            # Concurrent workers skip each other's rows instead of waiting
+            due = due.select_for_update(skip_locked=True)
+        claimed = list(due.order_by('run_at', 'id').values_list('id', flat=True)[:limit])
+        # The status condition keeps the claim safe where rows cannot be locked
+        Job.objects.filter(pk__in=claimed, status='queued').update(
+            status='running', attempts=F('attempts') + 1, locked_at=now, locked_by=worker,
+        )
+    return list(Job.objects.filter(pk__in=claimed, status='running', locked_by=worker, locked_at=now).order_by('run_at', 'id'))
+
+
+def run_job(queued):
+    handler = _handlers.get(queued.name)
+    try:
+        if handler is None:
+            raise LookupError(f"No handler is registered for jobs named '{queued.name}'")
+        with transaction.atomic():
+            handler(**queued.payload)
+    except Exception as exc:
+        queued.last_error = ''.join(traceback.format_exception(exc))
+        if queued.attempts >= queued.max_attempts:
+            queued.status = 'failed'
+            queued.finished_at = timezone.now()
+            logger.error('Job %s failed after %s attempts: %s', queued, queued.attempts, exc)
+        else:
+            queued.status = 'queued'
+            queued.run_at = timezone.now() + timedelta(seconds=retry_delay(queued.attempts))
+            logger.warning('Job %s failed (attempt %s), retrying at %s: %s', queued, queued.attempts, queued.run_at, exc)
+    else:
+        queued.status = 'done'
+        queued.finished_at = timezone.now()
+        queued.last_error = ''
+    queued.locked_at = None
+    queued.locked_by = ''
+    queued.save(update_fields=['status', 'run_at', 'finished_at', 'last_error', 'locked_at', 'locked_by'])
+    return queued.status
+
+
+def run_pending(worker=None, limit=100, ids=None):
+    """Claims and runs the due jobs (or the due ones among ``ids``); returns how many ran."""
+    jobs = claim(worker or worker_name(), limit, ids)
+    for queued in jobs:
+        run_job(queued)
+    return len(jobs)
+
+
+def purge_finished(days):
+    """Deletes the jobs that finished (done or failed) more than ``days`` days ago."""
+    deleted, _ = Job.objects.filter(
+        status__in=['done', 'failed'], finished_at__lt=timezone.now() - timedelta(days=days),
+    ).delete()
+    return deleted
@@ -0,0 +1,150 @@
+import gzip
+import json
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from dashboard.models import ArchivedMonth, ArchivedTimeLog, DailyWorkSummary, TimeLog
+from dashboard.partitions import add_months, create_partitions, drop_partition, is_partitioned, month_start
+from dashboard.services import rebuild_daily_summary
+
+ARCHIVE_FIELDS = ['id', 'user_id', 'timestamp', 'work_date', 'type', 'device_id', 'idempotency_key']
+CHUNK_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves the raw punches of closed months older than "
+        "DASHBOARD_TIMELOG_RETENTION_MONTHS out of TimeLog, into the ArchivedTimeLog "
+        "table or gzipped NDJSON files, keeping their day totals in DailyWorkSummary. "
+        "On Postgres it also creates the partitions of the coming months."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months', type=int, default=settings.DASHBOARD_TIMELOG_RETENTION_MONTHS,
+            help='Months to keep, the current one included (default: DASHBOARD_TIMELOG_RETENTION_MONTHS).',
+        )
+        parser.add_argument('--to-dir', help='Write timelog-YYYY-MM.ndjson.gz files here instead of the archive table.')
+        parser.add_argument('--ahead', type=int, default=2, help='Postgres partitions to create ahead of the current month.')
+        parser.add_argument('--dry-run', action='store_true', help='Only list the months that would be archived.')
+
+    def handle(self, *args, **options):
+        if options['months'] < 1:
+            raise CommandError('--months must be at least 1.')
+        if options['to_dir'] and not os.path.isdir(options['to_dir']):
+            raise CommandError(f"Directory '{options['to_dir']}' does not exist.")
+
+        current = month_start(timezone.localdate())
+        cutoff = add_months(current, 1 - options['months'])
+        months = [
+            month_start(day)
+            for day in TimeLog.objects.filter(work_date__lt=cutoff).dates('work_date', 'month')
+        ]
+
+        if options['dry_run']:
+            for month in months:
+                self.stdout.write(f'Would archive {month:%Y-%m}')
+            return
+
+        partitioned = is_partitioned(connection)
+        if partitioned:
+            for month in create_partitions(connection, current, add_months(current, options['ahead'])):
+                self.stdout.write(f'Created partition for {month:%Y-%m}')
+
+        for month in months:
+            rows = self.archive_month(month, options['to_dir'], partitioned)
+            self.stdout.write(f'Archived {rows} punches of {month:%Y-%m}')
+        self.stdout.write(self.style.SUCCESS(f'Archived {len(months)} months.'))
+
+    def archive_month(self, month, directory, partitioned):
+        logs = TimeLog.objects.filter(work_date__gte=month, work_date__lt=add_months(month, 1))
+        path = temp_path = None
+        published = False
+        if directory:
+            path = archive_path(directory, month)
+            descriptor, temp_path = tempfile.mkstemp(dir=directory, prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+            os.close(descriptor)
+
+        def publish():
+            # Only once the rows are gone from TimeLog for good
+            nonlocal published
+            published = True
+            os.replace(temp_path, path)
+
+        try:
+            with transaction.atomic():
+                # Day totals outlive the raw punches, so every day needs a summary
+                summarized = set(
+                    DailyWorkSummary.objects.filter(work_date__gte=month, work_date__lt=add_months(month, 1))
+                    .values_list('user_id', 'work_date')
+                )
+                for user_id, work_date in logs.values_list('user_id', 'work_date').distinct().iterator():
+                    if (user_id, work_date) not in summarized:
+                        rebuild_daily_summary(user_id, work_date)
+
+                rows = logs.order_by('work_date', 'id').values(*ARCHIVE_FIELDS).iterator(chunk_size=CHUNK_SIZE)
+                if directory:
+                    location = path
+                    count = self.write_file(temp_path, rows)
+                    transaction.on_commit(publish)
+                else:
+                    location = 'table'
+                    count = self.write_table(rows)
+
+                if partitioned:
+                    drop_partition(connection, month)
+                # Whatever is left: the plain table, or rows that landed in the
+                # default partition
+                logs.delete()
+
+                archive, created = ArchivedMonth.objects.get_or_create(
+                    month=month, defaults={'rows': count, 'location': location},
+                )
+                if not created:
+                    # Late rows of an already archived month
+                    archive.rows += count
+                    archive.save(update_fields=['rows'])
+        except BaseException:
+            # Rolled back: the rows are still in TimeLog
+            if temp_path is not None and not published and os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return count
+
+    def write_table(self, rows):
+        count = 0
+        chunk = []
+        for row in rows:
+            chunk.append(ArchivedTimeLog(**row))
+            if len(chunk) >= CHUNK_SIZE:
+                ArchivedTimeLog.objects.bulk_create(chunk)
+                count += len(chunk)
+                chunk = []
+        ArchivedTimeLog.objects.bulk_create(chunk)
+        return count + len(chunk)
+
+    def write_file(self, path, rows):
+        count = 0
+        with gzip.open(path, 'wt', encoding='utf-8') as output:
+            for row in rows:
+                output.write(json.dumps(row, default=str) + '\n')
+                count += 1
+        return count
+
+
+def archive_path(directory, month):
+    """
+    timelog-YYYY-MM.ndjson.gz, or timelog-YYYY-MM-2.ndjson.gz and so on for
+    late rows of a month already archived: archive files are never appended to.
+    """
+    path = os.path.join(directory, f'timelog-{month:%Y-%m}.ndjson.gz')
+    part = 2
+    while os.path.exists(path):
+        path = os.path.join(directory, f'timelog-{month:%Y-%m}-{part}.ndjson.gz')
+        part += 1
+    return path
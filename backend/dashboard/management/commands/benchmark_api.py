@@ -0,0 +1,85 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from dashboard.benchmarks import (
+    SKIPPED, access_tokens, build_scenarios, compare, run_client, run_http, seed_dataset,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds a dataset and sends every dashboard endpoint a series of requests, "
+        "through the Django test client and/or over HTTP to a running server, then "
+        "reports p50/p95/p99 latency, queries per request and throughput as JSON. "
+        "Save the report with --output and pass it as --baseline on a later commit "
+        "to see what changed. The dataset is deleted afterwards unless --keep is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200, help='Employees to seed.')
+        parser.add_argument('--days', type=int, default=20, help='Past working days of punches and logsheets per employee.')
+        parser.add_argument('--requests', type=int, default=100, help='Requests per endpoint (at most --users).')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed of the generated data.')
+        parser.add_argument(
+            '--url', action='append', default=[],
+            help='Also drive a running server using this database, e.g. http://127.0.0.1:8000 (repeatable).',
+        )
+        parser.add_argument('--no-client', action='store_true', help='Skip the in-process test client run.')
+        parser.add_argument('--concurrency', type=int, default=20, help='Concurrent connections over HTTP.')
+        parser.add_argument('--baseline', help='Report of an earlier run to compare against.')
+        parser.add_argument('--output', help='Also write the report to this file.')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded data.')
+
+    def handle(self, *args, **options):
+        if options['requests'] > options['users']:
+            raise CommandError('--requests cannot exceed --users.')
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as baseline_file:
+                baseline = json.load(baseline_file)['results']
+
+        drivers = [] if options['no_client'] else [('client', None)]
+        drivers += [(f'http:{url}', url) for url in options['url']]
+        if not drivers:
+            raise CommandError('Nothing to run: pass --url or drop --no-client.')
+
+        results = {}
+        for index, (driver, url) in enumerate(drivers):
+            # Each driver gets its own data: the punch and approval endpoints
+            # use it up
+            dataset = seed_dataset(
+                f'bench{int(time.time())}-{index}-', options['users'], options['days'], options['seed'],
+            )
+            try:
+                scenarios = build_scenarios(dataset, options['requests'])
+                tokens = access_tokens([*dataset.employees, dataset.manager, dataset.device])
+                if url is None:
+                    results[driver] = run_client(scenarios, tokens)
+                else:
+                    results[driver] = run_http(url, scenarios, tokens, options['concurrency'])
+            finally:
+                if not options['keep']:
+                    dataset.delete()
+
+        report = {
+            'settings': {
+                'users': options['users'],
+                'days': options['days'],
+                'requests': options['requests'],
+                'seed': options['seed'],
+                'database': connection.vendor,
+            },
+            'skipped': SKIPPED,
+            'results': results,
+        }
+        if baseline is not None:
+            report['changes'] = compare(results, baseline)
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as report_file:
+                report_file.write(output + '\n')
+        self.stdout.write(output)
@@ -0,0 +1,64 @@
+import asyncio
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.loadgen import latency_report, run_concurrently
+from dashboard.models import User
+from dashboard.serializers import MyTokenObtainPairSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Fires concurrent check-ins (one per fresh user) at one or more running "
+        "servers and reports throughput and latency percentiles, e.g. to compare "
+        "`runserver` (WSGI) with `uvicorn core.asgi:application` and "
+        "DASHBOARD_ASYNC_VIEWS=True. The servers must use this database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'targets', nargs='+',
+            help='Servers to benchmark as label=base_url, e.g. wsgi=http://127.0.0.1:8000/api',
+        )
+        parser.add_argument('--users', type=int, default=500, help='Check-ins (and users) per target.')
+        parser.add_argument('--concurrency', type=int, default=50, help='Concurrent connections.')
+        parser.add_argument('--keep', action='store_true', help='Keep the generated users and their logs.')
+
+    def handle(self, *args, **options):
+        targets = []
+        for target in options['targets']:
+            label, sep, base_url = target.partition('=')
+            if not sep:
+                raise CommandError(f"Invalid target '{target}'. Use label=base_url.")
+            targets.append((label, base_url))
+
+        results = {}
+        for label, base_url in targets:
+            prefix = f'bench-{label}-{int(time.time())}-'
+            users = User.objects.bulk_create(
+                [User(username=f'{prefix}{i}') for i in range(options['users'])]
+            )
+            try:
+                jobs = [
+                    ('POST', '/check-in/', {'Authorization': f'Bearer {self.access_token(user)}'}, None)
+                    for user in users
+                ]
+                latencies, statuses, elapsed = asyncio.run(
+                    run_concurrently(base_url, jobs, options['concurrency'])
+                )
+            finally:
+                if not options['keep']:
+                    User.objects.filter(username__startswith=prefix).delete()
+
+            results[label] = {
+                **latency_report(latencies, elapsed),
+                'concurrency': options['concurrency'],
+                'statuses': statuses,
+            }
+
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def access_token(self, user):
+        return str(MyTokenObtainPairSerializer.get_token(user).access_token)
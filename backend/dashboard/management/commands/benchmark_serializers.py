@@ -0,0 +1,53 @@
+import json
+import math
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.benchmarks import compare_serializers, seed_dataset
+from dashboard.renderers import orjson
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds a dataset and compares the DRF ModelSerializers of time logs and "
+        "logsheets with the values() serialization of dashboard.rows (and the "
+        "JSON renderers), checking that both produce the same JSON. The dataset "
+        "is deleted afterwards unless --keep is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Rows serialized per model.')
+        parser.add_argument('--days', type=int, default=20, help='Days of data per seeded employee.')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement; the best is kept.')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed of the generated data.')
+        parser.add_argument('--output', help='Also write the report to this file.')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded data.')
+
+    def handle(self, *args, **options):
+        if options['rows'] < 1 or options['days'] < 1 or options['repeat'] < 1:
+            raise CommandError('--rows, --days and --repeat must be positive.')
+        # About one logsheet and four punches per employee and day
+        users = math.ceil(options['rows'] / options['days'])
+        dataset = seed_dataset(f'serbench{int(time.time())}-', users, options['days'], options['seed'])
+        try:
+            results = compare_serializers(dataset, options['rows'], options['repeat'])
+        finally:
+            if not options['keep']:
+                dataset.delete()
+
+        report = {
+            'settings': {
+                'rows': options['rows'],
+                'repeat': options['repeat'],
+                'orjson': orjson is not None,
+            },
+            'results': results,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as report_file:
+                report_file.write(output + '\n')
+        self.stdout.write(output)
+        if not all(result['identical'] for result in results.values()):
+            raise CommandError('The serializers disagree; see "identical" in the report.')
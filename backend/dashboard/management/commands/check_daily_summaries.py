@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.models import ArchivedMonth, DailyWorkSummary, TimeLog
+from dashboard.partitions import add_months
+from dashboard.services import find_summary_mismatches
+from .rebuild_daily_summaries import parse_date
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares DailyWorkSummary rows against totals recomputed from the raw "
+        "TimeLog entries and reports days that disagree or have no summary."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='Only check summaries of this user id.')
+        parser.add_argument('--from', dest='date_from', type=parse_date, help='First day to check (YYYY-MM-DD).')
+        parser.add_argument('--to', dest='date_to', type=parse_date, help='Last day to check (YYYY-MM-DD).')
+
+    def handle(self, *args, **options):
+        summaries = DailyWorkSummary.objects.all()
+        logs = TimeLog.objects.all()
+        if options['user'] is not None:
+            summaries = summaries.filter(user_id=options['user'])
+            logs = logs.filter(user_id=options['user'])
+        if options['date_from']:
+            summaries = summaries.filter(work_date__gte=options['date_from'])
+            logs = logs.filter(work_date__gte=options['date_from'])
+        if options['date_to']:
+            summaries = summaries.filter(work_date__lte=options['date_to'])
+            logs = logs.filter(work_date__lte=options['date_to'])
+
+        # Archived days have totals but no raw punches left to compare against
+        last_archived = ArchivedMonth.objects.order_by('-month').values_list('month', flat=True).first()
+        if last_archived is not None:
+            first_day = add_months(last_archived, 1)
+            summaries = summaries.filter(work_date__gte=first_day)
+            logs = logs.filter(work_date__gte=first_day)
+
+        problems = 0
+        for user_id, work_date, summary, expected in find_summary_mismatches(summaries, logs):
+            problems += 1
+            if summary is None:
+                self.stdout.write(f'Missing summary for user {user_id} on {work_date}')
+                continue
+            self.stdout.write(
+                f'Mismatch for user {user_id} on {work_date}: '
+                f'stored worked={summary.worked_seconds:.0f}s break={summary.break_seconds:.0f}s state={summary.state}, '
+                f"expected worked={expected['worked_seconds']:.0f}s break={expected['break_seconds']:.0f}s state={expected['state']}"
+            )
+
+        if problems:
+            raise CommandError(f'{problems} daily summaries are inconsistent. Run rebuild_daily_summaries to fix them.')
+        self.stdout.write(self.style.SUCCESS('All daily summaries match the time log.'))
@@ -0,0 +1,67 @@
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+
+from dashboard.models import TimeLog, User
+from dashboard.workdays import day_bounds, user_calendar, user_work_date
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the query plan and latency of the day-scoped TimeLog lookup "
+        "using a timestamp date cast, the UTC bounds of the user's work day and "
+        "the indexed work_date column."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='User id to query (defaults to the user with the most logs).')
+        parser.add_argument('--date', help="Day to query as YYYY-MM-DD (defaults to the user's current work day).")
+        parser.add_argument('--repeat', type=int, default=50, help='Number of timed runs per query.')
+
+    def handle(self, *args, **options):
+        user_id = options['user']
+        if user_id is None:
+            busiest = (
+                User.objects.annotate(log_count=Count('time_logs'))
+                .order_by('-log_count')
+                .values_list('id', flat=True)
+                .first()
+            )
+            if busiest is None:
+                raise CommandError('There are no users to query.')
+            user_id = busiest
+        user = User.objects.filter(pk=user_id).first()
+        if user is None:
+            raise CommandError(f'User {user_id} does not exist.')
+
+        if options['date']:
+            try:
+                day = datetime.strptime(options['date'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('Invalid date format. Use YYYY-MM-DD.')
+        else:
+            day = user_work_date(user)
+
+        start, end = day_bounds(*user_calendar(user), day)
+        queries = [
+            ('timestamp__date (before)', TimeLog.objects.filter(user_id=user_id, timestamp__date=day)),
+            ('timestamp range', TimeLog.objects.filter(user_id=user_id, timestamp__gte=start, timestamp__lt=end)),
+            ('work_date (after)', TimeLog.objects.filter(user_id=user_id, work_date=day)),
+        ]
+        for label, queryset in queries:
+            queryset = queryset.order_by('timestamp')
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            self.stdout.write(queryset.explain())
+
+            timings = []
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            self.stdout.write(
+                f"median {timings[len(timings) // 2]:.3f} ms, "
+                f"max {timings[-1]:.3f} ms over {len(timings)} runs\n"
+            )
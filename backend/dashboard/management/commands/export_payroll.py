@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.exports import EXPORT_FORMATS, stream_export
+from .rebuild_daily_summaries import parse_date
+
+
+class Command(BaseCommand):
+    help = "Writes approved logsheets of a date range as CSV or NDJSON, streaming in constant memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from', type=parse_date, required=True, help='First day (YYYY-MM-DD).')
+        parser.add_argument('--to', dest='date_to', type=parse_date, required=True, help='Last day (YYYY-MM-DD).')
+        parser.add_argument('--format', dest='export_format', choices=sorted(EXPORT_FORMATS), default='csv')
+        parser.add_argument('--output', help='File to write (defaults to stdout).')
+
+    def handle(self, *args, **options):
+        blocks = stream_export(options['export_format'], options['date_from'], options['date_to'])
+        if options['output']:
+            with open(options['output'], 'w', newline='') as output:
+                for block in blocks:
+                    output.write(block)
+        else:
+            for block in blocks:
+                self.stdout.write(block, ending='')
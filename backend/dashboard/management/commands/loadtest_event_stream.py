@@ -0,0 +1,96 @@
+import asyncio
+import resource
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.models import User
+from dashboard.serializers import MyTokenObtainPairSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Opens many concurrent idle connections to the event stream of a running "
+        "ASGI server (e.g. `uvicorn core.asgi:application`) and reports how many "
+        "were accepted and stayed open."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000/api/events/', help='Event stream URL.')
+        parser.add_argument('--connections', type=int, default=5000, help='Number of concurrent connections.')
+        parser.add_argument('--hold', type=float, default=30.0, help='Seconds to keep the connections open.')
+        parser.add_argument('--user', type=int, help='User id to connect as (defaults to the first user).')
+        parser.add_argument('--ramp', type=int, default=500, help='Connections opened per batch.')
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(pk=options['user']).first() if options['user'] else User.objects.order_by('pk').first()
+        if user is None:
+            raise CommandError('There is no user to connect as.')
+        token = str(MyTokenObtainPairSerializer.get_token(user).access_token)
+
+        # Each connection needs a file descriptor on this side too
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        wanted = options['connections'] + 100
+        if soft < wanted:
+            try:
+                resource.setrlimit(resource.RLIMIT_NOFILE, (min(wanted, hard), hard))
+            except ValueError:
+                pass
+
+        url = urlsplit(options['url'])
+        report = asyncio.run(self.run(url, token, options))
+
+        self.stdout.write(
+            f"opened {report['opened']}/{options['connections']} connections "
+            f"in {report['connect_seconds']:.2f}s, {report['failed']} failed"
+        )
+        self.stdout.write(f"still open after {options['hold']:.0f}s: {report['alive']}")
+        if report['errors']:
+            self.stdout.write(f"first error: {report['errors'][0]}")
+
+    async def run(self, url, token, options):
+        host = url.hostname
+        port = url.port or 80
+        request = (
+            f'GET {url.path} HTTP/1.1\r\nHost: {url.netloc}\r\nAuthorization: Bearer {token}\r\n'
+            f'Accept: text/event-stream\r\nConnection: keep-alive\r\n\r\n'
+        ).encode()
+
+        errors = []
+
+        async def connect():
+            try:
+                reader, writer = await asyncio.open_connection(host, port)
+                writer.write(request)
+                await writer.drain()
+                status_line = await asyncio.wait_for(reader.readline(), 30)
+                if b' 200 ' not in status_line:
+                    raise ConnectionError(status_line.decode(errors='replace').strip())
+                return reader, writer
+            except (OSError, asyncio.TimeoutError, ConnectionError) as exc:
+                errors.append(repr(exc))
+                return None
+
+        start = time.perf_counter()
+        connections = []
+        for offset in range(0, options['connections'], options['ramp']):
+            batch = min(options['ramp'], options['connections'] - offset)
+            connections += await asyncio.gather(*(connect() for _ in range(batch)))
+        connect_seconds = time.perf_counter() - start
+        opened = [connection for connection in connections if connection is not None]
+
+        await asyncio.sleep(options['hold'])
+
+        alive = 0
+        for reader, writer in opened:
+            if not reader.at_eof() and not writer.is_closing():
+                alive += 1
+            writer.close()
+        return {
+            'opened': len(opened),
+            'failed': len(connections) - len(opened),
+            'alive': alive,
+            'connect_seconds': connect_seconds,
+            'errors': errors,
+        }
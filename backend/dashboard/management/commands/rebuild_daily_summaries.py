@@ -0,0 +1,39 @@
+import argparse
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+
+from dashboard.models import TimeLog
+from dashboard.services import rebuild_daily_summary
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid date '{value}'. Use YYYY-MM-DD.")
+
+
+class Command(BaseCommand):
+    help = "Rebuilds DailyWorkSummary rows from the raw TimeLog entries."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='Only rebuild summaries of this user id.')
+        parser.add_argument('--from', dest='date_from', type=parse_date, help='First day to rebuild (YYYY-MM-DD).')
+        parser.add_argument('--to', dest='date_to', type=parse_date, help='Last day to rebuild (YYYY-MM-DD).')
+
+    def handle(self, *args, **options):
+        days = TimeLog.objects.all()
+        if options['user'] is not None:
+            days = days.filter(user_id=options['user'])
+        if options['date_from']:
+            days = days.filter(work_date__gte=options['date_from'])
+        if options['date_to']:
+            days = days.filter(work_date__lte=options['date_to'])
+        days = days.values_list('user_id', 'work_date').distinct().order_by('work_date', 'user_id')
+
+        rebuilt = 0
+        for user_id, work_date in days.iterator(chunk_size=2000):
+            rebuild_daily_summary(user_id, work_date)
+            rebuilt += 1
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rebuilt} daily summaries.'))
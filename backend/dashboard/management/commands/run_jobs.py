@@ -0,0 +1,50 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from dashboard.jobs import purge_finished, requeue_stale, run_pending, worker_name
+
+PURGE_INTERVAL = 3600  # seconds
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs queued background jobs (JIRA key checks, manager notifications, "
+        "summary recomputation) until stopped. Start as many workers as needed; "
+        "each job is claimed by one of them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, default=20, help='Jobs claimed at a time.')
+        parser.add_argument('--sleep', type=float, default=1.0, help='Seconds to wait when no job is due.')
+        parser.add_argument('--once', action='store_true', help='Run the jobs due now, then exit.')
+        parser.add_argument(
+            '--keep-days', type=int, default=7,
+            help='Delete finished jobs older than this many days (0 keeps them).',
+        )
+
+    def handle(self, *args, **options):
+        worker = worker_name()
+        total = 0
+        purged_at = 0.0
+        self.stdout.write(f'Worker {worker} started ({settings.DASHBOARD_JOB_EXECUTOR}).')
+        try:
+            while True:
+                if options['keep_days'] and time.monotonic() - purged_at >= PURGE_INTERVAL:
+                    purge_finished(options['keep_days'])
+                    purged_at = time.monotonic()
+
+                ran = run_pending(worker, options['batch'])
+                total += ran
+                if not ran:
+                    requeued = requeue_stale()
+                    if requeued:
+                        self.stdout.write(f'Requeued {requeued} stale jobs')
+                        continue
+                    if options['once']:
+                        break
+                    time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f'Ran {total} jobs.'))
@@ -0,0 +1,84 @@
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from dashboard.models import User
+from dashboard.seeding import PASSWORD, delete_seeded, seed_data
+from dashboard.workdays import validate_timezone
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates synthetic employees and managers with punches, day summaries "
+        "and logsheets (mixed statuses) on the weekdays before today. The same "
+        "--seed always gives the same data. On Postgres, --copy writes the rows "
+        "with COPY instead of bulk_create; --users 10000 --days 250 gives about "
+        "10 million time logs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100, help='Employees to create.')
+        parser.add_argument('--managers', type=int, default=5, help='Managers to create.')
+        parser.add_argument('--days', type=int, default=60, help='Weekdays of data per employee.')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed of the generated data.')
+        parser.add_argument('--prefix', default='seed-', help='Prefix of the generated usernames.')
+        parser.add_argument(
+            '--until', help='Last day of data as YYYY-MM-DD (defaults to yesterday).',
+        )
+        parser.add_argument(
+            '--timezone', action='append', default=[], dest='timezones',
+            help='Time zone to spread employees over (repeatable; defaults to TIME_ZONE).',
+        )
+        parser.add_argument('--chunk-size', type=int, default=500, help='Employees generated per transaction.')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk_create() INSERT.')
+        parser.add_argument('--copy', action='store_true', help='Write rows with COPY (Postgres only).')
+        parser.add_argument(
+            '--replace', action='store_true', help='Delete the data of an earlier run with the same --prefix first.',
+        )
+
+    def handle(self, *args, **options):
+        for name in ('users', 'managers', 'days', 'chunk_size', 'batch_size'):
+            if options[name] < (0 if name == 'managers' else 1):
+                raise CommandError(f"--{name.replace('_', '-')} must be positive.")
+        if options['copy'] and connection.vendor != 'postgresql':
+            raise CommandError('--copy needs a Postgres database.')
+        for zone_name in options['timezones']:
+            try:
+                validate_timezone(zone_name)
+            except ValidationError as exc:
+                raise CommandError(exc.messages[0])
+        last_day = None
+        if options['until']:
+            try:
+                last_day = datetime.strptime(options['until'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('Invalid date format. Use YYYY-MM-DD.')
+
+        prefix = options['prefix']
+        if User.objects.filter(username__startswith=prefix).exists():
+            if not options['replace']:
+                raise CommandError(f'Users starting with "{prefix}" already exist; pass --replace to delete them first.')
+            self.stdout.write(f'Deleted {delete_seeded(prefix)} rows of the previous run.')
+
+        def progress(done, counts, elapsed):
+            self.stdout.write(
+                f"{done}/{options['users']} employees, {counts['time_logs']} time logs "
+                f"({counts['time_logs'] / elapsed:,.0f}/s)"
+            )
+
+        counts = seed_data(
+            prefix, options['users'], options['managers'], options['days'],
+            seed=options['seed'],
+            timezones=options['timezones'],
+            chunk_size=options['chunk_size'],
+            batch_size=options['batch_size'],
+            use_copy=options['copy'],
+            last_day=last_day,
+            progress=progress if options['verbosity'] > 1 else None,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {counts['users']} users, {counts['time_logs']} time logs, {counts['summaries']} day "
+            f"summaries and {counts['logsheets']} logsheets. Password of every user: {PASSWORD}"
+        ))
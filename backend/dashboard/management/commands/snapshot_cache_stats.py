@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.snapshots import get_snapshot_stats, reset_snapshot_stats
+
+
+class Command(BaseCommand):
+    help = "Prints the hit/miss counters of the per-user today snapshot cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the counters after printing them.')
+
+    def handle(self, *args, **options):
+        stats = get_snapshot_stats()
+        ratio = 'n/a' if stats['hit_ratio'] is None else f"{stats['hit_ratio']:.1%}"
+        self.stdout.write(f"hits: {stats['hits']}, misses: {stats['misses']}, hit ratio: {ratio}")
+        if options['reset']:
+            reset_snapshot_stats()
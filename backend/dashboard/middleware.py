@@ -0,0 +1,135 @@
+"""
+Per-request instrumentation: wall time, database query count and time, and
+response size of every request, sent back as a ``Server-Timing`` header and
+logged as one JSON line on the ``dashboard.requests`` logger.
+
+Queries are counted by an execute wrapper installed on every database
+connection (see DashboardConfig.ready) that reports to the collector of the
+current request through a context variable, so queries run by async views in
+sync_to_async threads are counted too.
+
+A share of requests (DASHBOARD_PROFILE_SAMPLE_RATE) runs under cProfile; the
+profile of such a request is written to DASHBOARD_PROFILE_DIR if it took at
+least DASHBOARD_PROFILE_SLOW_MS. Only requests served under WSGI are
+profiled: cProfile follows a single thread.
+"""
+import cProfile
+import json
+import logging
+import os
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+logger = logging.getLogger('dashboard.requests')
+
+_collector = ContextVar('dashboard_query_collector', default=None)
+
+
+class QueryCollector:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+def record_query(execute, sql, params, many, context):
+    collector = _collector.get()
+    if collector is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        collector.count += 1
+        collector.seconds += time.perf_counter() - start
+
+
+def instrument_connection(sender, connection, **kwargs):
+    # connection_created fires on every reconnect of the same wrapper
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class RequestProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        collector = QueryCollector()
+        token = _collector.set(collector)
+        profiler = self.start_profiler()
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            _collector.reset(token)
+        self.finish(request, response, collector, time.perf_counter() - start, profiler)
+        return response
+
+    async def __acall__(self, request):
+        # Not profiled: an async view's work is spread over the event loop
+        # and worker threads
+        collector = QueryCollector()
+        token = _collector.set(collector)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _collector.reset(token)
+        self.finish(request, response, collector, time.perf_counter() - start, None)
+        return response
+
+    def start_profiler(self):
+        rate = settings.DASHBOARD_PROFILE_SAMPLE_RATE
+        if not rate or random.random() >= rate:
+            return None
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def finish(self, request, response, collector, seconds, profiler):
+        match = request.resolver_match
+        view = match.view_name if match else None
+        size = None if response.streaming else len(response.content)
+
+        response['Server-Timing'] = (
+            f'app;dur={seconds * 1000:.1f}, '
+            f'db;dur={collector.seconds * 1000:.1f};desc="{collector.count} queries"'
+        )
+
+        profile_path = None
+        if profiler is not None and seconds * 1000 >= settings.DASHBOARD_PROFILE_SLOW_MS:
+            profile_path = self.dump_profile(profiler, view)
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'view': view,
+                'status': response.status_code,
+                'duration_ms': round(seconds * 1000, 2),
+                'db_queries': collector.count,
+                'db_ms': round(collector.seconds * 1000, 2),
+                'response_bytes': size,
+                'profile': profile_path,
+            }))
+
+    def dump_profile(self, profiler, view):
+        directory = settings.DASHBOARD_PROFILE_DIR
+        os.makedirs(directory, exist_ok=True)
+        name = f"{int(time.time() * 1000)}-{(view or 'unresolved').replace(':', '-')}-{os.getpid()}.prof"
+        path = os.path.join(directory, name)
+        profiler.dump_stats(path)
+        return path
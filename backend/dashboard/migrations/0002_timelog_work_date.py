@@ -0,0 +1,42 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:02
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_work_date(apps, schema_editor):
+    TimeLog = apps.get_model('dashboard', 'TimeLog')
+    batch = []
+    for log in TimeLog.objects.only('id', 'timestamp').iterator(chunk_size=2000):
+        log.work_date = timezone.localdate(log.timestamp)
+        batch.append(log)
+        if len(batch) >= 2000:
+            TimeLog.objects.bulk_update(batch, ['work_date'])
+            batch = []
+    if batch:
+        TimeLog.objects.bulk_update(batch, ['work_date'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timelog',
+            name='work_date',
+            field=models.DateField(default=django.utils.timezone.localdate),
+        ),
+        migrations.RunPython(backfill_work_date, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='timelog',
+            index=models.Index(fields=['user', 'work_date', 'timestamp'], name='timelog_user_day_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timelog',
+            index=models.Index(fields=['user', 'work_date', 'type'], name='timelog_user_day_type_idx'),
+        ),
+    ]
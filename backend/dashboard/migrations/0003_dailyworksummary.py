@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0002_timelog_work_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyWorkSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('work_date', models.DateField()),
+                ('worked_seconds', models.FloatField(default=0.0)),
+                ('break_seconds', models.FloatField(default=0.0)),
+                ('state', models.CharField(choices=[('off_duty', 'Off duty'), ('working', 'Working'), ('on_break', 'On break'), ('checked_out', 'Checked out')], default='off_duty', max_length=20)),
+                ('first_punch_at', models.DateTimeField(blank=True, null=True)),
+                ('last_punch_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'work_date'), name='unique_daily_summary')],
+            },
+        ),
+    ]
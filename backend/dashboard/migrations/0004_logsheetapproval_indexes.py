@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0003_dailyworksummary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='logsheetapproval',
+            index=models.Index(fields=['status', '-date', '-id'], name='logsheet_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='logsheetapproval',
+            index=models.Index(fields=['user', 'status', '-date', '-id'], name='logsheet_user_status_date_idx'),
+        ),
+    ]
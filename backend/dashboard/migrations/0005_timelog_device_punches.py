@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:16
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0004_logsheetapproval_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='timelog',
+            options={'permissions': [('ingest_punches', 'Can ingest punches recorded by devices')]},
+        ),
+        migrations.AddField(
+            model_name='timelog',
+            name='device_id',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='timelog',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AlterField(
+            model_name='timelog',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddConstraint(
+            model_name='timelog',
+            constraint=models.UniqueConstraint(condition=models.Q(('idempotency_key__isnull', False)), fields=('device_id', 'idempotency_key'), name='unique_device_punch'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from dashboard.partitions import partition_timelog, unpartition_timelog
+
+
+def partition(apps, schema_editor):
+    partition_timelog(schema_editor)
+
+
+def unpartition(apps, schema_editor):
+    unpartition_timelog(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0005_timelog_device_punches'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(unique=True)),
+                ('rows', models.PositiveIntegerField(default=0)),
+                ('location', models.CharField(max_length=255)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedTimeLog',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('timestamp', models.DateTimeField()),
+                ('work_date', models.DateField()),
+                ('type', models.CharField(choices=[('check_in', 'Check-in'), ('break_start', 'Break Start'), ('break_end', 'Break End'), ('check_out', 'Check-out')], max_length=20)),
+                ('device_id', models.CharField(blank=True, default='', max_length=64)),
+                ('idempotency_key', models.CharField(blank=True, max_length=64, null=True)),
+            ],
+        ),
+        migrations.RemoveConstraint(
+            model_name='timelog',
+            name='unique_device_punch',
+        ),
+        migrations.AddConstraint(
+            model_name='timelog',
+            constraint=models.UniqueConstraint(condition=models.Q(('idempotency_key__isnull', False)), fields=('device_id', 'idempotency_key', 'work_date'), name='unique_device_punch'),
+        ),
+        migrations.AddField(
+            model_name='archivedtimelog',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_time_logs', to=settings.AUTH_USER_MODEL),
+        ),
+        # Postgres only; a no-op elsewhere
+        migrations.RunPython(partition, unpartition),
+    ]
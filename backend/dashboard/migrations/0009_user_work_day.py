@@ -0,0 +1,25 @@
+# Generated by Django 5.2.5 on 2026-10-18 21:40
+
+import dashboard.workdays
+import datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0008_job_queue_logsheet_jira_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='day_starts_at',
+            field=models.TimeField(default=datetime.time(0, 0)),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='timezone',
+            field=models.CharField(blank=True, default='', max_length=64, validators=[dashboard.workdays.validate_timezone]),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 22:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0009_user_work_day'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='timelog',
+            name='work_date',
+            field=models.DateField(),
+        ),
+    ]
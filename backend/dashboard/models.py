@@ -1,9 +1,19 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.utils import timezone
+from datetime import time
+from .workdays import validate_timezone
 
 # Create your models here.
 class User(AbstractUser):
     is_manager = models.BooleanField(default=False)
+    # Copied into access tokens; bumping it revokes every token issued before
+    token_version = models.PositiveIntegerField(default=0)
+    # Work days (see dashboard.workdays): the user's time zone, TIME_ZONE if
+    # blank, and the local time at which a work day starts; set it after the
+    # end of a night shift so that the shift counts as one day
+    timezone = models.CharField(max_length=64, blank=True, default='', validators=[validate_timezone])
+    day_starts_at = models.TimeField(default=time(0))
 
     # Add a related_name to the groups and user_permissions fields
     groups = models.ManyToManyField(
@@ -30,8 +40,34 @@ class TimeLog(models.Model):
         ('check_out', 'Check-out'),
     )
     user = models.ForeignKey(User, on_delete=models.CASCADE,related_name='time_logs')
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Server time for live punches, the device's time for ingested ones
+    timestamp = models.DateTimeField(default=timezone.now)
+    # Work day of the punch in the user's calendar (see dashboard.workdays),
+    # always given by the caller; stored so day-scoped lookups can use an
+    # index instead of casting every timestamp to a date
+    work_date = models.DateField()
     type = models.CharField(max_length=20, choices=TYPE_CHOICES)
+    # Set for punches replayed by kiosks and badge readers
+    device_id = models.CharField(max_length=64, blank=True, default='')
+    idempotency_key = models.CharField(max_length=64, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'work_date', 'timestamp'], name='timelog_user_day_ts_idx'),
+            models.Index(fields=['user', 'work_date', 'type'], name='timelog_user_day_type_idx'),
+        ]
+        constraints = [
+            # work_date is part of the key because TimeLog is partitioned on
+            # it (see dashboard.partitions); a replayed punch has the same date
+            models.UniqueConstraint(
+                fields=['device_id', 'idempotency_key', 'work_date'],
+                condition=models.Q(idempotency_key__isnull=False),
+                name='unique_device_punch',
+            ),
+        ]
+        permissions = [
+            ('ingest_punches', 'Can ingest punches recorded by devices'),
+        ]
     
     def __str__(self):
         return f'{self.user.username}-{self.type} at {self.timestamp}'
@@ -43,6 +79,11 @@ class LogSheetApproval(models.Model):
         ('approved', 'Approved'),
         ('rejected', 'Rejected'),
     )
+    JIRA_STATUS_CHOICES = (
+        ('unchecked', 'Unchecked'),
+        ('valid', 'Valid'),
+        ('invalid', 'Invalid'),
+    )
     user = models.ForeignKey(User, on_delete = models.CASCADE, related_name='log_approvals')
     date = models.DateField()
     jira_key = models.CharField(max_length=255)
@@ -50,6 +91,99 @@ class LogSheetApproval(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     manager = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name = 'manager_approvals')
     work_day_credit = models.FloatField(default=0.0)
+    # Set by the validate_jira_key job once the tracker has been asked
+    jira_status = models.CharField(max_length=20, choices=JIRA_STATUS_CHOICES, default='unchecked')
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the manager queue walks (status, date, id)
+            models.Index(fields=['status', '-date', '-id'], name='logsheet_status_date_idx'),
+            models.Index(fields=['user', 'status', '-date', '-id'], name='logsheet_user_status_date_idx'),
+        ]
     
     def __str__(self):
-        return f'LogSheet for {self.user.username} on {self.date}'
\ No newline at end of file
+        return f'LogSheet for {self.user.username} on {self.date}'
+
+# Per-user per-day totals, updated on every punch
+class DailyWorkSummary(models.Model):
+    STATE_CHOICES = (
+        ('off_duty', 'Off duty'),
+        ('working', 'Working'),
+        ('on_break', 'On break'),
+        ('checked_out', 'Checked out'),
+    )
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_summaries')
+    work_date = models.DateField()
+    worked_seconds = models.FloatField(default=0.0)
+    break_seconds = models.FloatField(default=0.0)
+    state = models.CharField(max_length=20, choices=STATE_CHOICES, default='off_duty')
+    first_punch_at = models.DateTimeField(null=True, blank=True)
+    last_punch_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'work_date'], name='unique_daily_summary'),
+        ]
+
+    @property
+    def hours_worked(self):
+        return self.worked_seconds / 3600
+
+    def __str__(self):
+        return f'Summary for {self.user.username} on {self.work_date}'
+
+# Raw punches of archived months, moved out of TimeLog by archive_timelogs
+class ArchivedTimeLog(models.Model):
+    # Id the punch had in TimeLog
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_time_logs')
+    timestamp = models.DateTimeField()
+    work_date = models.DateField()
+    type = models.CharField(max_length=20, choices=TimeLog.TYPE_CHOICES)
+    device_id = models.CharField(max_length=64, blank=True, default='')
+    idempotency_key = models.CharField(max_length=64, null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.user.username}-{self.type} at {self.timestamp} (archived)'
+
+# Months whose raw punches no longer live in TimeLog; their day totals stay in
+# DailyWorkSummary
+class ArchivedMonth(models.Model):
+    month = models.DateField(unique=True)  # first day of the month
+    rows = models.PositiveIntegerField(default=0)
+    # 'table' (ArchivedTimeLog) or the path of the compressed file
+    location = models.CharField(max_length=255)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'TimeLog archive of {self.month:%Y-%m}'
+
+# Background job, run by `manage.py run_jobs` (see dashboard.jobs)
+class Job(models.Model):
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField()
+    # Not run before this time; pushed back after every failed attempt
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True, default='')
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Workers claim due jobs in (status, run_at) order
+            models.Index(fields=['status', 'run_at'], name='job_status_run_at_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.pk} ({self.status})'
@@ -0,0 +1,76 @@
+import base64
+from datetime import date
+
+from django.db.models import Q
+from rest_framework.exceptions import ParseError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+
+def encode_cursor(day, pk):
+    raw = f'{day.isoformat()}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+class DateKeysetPagination(BasePagination):
+    """
+    Keyset pagination over (date, id), newest first.
+
+    The cursor holds the (date, id) of the last row of the previous page, so
+    every page is a single index range scan no matter how deep it is. The
+    total count is included unless the client passes ``count=false``.
+    """
+    page_size = 50
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.include_count = self.get_include_count(request)
+        self.count = queryset.count() if self.include_count else None
+
+        queryset = queryset.order_by('-date', '-id')
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            last_date, last_id = self.decode_cursor(cursor)
+            queryset = queryset.filter(Q(date__lt=last_date) | Q(date=last_date, id__lt=last_id))
+
+        # Fetch one extra row to know whether there is a next page
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.next_cursor = self.encode_cursor(rows[-1]) if self.has_next else None
+        return rows
+
+    def get_paginated_response(self, data):
+        response = {'next_cursor': self.next_cursor, 'results': data}
+        if self.include_count:
+            response['count'] = self.count
+        return Response(response)
+
+    def get_include_count(self, request):
+        return request.query_params.get(self.count_query_param, 'true').lower() not in ('false', '0')
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            raise ParseError('page_size must be an integer.')
+        return max(1, min(page_size, self.max_page_size))
+
+    def encode_cursor(self, row):
+        if isinstance(row, dict):
+            # values() rows
+            return encode_cursor(row['date'], row['id'])
+        return encode_cursor(row.date, row.id)
+
+    def decode_cursor(self, cursor):
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+            last_date, last_id = raw.split('|')
+            return date.fromisoformat(last_date), int(last_id)
+        except (ValueError, UnicodeDecodeError):
+            raise ParseError('Invalid cursor.')
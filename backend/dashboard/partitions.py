@@ -0,0 +1,195 @@
+"""
+Monthly range partitioning of TimeLog on Postgres.
+
+dashboard_timelog is partitioned by work_date: every hot query filters on it,
+so the planner only touches the partitions of the days asked for and the
+indexes of old months never grow the hot path. Each month lives in
+dashboard_timelog_pYYYY_MM; a default partition catches rows of months that
+have no partition yet. Archiving a month detaches and drops its partition
+instead of deleting rows, so there is nothing left to vacuum.
+
+Other databases (sqlite in tests) keep TimeLog a plain table; archival deletes
+the month's rows there.
+"""
+from datetime import date
+
+from django.db import transaction
+from django.utils import timezone
+
+TABLE = 'dashboard_timelog'
+DEFAULT_PARTITION = f'{TABLE}_default'
+SEQUENCE = f'{TABLE}_id_seq'
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{TABLE}_p{month:%Y_%m}'
+
+
+def is_partitioned(connection):
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)', [TABLE]
+        )
+        return cursor.fetchone() is not None
+
+
+def partition_months(connection):
+    """Returns the first day of every month that has a partition."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT child.relname FROM pg_inherits '
+            'JOIN pg_class child ON child.oid = pg_inherits.inhrelid '
+            'WHERE pg_inherits.inhparent = to_regclass(%s)', [TABLE]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    prefix = f'{TABLE}_p'
+    return sorted(
+        date(int(name[len(prefix):len(prefix) + 4]), int(name[-2:]), 1)
+        for name in names if name.startswith(prefix)
+    )
+
+
+def create_partitions(connection, first, last):
+    """
+    Creates the missing monthly partitions from ``first`` to ``last``
+    (inclusive); returns the months created.
+
+    Postgres refuses to create the partition of a month that already has
+    rows in the default partition, so such a month is built as a plain
+    table, the rows are moved into it and it is attached, in one transaction.
+    """
+    qn = connection.ops.quote_name
+    existing = set(partition_months(connection))
+    month = month_start(first)
+    created = []
+    while month <= last:
+        if month not in existing:
+            bounds = [month, add_months(month, 1)]
+            name = qn(partition_name(month))
+            with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+                cursor.execute(
+                    f'SELECT EXISTS (SELECT 1 FROM {qn(DEFAULT_PARTITION)} WHERE work_date >= %s AND work_date < %s)',
+                    bounds,
+                )
+                if cursor.fetchone()[0]:
+                    cursor.execute(f'CREATE TABLE {name} (LIKE {qn(TABLE)} INCLUDING DEFAULTS)')
+                    cursor.execute(
+                        f'WITH moved AS (DELETE FROM {qn(DEFAULT_PARTITION)} '
+                        f'WHERE work_date >= %s AND work_date < %s RETURNING *) '
+                        f'INSERT INTO {name} SELECT * FROM moved',
+                        bounds,
+                    )
+                    cursor.execute(
+                        f'ALTER TABLE {qn(TABLE)} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)', bounds,
+                    )
+                else:
+                    cursor.execute(f'CREATE TABLE {name} PARTITION OF {qn(TABLE)} FOR VALUES FROM (%s) TO (%s)', bounds)
+            created.append(month)
+        month = add_months(month, 1)
+    return created
+
+
+def drop_partition(connection, month):
+    """Detaches and drops the partition of the month, if it has one."""
+    qn = connection.ops.quote_name
+    name = partition_name(month)
+    if month not in partition_months(connection):
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE {qn(TABLE)} DETACH PARTITION {qn(name)}')
+        cursor.execute(f'DROP TABLE {qn(name)}')
+    return True
+
+
+def partition_timelog(schema_editor, months_ahead=2):
+    """
+    Rebuilds dashboard_timelog as a partitioned table, keeping its rows, ids,
+    indexes and constraints. Postgres only.
+
+    The primary key and the device punch constraint must contain the
+    partition key, so they become (id, work_date) and (device_id,
+    idempotency_key, work_date). Postgres before 17 does not allow identity
+    columns on partitioned tables, so ids come from an owned sequence.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql' or is_partitioned(connection):
+        return
+    old = f'{TABLE}_unpartitioned'
+    qn = connection.ops.quote_name
+    execute = schema_editor.execute
+
+    execute(f'ALTER TABLE {qn(TABLE)} RENAME TO {qn(old)}')
+    execute(f'ALTER INDEX {qn(TABLE + "_pkey")} RENAME TO {qn(old + "_pkey")}')
+    execute(
+        f'CREATE TABLE {qn(TABLE)} (LIKE {qn(old)} INCLUDING DEFAULTS, PRIMARY KEY (id, work_date)) '
+        f'PARTITION BY RANGE (work_date)'
+    )
+    execute(f'CREATE TABLE {qn(DEFAULT_PARTITION)} PARTITION OF {qn(TABLE)} DEFAULT')
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT MIN(work_date) FROM {qn(old)}')
+        first = cursor.fetchone()[0]
+    current = month_start(timezone.localdate())
+    create_partitions(connection, first or current, add_months(current, months_ahead))
+
+    execute(f'INSERT INTO {qn(TABLE)} SELECT * FROM {qn(old)}')
+    execute(f'DROP TABLE {qn(old)}')
+
+    execute(f'CREATE SEQUENCE {qn(SEQUENCE)} OWNED BY {qn(TABLE)}.id')
+    execute(f"SELECT setval('{SEQUENCE}', COALESCE((SELECT MAX(id) FROM {qn(TABLE)}), 0) + 1, false)")
+    execute(f"ALTER TABLE {qn(TABLE)} ALTER COLUMN id SET DEFAULT nextval('{SEQUENCE}')")
+
+    execute(
+        f'ALTER TABLE {qn(TABLE)} ADD CONSTRAINT {qn(TABLE + "_user_id_fk")} '
+        f'FOREIGN KEY (user_id) REFERENCES {qn("dashboard_user")} (id) DEFERRABLE INITIALLY DEFERRED'
+    )
+    _create_indexes(execute, qn)
+
+
+def unpartition_timelog(schema_editor):
+    """Reverse of partition_timelog: copies the rows back into a plain table."""
+    connection = schema_editor.connection
+    if not is_partitioned(connection):
+        return
+    old = f'{TABLE}_partitioned'
+    qn = connection.ops.quote_name
+    execute = schema_editor.execute
+
+    execute(f'ALTER TABLE {qn(TABLE)} RENAME TO {qn(old)}')
+    execute(f'ALTER INDEX {qn(TABLE + "_pkey")} RENAME TO {qn(old + "_pkey")}')
+    execute(f'CREATE TABLE {qn(TABLE)} (LIKE {qn(old)})')
+    execute(f'INSERT INTO {qn(TABLE)} SELECT * FROM {qn(old)}')
+    execute(f'DROP TABLE {qn(old)} CASCADE')
+
+    execute(f'ALTER TABLE {qn(TABLE)} ADD PRIMARY KEY (id)')
+    execute(f'ALTER TABLE {qn(TABLE)} ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY')
+    execute(
+        f"SELECT setval(pg_get_serial_sequence('{TABLE}', 'id'), "
+        f'COALESCE((SELECT MAX(id) FROM {qn(TABLE)}), 0) + 1, false)'
+    )
+    execute(
+        f'ALTER TABLE {qn(TABLE)} ADD CONSTRAINT {qn(TABLE + "_user_id_fk")} '
+        f'FOREIGN KEY (user_id) REFERENCES {qn("dashboard_user")} (id) DEFERRABLE INITIALLY DEFERRED'
+    )
+    _create_indexes(execute, qn)
+
+
+def _create_indexes(execute, qn):
+    # Same names as in TimeLog.Meta so later migrations can find them
+    execute(f'CREATE INDEX {qn("timelog_user_day_ts_idx")} ON {qn(TABLE)} (user_id, work_date, "timestamp")')
+    execute(f'CREATE INDEX {qn("timelog_user_day_type_idx")} ON {qn(TABLE)} (user_id, work_date, type)')
+    execute(
+        f'CREATE UNIQUE INDEX {qn("unique_device_punch")} ON {qn(TABLE)} (device_id, idempotency_key, work_date) '
+        f'WHERE idempotency_key IS NOT NULL'
+    )
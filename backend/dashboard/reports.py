@@ -0,0 +1,105 @@
+"""
+Per-employee weekly/monthly reports, aggregated in the database.
+
+Hours, break time and late check-ins come from DailyWorkSummary (which holds
+the paired punch intervals of every day), work-day credit from approved
+logsheets. Each source is one GROUP BY query, whatever the number of users
+or days.
+
+A check-in is late when it comes more than DASHBOARD_LATE_CHECK_IN after the
+start of the user's work day, on the user's local clock (see workdays.py):
+09:30 local for a day starting at midnight, 21:30 for a night shift whose
+day starts at noon.
+"""
+from datetime import date, datetime, time, timedelta
+
+from django.conf import settings
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth, TruncTime, TruncWeek
+from django.db.models.lookups import GreaterThan, LessThan
+
+from .models import DailyWorkSummary, LogSheetApproval, User
+from .workdays import get_zone
+
+PERIODS = {
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+
+def late_check_in_filter(summaries, late_after):
+    """
+    Q matching the days of ``summaries`` first punched more than
+    ``late_after`` (a timedelta) after the start of the user's work day; one
+    condition per time zone and day start of the users involved.
+    """
+    calendars = (
+        User.objects.filter(pk__in=summaries.values('user_id'))
+        .values_list('timezone', 'day_starts_at').distinct()
+    )
+    condition = Q(pk__in=[])
+    for zone_name, starts_at in calendars:
+        local_time = TruncTime('first_punch_at', tzinfo=get_zone(zone_name or settings.TIME_ZONE))
+        threshold = (datetime.combine(date.min, starts_at) + late_after).time()
+        if starts_at <= threshold:
+            late = Q(GreaterThan(local_time, threshold))
+            if starts_at != time(0):
+                # Before the start time on the clock means after midnight, late in the day
+                late |= Q(LessThan(local_time, starts_at))
+        else:
+            late = Q(GreaterThan(local_time, threshold), LessThan(local_time, starts_at))
+        condition |= Q(user__timezone=zone_name, user__day_starts_at=starts_at) & late
+    return condition
+
+
+def build_report(period, date_from, date_to, user_id=None):
+    trunc = PERIODS[period]
+    late_at = time.fromisoformat(settings.DASHBOARD_LATE_CHECK_IN)
+    late_after = timedelta(hours=late_at.hour, minutes=late_at.minute)
+    summaries = DailyWorkSummary.objects.filter(work_date__gte=date_from, work_date__lte=date_to)
+    logsheets = LogSheetApproval.objects.filter(date__gte=date_from, date__lte=date_to, status='approved')
+    if user_id is not None:
+        summaries = summaries.filter(user_id=user_id)
+        logsheets = logsheets.filter(user_id=user_id)
+
+    work = (
+        summaries.annotate(period_start=trunc('work_date'))
+        .values('user_id', 'user__username', 'period_start')
+        .annotate(
+            worked_seconds=Sum('worked_seconds'),
+            break_seconds=Sum('break_seconds'),
+            days_worked=Count('id', filter=Q(first_punch_at__isnull=False)),
+            late_check_ins=Count('id', filter=late_check_in_filter(summaries, late_after)),
+        )
+    )
+    credits = (
+        logsheets.annotate(period_start=trunc('date'))
+        .values('user_id', 'user__username', 'period_start')
+        .annotate(work_day_credit=Sum('work_day_credit'), approved_days=Count('id'))
+    )
+
+    rows = {}
+    for row in work:
+        rows[(row['user_id'], row['period_start'])] = {
+            'user': {'id': row['user_id'], 'username': row['user__username']},
+            'period_start': row['period_start'],
+            'hours_worked': round(row['worked_seconds'] / 3600, 2),
+            'break_hours': round(row['break_seconds'] / 3600, 2),
+            'days_worked': row['days_worked'],
+            'late_check_ins': row['late_check_ins'],
+            'work_day_credit': 0.0,
+            'approved_days': 0,
+        }
+    for row in credits:
+        entry = rows.setdefault((row['user_id'], row['period_start']), {
+            'user': {'id': row['user_id'], 'username': row['user__username']},
+            'period_start': row['period_start'],
+            'hours_worked': 0.0,
+            'break_hours': 0.0,
+            'days_worked': 0,
+            'late_check_ins': 0,
+        })
+        entry['work_day_credit'] = row['work_day_credit']
+        entry['approved_days'] = row['approved_days']
+
+    return sorted(rows.values(), key=lambda entry: (entry['period_start'], entry['user']['username']))
@@ -0,0 +1,58 @@
+"""
+Lean serialization for the high-volume read paths.
+
+The functions here build exactly the JSON of TimeLogSerializer and
+LogSheetApprovalSerializer from values() rows, without instantiating models
+or going through DRF's per-field machinery, which is most of the CPU time of
+a long list. Dates and datetimes are still formatted by DRF's own fields, so
+DATETIME_FORMAT and the current time zone apply as before.
+
+`manage.py benchmark_serializers` compares the two paths.
+"""
+from rest_framework.fields import DateField, DateTimeField
+
+TIMELOG_FIELDS = ('id', 'timestamp', 'work_date', 'type', 'device_id', 'idempotency_key', 'user_id')
+LOGSHEET_FIELDS = (
+    'id', 'date', 'jira_key', 'hours_worked', 'status', 'work_day_credit', 'jira_status',
+    'user_id', 'user__username', 'user__is_manager',
+    'manager_id', 'manager__username', 'manager__is_manager',
+)
+
+
+def serialize_timelogs(rows):
+    """TimeLogSerializer(many=True) output for rows of TimeLog...values(*TIMELOG_FIELDS)."""
+    timestamp = DateTimeField().to_representation
+    work_date = DateField().to_representation
+    return [
+        {
+            'id': row['id'],
+            'timestamp': timestamp(row['timestamp']),
+            'work_date': work_date(row['work_date']),
+            'type': row['type'],
+            'device_id': row['device_id'],
+            'idempotency_key': row['idempotency_key'],
+            'user': row['user_id'],
+        }
+        for row in rows
+    ]
+
+
+def serialize_logsheets(rows):
+    """LogSheetApprovalSerializer(many=True) output for rows of LogSheetApproval...values(*LOGSHEET_FIELDS)."""
+    date = DateField().to_representation
+    return [
+        {
+            'id': row['id'],
+            'user': {'id': row['user_id'], 'username': row['user__username'], 'is_manager': row['user__is_manager']},
+            'manager': None if row['manager_id'] is None else {
+                'id': row['manager_id'], 'username': row['manager__username'], 'is_manager': row['manager__is_manager'],
+            },
+            'date': date(row['date']),
+            'jira_key': row['jira_key'],
+            'hours_worked': row['hours_worked'],
+            'status': row['status'],
+            'work_day_credit': row['work_day_credit'],
+            'jira_status': row['jira_status'],
+        }
+        for row in rows
+    ]
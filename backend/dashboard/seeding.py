@@ -0,0 +1,262 @@
+"""
+Synthetic data for demos and performance work, run by `manage.py seed_data`.
+
+seed_data() creates employees and managers, then for every employee the
+punches, day summaries and logsheets of the weekdays before today. Employees
+are generated one chunk at a time and each one from its own random generator
+(derived from the seed and its index), so memory stays flat whatever the
+volume and the same seed always gives the same data, whatever the chunk size.
+
+Rows are written with chunked bulk_create() or, on Postgres, with COPY, which
+skips building model instances and is several times faster for the tens of
+millions of rows of a full-size dataset.
+"""
+import io
+import random
+import time
+from datetime import date, datetime, time as dt_time, timedelta, timezone as dt_timezone
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import DailyWorkSummary, LogSheetApproval, TimeLog, User
+from .partitions import create_partitions, is_partitioned
+from .services import summarize_logs
+from .workdays import get_zone
+
+PASSWORD = 'seed'
+NIGHT_SHIFT_STARTS_AT = dt_time(12)  # day_starts_at of night-shift employees
+PROJECTS = ('PM', 'OPS', 'WEB', 'DATA', 'INFRA')
+
+# Cumulative weights for random.choices(), computed once
+BREAKS = ((0, 1, 2), (10, 85, 100))
+RECENT_STATUSES = (('pending', 'approved', 'rejected'), (60, 95, 100))
+PAST_STATUSES = (('pending', 'approved', 'rejected'), (3, 89, 100))
+JIRA_STATUSES = (('valid', 'invalid'), (98, 100))
+
+# Columns written for each table, as model attribute names
+TIMELOG_COLUMNS = ('user_id', 'timestamp', 'work_date', 'type', 'device_id', 'idempotency_key')
+SUMMARY_COLUMNS = (
+    'user_id', 'work_date', 'worked_seconds', 'break_seconds', 'state', 'first_punch_at', 'last_punch_at',
+)
+LOGSHEET_COLUMNS = (
+    'user_id', 'date', 'jira_key', 'hours_worked', 'status', 'manager_id', 'work_day_credit', 'jira_status',
+)
+
+
+class Profile:
+    """Working habits of one generated employee."""
+
+    def __init__(self, rng, zone_name):
+        self.zone = get_zone(zone_name)
+        self.night_shift = rng.random() < 0.1
+        if self.night_shift:
+            self.starts_at = timedelta(hours=21, minutes=rng.randrange(0, 90))
+        else:
+            self.starts_at = timedelta(hours=rng.choice((7, 8, 8, 9, 9, 10)), minutes=rng.randrange(0, 60))
+        self.hours = rng.choice((7.5, 8, 8, 8.5, 9))
+        self.absence_rate = rng.uniform(0.01, 0.08)
+        self.device_rate = rng.choice((0.0, 0.0, 0.3, 0.9))  # share of days punched on a kiosk
+        self.project = rng.choice(PROJECTS)
+
+
+def weekdays_until(days, last_day):
+    """The ``days`` weekdays up to ``last_day``, oldest first."""
+    work_days = []
+    day = last_day
+    while len(work_days) < days:
+        if day.weekday() < 5:
+            work_days.append(day)
+        day -= timedelta(days=1)
+    work_days.reverse()
+    return work_days
+
+
+def employee_random(seed, index):
+    """The random generator of employee ``index``; its first draws make the employee's Profile."""
+    return random.Random(f'{seed}:{index}')
+
+
+def day_punches(rng, profile, day):
+    """(type, timestamp) punches of one work day; a few days miss their check-out."""
+    # Local wall time for the start, UTC arithmetic from there, so durations
+    # stay exact across DST changes
+    start = datetime.combine(day, dt_time(), tzinfo=profile.zone) + profile.starts_at
+    moment = start.astimezone(dt_timezone.utc) + timedelta(minutes=rng.gauss(0, 12))
+    breaks = rng.choices(BREAKS[0], cum_weights=BREAKS[1])[0]
+    share = timedelta(hours=profile.hours / (breaks + 1))
+    punches = [('check_in', moment)]
+    for index in range(breaks):
+        moment += share + timedelta(minutes=rng.randrange(-20, 20))
+        punches.append(('break_start', moment))
+        moment += timedelta(minutes=rng.randrange(10, 30) if index else rng.randrange(25, 65))
+        punches.append(('break_end', moment))
+    if rng.random() >= 0.01:
+        moment += share + timedelta(minutes=rng.gauss(0, 20))
+        punches.append(('check_out', moment))
+    return punches
+
+
+def _logsheet(rng, profile, user_id, day, totals, managers, recent):
+    # Days without a check-out cannot be submitted, and some are not
+    if totals['state'] != 'checked_out' or rng.random() < 0.1:
+        return None
+    hours = totals['worked_seconds'] / 3600
+    statuses, cum_weights = RECENT_STATUSES if recent else PAST_STATUSES
+    logsheet_status = rng.choices(statuses, cum_weights=cum_weights)[0]
+    credit = 0.0
+    if logsheet_status == 'approved':
+        credit = 1.0 if hours >= 6 else 0.5
+    return (
+        user_id,
+        day,
+        f'{profile.project}-{rng.randrange(1, 2000)}',
+        round(hours, 2),
+        logsheet_status,
+        None if logsheet_status == 'pending' else rng.choice(managers),
+        credit,
+        'unchecked' if logsheet_status == 'pending' else rng.choices(JIRA_STATUSES[0], cum_weights=JIRA_STATUSES[1])[0],
+    )
+
+
+def generate_rows(seed, index, user_id, zone_name, work_days, managers, recent_from):
+    """
+    Returns the time log, summary and logsheet rows of one employee (in
+    *_COLUMNS order), and whether the employee works night shifts.
+    """
+    rng = employee_random(seed, index)
+    profile = Profile(rng, zone_name)
+    logs, summaries, logsheets = [], [], []
+    for day in work_days:
+        if rng.random() < profile.absence_rate:
+            continue
+        punches = day_punches(rng, profile, day)
+        kiosk = f'kiosk-{index % 50}' if rng.random() < profile.device_rate else ''
+        for number, (punch_type, moment) in enumerate(punches):
+            key = f'{user_id}-{day.isoformat()}-{number}' if kiosk else None
+            logs.append((user_id, moment, day, punch_type, kiosk, key))
+        totals = summarize_logs(punches)
+        summaries.append((user_id, day, *(totals[column] for column in SUMMARY_COLUMNS[2:])))
+        logsheet = _logsheet(rng, profile, user_id, day, totals, managers, day >= recent_from)
+        if logsheet is not None:
+            logsheets.append(logsheet)
+    return logs, summaries, logsheets, profile.night_shift
+
+
+# COPY text format of each Python type
+COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+COPY_FORMATS = {
+    type(None): lambda value: '\\N',
+    bool: lambda value: 't' if value else 'f',
+    int: str,
+    float: repr,
+    str: lambda value: value.translate(COPY_ESCAPES),
+    date: date.isoformat,
+    datetime: datetime.isoformat,
+}
+
+
+def _copy_value(value):
+    return COPY_FORMATS[type(value)](value)
+
+
+def copy_rows(model, columns, rows):
+    """Writes rows with Postgres COPY (psycopg2 or psycopg 3)."""
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    names = ', '.join(qn(model._meta.get_field(column).column) for column in columns)
+    data = ''.join('\t'.join(map(_copy_value, row)) + '\n' for row in rows)
+    sql = f'COPY {table} ({names}) FROM STDIN'
+    with connection.cursor() as cursor:
+        if hasattr(cursor, 'copy_expert'):
+            cursor.copy_expert(sql, io.StringIO(data))
+        else:
+            with cursor.copy(sql) as copy:
+                copy.write(data)
+
+
+def bulk_insert(model, columns, rows, batch_size):
+    """Writes rows with bulk_create(), ``batch_size`` at a time."""
+    rows = iter(rows)
+    while chunk := list(islice(rows, batch_size)):
+        model.objects.bulk_create([model(**dict(zip(columns, row))) for row in chunk])
+
+
+def seed_data(prefix, users, managers, days, seed=0, timezones=(), chunk_size=500, batch_size=5000,
+              use_copy=False, last_day=None, progress=None):
+    """
+    Creates ``managers`` managers and ``users`` employees (spread over
+    ``timezones`` if given) with ``days`` weekdays of data up to ``last_day``
+    (yesterday by default). Returns the number of rows created per table.
+    """
+    if use_copy and connection.vendor != 'postgresql':
+        raise ValueError('COPY needs a Postgres database.')
+    zone_names = list(timezones) or ['']
+    last_day = last_day or timezone.localdate() - timedelta(days=1)
+    work_days = weekdays_until(days, last_day)
+    recent_from = last_day - timedelta(days=7)
+    password = make_password(PASSWORD)
+    counts = {'users': 0, 'time_logs': 0, 'summaries': 0, 'logsheets': 0}
+    write = copy_rows if use_copy else (
+        lambda model, columns, rows: bulk_insert(model, columns, rows, batch_size)
+    )
+
+    if work_days and is_partitioned(connection):
+        # Otherwise every row lands in the default partition
+        create_partitions(connection, work_days[0], work_days[-1])
+    manager_ids = [
+        manager.pk for manager in User.objects.bulk_create([
+            User(username=f'{prefix}manager{i}', password=password, is_manager=True,
+                 email=f'{prefix}manager{i}@example.com')
+            for i in range(managers)
+        ])
+    ]
+    counts['users'] += len(manager_ids)
+    if not manager_ids:
+        manager_ids = [None]
+
+    started = time.perf_counter()
+    for first in range(0, users, chunk_size):
+        indexes = range(first, min(first + chunk_size, users))
+        with transaction.atomic():
+            employees = User.objects.bulk_create([
+                User(username=f'{prefix}employee{i}', password=password,
+                     email=f'{prefix}employee{i}@example.com',
+                     timezone=zone_names[i % len(zone_names)])
+                for i in indexes
+            ])
+            logs, summaries, logsheets, night_shift = [], [], [], []
+            for i, employee in zip(indexes, employees):
+                rows = generate_rows(
+                    seed, i, employee.pk, employee.timezone or settings.TIME_ZONE, work_days, manager_ids, recent_from,
+                )
+                logs += rows[0]
+                summaries += rows[1]
+                logsheets += rows[2]
+                if rows[3]:
+                    night_shift.append(employee.pk)
+            User.objects.filter(pk__in=night_shift).update(day_starts_at=NIGHT_SHIFT_STARTS_AT)
+            write(TimeLog, TIMELOG_COLUMNS, logs)
+            write(DailyWorkSummary, SUMMARY_COLUMNS, summaries)
+            write(LogSheetApproval, LOGSHEET_COLUMNS, logsheets)
+        counts['users'] += len(employees)
+        counts['time_logs'] += len(logs)
+        counts['summaries'] += len(summaries)
+        counts['logsheets'] += len(logsheets)
+        if progress is not None:
+            progress(indexes.stop, counts, time.perf_counter() - started)
+
+    if connection.vendor == 'postgresql':
+        # Fresh statistics, so the plans of the next queries fit the new volume
+        with connection.cursor() as cursor:
+            for model in (User, TimeLog, DailyWorkSummary, LogSheetApproval):
+                cursor.execute(f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
+    return counts
+
+
+def delete_seeded(prefix):
+    """Deletes the users created with ``prefix`` and everything they own."""
+    return User.objects.filter(username__startswith=prefix).delete()[0]
@@ -9,6 +9,7 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
 
         # Add custom claims
         token['is_manager'] = user.is_manager
+        token['token_version'] = user.token_version
 
         return token
 
@@ -16,6 +17,8 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
         data = super().validate(attrs)
         # Include is_manager in the access token data
         data['is_manager'] = self.user.is_manager
+        # Spares the client a profile request right after logging in
+        data['user'] = {'id': self.user.pk, 'username': self.user.username, 'is_manager': self.user.is_manager}
         return data
 
 class UserSerializer(serializers.ModelSerializer):
@@ -35,3 +38,9 @@ class LogSheetApprovalSerializer(serializers.ModelSerializer):
     class Meta:
         model = LogSheetApproval
         fields = '__all__'
+
+class IngestedPunchSerializer(serializers.Serializer):
+    user = serializers.IntegerField()
+    type = serializers.ChoiceField(choices=TimeLog.TYPE_CHOICES)
+    timestamp = serializers.DateTimeField()
+    idempotency_key = serializers.CharField(max_length=64)
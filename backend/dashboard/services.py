@@ -0,0 +1,500 @@
+from itertools import groupby
+from operator import itemgetter
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from .events import MANAGERS_CHANNEL, publish_event, send_event, user_channel
+from .models import TimeLog, User, DailyWorkSummary, LogSheetApproval
+from .rows import TIMELOG_FIELDS
+from .snapshots import ainvalidate_snapshot, invalidate_logsheet_queue, invalidate_snapshot
+from .workdays import user_work_date, work_date
+
+# Punch states for a user's current day
+OFF_DUTY = 'off_duty'
+WORKING = 'working'
+ON_BREAK = 'on_break'
+CHECKED_OUT = 'checked_out'
+
+# State the user is in right after a log of the given type
+STATE_AFTER = {
+    None: OFF_DUTY,
+    'check_in': WORKING,
+    'break_start': ON_BREAK,
+    'break_end': WORKING,
+    'check_out': CHECKED_OUT,
+}
+
+# Allowed transitions: punch type -> (required current state, next state)
+TRANSITIONS = {
+    'check_in': (OFF_DUTY, WORKING),
+    'break_start': (WORKING, ON_BREAK),
+    'break_end': (ON_BREAK, WORKING),
+    'check_out': (WORKING, CHECKED_OUT),
+}
+
+REJECTION_MESSAGES = {
+    'check_in': 'You have already checked in today.',
+    'break_start': 'You cannot start a break at this time.',
+    'break_end': 'You are not currently on a break.',
+    'check_out': 'You cannot check out at this time.',
+}
+
+# Manager action on a logsheet -> resulting status
+LOGSHEET_ACTIONS = {
+    'approve': 'approved',
+    'reject': 'rejected',
+}
+
+# DailyWorkSummary fields maintained from the punch log
+SUMMARY_FIELDS = ['worked_seconds', 'break_seconds', 'state', 'first_punch_at', 'last_punch_at']
+
+
+class PunchError(Exception):
+    """Raised when a punch is not a valid transition from the current state."""
+
+    def __init__(self, punch_type, state):
+        self.punch_type = punch_type
+        self.state = state
+        super().__init__(REJECTION_MESSAGES[punch_type])
+
+
+def summarize_logs(logs):
+    """
+    Walks (type, timestamp) pairs of one day in chronological order and
+    returns the totals stored on DailyWorkSummary. Time between a check-in or
+    break-end and the next punch counts as work, time between a break-start
+    and the next punch counts as break.
+    """
+    totals = {
+        'worked_seconds': 0.0,
+        'break_seconds': 0.0,
+        'state': OFF_DUTY,
+        'first_punch_at': None,
+        'last_punch_at': None,
+    }
+    for punch_type, timestamp in logs:
+        _advance(totals, punch_type, timestamp)
+    return totals
+
+
+def _advance(totals, punch_type, timestamp):
+    last = totals['last_punch_at']
+    if last is not None:
+        elapsed = (timestamp - last).total_seconds()
+        if totals['state'] == WORKING:
+            totals['worked_seconds'] += elapsed
+        elif totals['state'] == ON_BREAK:
+            totals['break_seconds'] += elapsed
+    if totals['first_punch_at'] is None:
+        totals['first_punch_at'] = timestamp
+    totals['last_punch_at'] = timestamp
+    totals['state'] = STATE_AFTER[punch_type]
+
+
+def _day_logs(user_id, day):
+    return (
+        TimeLog.objects.filter(user_id=user_id, work_date=day)
+        .order_by('timestamp', 'id')
+        .values_list('type', 'timestamp')
+    )
+
+
+def rebuild_daily_summary(user_id, day):
+    """Recomputes the summary of one user-day from the raw TimeLog rows."""
+    summary, _ = DailyWorkSummary.objects.update_or_create(
+        user_id=user_id, work_date=day, defaults=summarize_logs(_day_logs(user_id, day))
+    )
+    return summary
+
+
+def get_daily_summary(user_id, day):
+    """
+    Returns the summary of one user-day. Days without a stored summary (not
+    punched yet, or punched before summaries existed) get an unsaved one
+    built from the raw log, so read paths never write.
+    """
+    summary = DailyWorkSummary.objects.filter(user_id=user_id, work_date=day).first()
+    if summary is None:
+        summary = DailyWorkSummary(user_id=user_id, work_date=day, **summarize_logs(_day_logs(user_id, day)))
+    return summary
+
+
+def get_day_logs(days):
+    """
+    Returns {(user_id, day): (logs, worked_seconds)} for the given (user_id,
+    day) pairs, with one query for the logs and one for the summaries
+    whatever the number of pairs. The logs are values() rows, for
+    dashboard.rows.serialize_timelogs(). Days without a summary are
+    summarized from their logs.
+    """
+    days = set(days)
+    if not days:
+        return {}
+    user_ids = {user_id for user_id, _ in days}
+    dates = {day for _, day in days}
+
+    logs = {key: [] for key in days}
+    rows = (
+        TimeLog.objects.filter(user_id__in=user_ids, work_date__in=dates)
+        .order_by('timestamp', 'id')
+        .values(*TIMELOG_FIELDS)
+    )
+    for log in rows:
+        day_logs = logs.get((log['user_id'], log['work_date']))
+        if day_logs is not None:
+            day_logs.append(log)
+
+    worked = dict.fromkeys(days)
+    summaries = (
+        DailyWorkSummary.objects.filter(user_id__in=user_ids, work_date__in=dates)
+        .values_list('user_id', 'work_date', 'worked_seconds')
+    )
+    for user_id, day, worked_seconds in summaries:
+        if (user_id, day) in worked:
+            worked[(user_id, day)] = worked_seconds
+
+    result = {}
+    for key, day_logs in logs.items():
+        worked_seconds = worked[key]
+        if worked_seconds is None:
+            worked_seconds = summarize_logs((log['type'], log['timestamp']) for log in day_logs)['worked_seconds']
+        result[key] = (day_logs, worked_seconds)
+    return result
+
+
+def get_day_state(user, day=None):
+    """Returns the punch state of the user for the given work day (the current one by default)."""
+    day = day or user_work_date(user)
+    return get_daily_summary(user.pk, day).state
+
+
+def record_punch(user, punch_type):
+    """
+    Validates the punch against the day state machine, stores it and updates
+    the day summary.
+
+    The user's row is locked for the duration of the transaction so that two
+    concurrent punches for the same user are serialized and cannot both pass
+    the state check.
+    """
+    required_state, _ = TRANSITIONS[punch_type]
+    now = timezone.now()
+    today = user_work_date(user, now)
+    with transaction.atomic():
+        User.objects.select_for_update().filter(pk=user.pk).values_list('pk', flat=True).first()
+        # The summary row is locked too, against arecord_punch(), which does
+        # not lock the user
+        summary = DailyWorkSummary.objects.select_for_update().filter(user_id=user.pk, work_date=today).first()
+        if summary is None:
+            # The day's first punch, or a day punched before summaries existed
+            totals = summarize_logs(_day_logs(user.pk, today))
+        else:
+            totals = {field: getattr(summary, field) for field in SUMMARY_FIELDS}
+        if totals['state'] != required_state:
+            raise PunchError(punch_type, totals['state'])
+        log = TimeLog.objects.create(user=user, type=punch_type, timestamp=now, work_date=today)
+
+        _advance(totals, punch_type, log.timestamp)
+        if summary is None:
+            # The user's lock serializes the writers of this row
+            summary = DailyWorkSummary.objects.create(user_id=user.pk, work_date=today, **totals)
+        else:
+            for field, value in totals.items():
+                setattr(summary, field, value)
+            summary.save(update_fields=SUMMARY_FIELDS)
+        invalidate_snapshot(user.pk, today)
+        publish_event([user_channel(user.pk)], 'punch', {
+            'id': log.pk,
+            'type': log.type,
+            'timestamp': log.timestamp,
+            'state': summary.state,
+        })
+        return log
+
+
+def _store_punch(user, punch_type, now, today, summary, totals):
+    """
+    Writes the new ``totals`` of the day summary and the punch in one
+    transaction. Returns the TimeLog, or None if the summary changed since
+    ``summary`` was read; raises IntegrityError if another punch created it.
+    """
+    with transaction.atomic():
+        if summary is None:
+            DailyWorkSummary.objects.create(user_id=user.pk, work_date=today, **totals)
+        elif not DailyWorkSummary.objects.filter(
+            pk=summary.pk, state=summary.state, last_punch_at=summary.last_punch_at,
+        ).update(**totals):
+            return None
+        return TimeLog.objects.create(user=user, type=punch_type, timestamp=now, work_date=today)
+
+
+async def arecord_punch(user, punch_type):
+    """
+    record_punch() for the async punch views.
+
+    The state is read with the async ORM and without locks: the punch is
+    then stored, with its summary change, in one transaction that only
+    succeeds if the summary is still the one read (a conditional UPDATE on
+    its state and last punch or, for the day's first punch, the insert
+    guarded by the summary's unique constraint). A punch that loses the race
+    is checked again against the new state.
+    """
+    required_state, _ = TRANSITIONS[punch_type]
+    while True:
+        now = timezone.now()
+        today = user_work_date(user, now)
+        summary = await DailyWorkSummary.objects.filter(user_id=user.pk, work_date=today).afirst()
+        if summary is None:
+            # The day's first punch, or a day punched before summaries existed
+            totals = summarize_logs([log async for log in _day_logs(user.pk, today)])
+        else:
+            totals = {field: getattr(summary, field) for field in SUMMARY_FIELDS}
+        if totals['state'] != required_state:
+            raise PunchError(punch_type, totals['state'])
+        _advance(totals, punch_type, now)
+        try:
+            log = await sync_to_async(_store_punch)(user, punch_type, now, today, summary, totals)
+        except IntegrityError:
+            continue
+        if log is not None:
+            break
+
+    await ainvalidate_snapshot(user.pk, today)
+    send_event([user_channel(user.pk)], 'punch', {
+        'id': log.pk,
+        'type': log.type,
+        'timestamp': log.timestamp,
+        'state': totals['state'],
+    })
+    return log
+
+
+def find_summary_mismatches(summaries, logs):
+    """
+    Compares the ``summaries`` with the totals recomputed from ``logs`` (a
+    TimeLog queryset covering the same users and days) and yields (user_id,
+    work_date, summary, expected_totals) for every day that disagrees, with
+    ``summary`` None for days that have punches but no summary.
+
+    Both are read with one query each, in (work_date, user_id) order, and
+    walked side by side, so memory stays flat whatever the range.
+    """
+    summaries = summaries.order_by('work_date', 'user_id').iterator(chunk_size=2000)
+    rows = (
+        logs.order_by('work_date', 'user_id', 'timestamp', 'id')
+        .values_list('work_date', 'user_id', 'type', 'timestamp')
+        .iterator(chunk_size=2000)
+    )
+    days = groupby(rows, key=itemgetter(0, 1))
+    summary = next(summaries, None)
+    day = next(days, None)
+    while summary is not None or day is not None:
+        summary_key = summary and (summary.work_date, summary.user_id)
+        if day is None or (summary is not None and summary_key < day[0]):
+            key, expected, current = summary_key, summarize_logs(()), summary
+            summary = next(summaries, None)
+        else:
+            key, current = day[0], None
+            if summary_key == key:
+                current = summary
+                summary = next(summaries, None)
+            expected = summarize_logs(row[2:] for row in day[1])
+            day = next(days, None)
+        if current is None or not _summary_matches(current, expected):
+            yield key[1], key[0], current, expected
+
+
+def _summary_matches(summary, totals):
+    for field in SUMMARY_FIELDS:
+        actual = getattr(summary, field)
+        if isinstance(actual, float):
+            if abs(actual - totals[field]) >= 0.001:
+                return False
+        elif actual != totals[field]:
+            return False
+    return True
+
+
+def process_logsheets(manager, ids, action, work_day_credit=0.0):
+    """
+    Approves or rejects the pending logsheets among ``ids`` in one transaction
+    with a single conditional UPDATE.
+
+    Returns a list of (id, result) in the order of ``ids``, where result is the
+    new status, 'already_processed' or 'not_found'.
+    """
+    new_status = LOGSHEET_ACTIONS[action]
+    credit = work_day_credit if action == 'approve' else 0.0
+    with transaction.atomic():
+        rows = (
+            LogSheetApproval.objects.select_for_update()
+            .filter(id__in=ids)
+            .values_list('id', 'status', 'user_id', 'date')
+        )
+        current = {}
+        owners = {}
+        for pk, logsheet_status, user_id, day in rows:
+            current[pk] = logsheet_status
+            owners[pk] = (user_id, day)
+        pending = [pk for pk, logsheet_status in current.items() if logsheet_status == 'pending']
+        if pending:
+            LogSheetApproval.objects.filter(id__in=pending, status='pending').update(
+                status=new_status, work_day_credit=credit, manager=manager
+            )
+            # A queryset update sends no post_save, so the queue is
+            # invalidated here
+            invalidate_logsheet_queue()
+            publish_event([MANAGERS_CHANNEL], 'logsheets_processed', {
+                'ids': pending,
+                'status': new_status,
+                'manager': manager.pk,
+            })
+            for pk in pending:
+                user_id, day = owners[pk]
+                invalidate_snapshot(user_id, day)
+                publish_event([user_channel(user_id)], 'logsheet_processed', {
+                    'id': pk,
+                    'status': new_status,
+                    'work_day_credit': credit,
+                })
+
+    results = []
+    for pk in ids:
+        if pk not in current:
+            results.append((pk, 'not_found'))
+        elif current[pk] == 'pending':
+            results.append((pk, new_status))
+        else:
+            results.append((pk, 'already_processed'))
+    return results
+
+
+def ingest_punches(device_id, punches):
+    """
+    Stores punches recorded offline by a device, in one transaction.
+
+    Each punch is a dict with ``user``, ``type``, ``timestamp`` (an aware
+    datetime) and ``idempotency_key``. Punches are replayed per user work day in
+    timestamp order against the day state machine; a punch that was already
+    ingested (same device and key) is reported as a duplicate, and one that
+    is older than the user's last punch of that day or is not a valid
+    transition is rejected.
+
+    Returns (accepted, duplicates, rejected) where rejected is a list of
+    (index, reason).
+    """
+    rejected = []
+    duplicates = []
+    keys = [punch['idempotency_key'] for punch in punches]
+
+    with transaction.atomic():
+        seen = set(
+            TimeLog.objects.filter(device_id=device_id, idempotency_key__in=keys)
+            .values_list('idempotency_key', flat=True)
+        )
+        user_ids = {punch['user'] for punch in punches}
+        # (time zone, day_starts_at) of each user, for the work dates
+        calendars = {
+            pk: (zone_name or settings.TIME_ZONE, day_starts_at)
+            for pk, zone_name, day_starts_at in User.objects.select_for_update().filter(pk__in=user_ids)
+            .values_list('pk', 'timezone', 'day_starts_at')
+        }
+
+        # (user, day) -> [(index, punch)] in timestamp order
+        days = {}
+        for index, punch in enumerate(punches):
+            if punch['idempotency_key'] in seen:
+                duplicates.append(index)
+                continue
+            seen.add(punch['idempotency_key'])
+            if punch['user'] not in calendars:
+                rejected.append((index, 'unknown_user'))
+                continue
+            day = work_date(*calendars[punch['user']], punch['timestamp'])
+            days.setdefault((punch['user'], day), []).append((index, punch))
+
+        summaries = _load_summaries(days)
+        new_logs = []
+        new_summaries = []
+        changed_summaries = []
+        for (user_id, day), day_punches in days.items():
+            summary = summaries.get((user_id, day)) or DailyWorkSummary(user_id=user_id, work_date=day)
+            totals = {field: getattr(summary, field) for field in SUMMARY_FIELDS}
+            changed = False
+
+            for index, punch in sorted(day_punches, key=lambda item: item[1]['timestamp']):
+                required_state, _ = TRANSITIONS[punch['type']]
+                if totals['last_punch_at'] is not None and punch['timestamp'] < totals['last_punch_at']:
+                    rejected.append((index, 'out_of_order'))
+                    continue
+                if totals['state'] != required_state:
+                    rejected.append((index, f"invalid_transition_from_{totals['state']}"))
+                    continue
+                _advance(totals, punch['type'], punch['timestamp'])
+                new_logs.append(TimeLog(
+                    user_id=user_id,
+                    type=punch['type'],
+                    timestamp=punch['timestamp'],
+                    work_date=day,
+                    device_id=device_id,
+                    idempotency_key=punch['idempotency_key'],
+                ))
+                changed = True
+
+            if changed:
+                for field, value in totals.items():
+                    setattr(summary, field, value)
+                if summary.pk is None:
+                    new_summaries.append(summary)
+                else:
+                    changed_summaries.append(summary)
+                invalidate_snapshot(user_id, day)
+                publish_event([user_channel(user_id)], 'punch', {
+                    'type': new_logs[-1].type,
+                    'timestamp': new_logs[-1].timestamp,
+                    'state': totals['state'],
+                })
+
+        TimeLog.objects.bulk_create(new_logs, batch_size=1000)
+        DailyWorkSummary.objects.bulk_create(new_summaries, batch_size=1000)
+        DailyWorkSummary.objects.bulk_update(changed_summaries, SUMMARY_FIELDS, batch_size=1000)
+
+    rejected.sort()
+    return len(new_logs), duplicates, rejected
+
+
+def _load_summaries(days):
+    """Fetches (or computes) the summaries of the given (user, day) pairs in two queries."""
+    if not days:
+        return {}
+    user_ids = {user_id for user_id, _ in days}
+    dates = {day for _, day in days}
+    summaries = {
+        (summary.user_id, summary.work_date): summary
+        for summary in DailyWorkSummary.objects.select_for_update().filter(user_id__in=user_ids, work_date__in=dates)
+        if (summary.user_id, summary.work_date) in days
+    }
+
+    missing = set(days) - set(summaries)
+    if missing:
+        logs = {}
+        rows = (
+            TimeLog.objects.filter(
+                user_id__in={user_id for user_id, _ in missing},
+                work_date__in={day for _, day in missing},
+            )
+            .order_by('timestamp', 'id')
+            .values_list('user_id', 'work_date', 'type', 'timestamp')
+        )
+        for user_id, day, punch_type, timestamp in rows:
+            if (user_id, day) in missing:
+                logs.setdefault((user_id, day), []).append((punch_type, timestamp))
+        for user_id, day in missing:
+            if (user_id, day) in logs:
+                # Days punched before summaries existed
+                summaries[(user_id, day)] = DailyWorkSummary(
+                    user_id=user_id, work_date=day, **summarize_logs(logs[(user_id, day)])
+                )
+    return summaries
@@ -0,0 +1,225 @@
+"""
+Cached per-user snapshot of "today": the day's logs, the logsheet status and
+the hours worked so far. Dashboard reads are served from it; every write path
+(punch, submit, approve/reject) invalidates it once its transaction commits.
+
+The same versioned counters give the ETags of the read endpoints (see
+dashboard.conditional), along with a counter of the logsheet queue.
+
+The cache is the Django cache named by DASHBOARD_SNAPSHOT_CACHE. A local-memory
+cache is only correct with a single process; deployments with several workers
+need a shared backend (Redis, Memcached).
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+
+from .models import TimeLog, LogSheetApproval, DailyWorkSummary
+from .rows import TIMELOG_FIELDS, serialize_timelogs
+
+HITS_KEY = 'dashboard:snapshot:hits'
+MISSES_KEY = 'dashboard:snapshot:misses'
+LOGSHEET_QUEUE_KEY = 'dashboard:logsheet-queue-version'
+
+
+def get_cache():
+    return caches[settings.DASHBOARD_SNAPSHOT_CACHE]
+
+
+def snapshot_key(user_id, day):
+    return f'dashboard:snapshot:{user_id}:{day.isoformat()}'
+
+
+def version_key(user_id, day):
+    # Bumped on every write; a snapshot built while a write commits is stored
+    # under the old version and never read
+    return f'dashboard:snapshot-version:{user_id}:{day.isoformat()}'
+
+
+def build_snapshot(user_id, day):
+    logs = list(TimeLog.objects.filter(user_id=user_id, work_date=day).order_by('timestamp').values(*TIMELOG_FIELDS))
+    logsheet_status = (
+        LogSheetApproval.objects.filter(user_id=user_id, date=day)
+        .values_list('status', flat=True)
+        .first()
+    )
+    worked_seconds = (
+        DailyWorkSummary.objects.filter(user_id=user_id, work_date=day)
+        .values_list('worked_seconds', flat=True)
+        .first()
+    )
+    return _snapshot(logs, logsheet_status, worked_seconds)
+
+
+async def abuild_snapshot(user_id, day):
+    """build_snapshot() with the async ORM."""
+    logs = [
+        log async for log in
+        TimeLog.objects.filter(user_id=user_id, work_date=day).order_by('timestamp').values(*TIMELOG_FIELDS)
+    ]
+    logsheet_status = await (
+        LogSheetApproval.objects.filter(user_id=user_id, date=day)
+        .values_list('status', flat=True)
+        .afirst()
+    )
+    worked_seconds = await (
+        DailyWorkSummary.objects.filter(user_id=user_id, work_date=day)
+        .values_list('worked_seconds', flat=True)
+        .afirst()
+    )
+    return _snapshot(logs, logsheet_status, worked_seconds)
+
+
+def _snapshot(logs, logsheet_status, worked_seconds):
+    if worked_seconds is None:
+        from .services import summarize_logs
+        worked_seconds = summarize_logs((log['type'], log['timestamp']) for log in logs)['worked_seconds']
+    return {
+        'logs': serialize_timelogs(logs),
+        'has_submitted': logsheet_status is not None,
+        'logsheet_status': logsheet_status,
+        'hours_worked': round(worked_seconds / 3600, 2),
+    }
+
+
+def _count(key):
+    cache = get_cache()
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Evicted between add() and incr()
+            cache.add(key, 1, timeout=None)
+
+
+def _new_version():
+    # Counters restart from the clock rather than from 1, so a counter that
+    # was evicted never hands out a version (or ETag) it gave before
+    return time.time_ns()
+
+
+def get_version(key):
+    """Returns the change counter stored under ``key``, starting it if needed."""
+    cache = get_cache()
+    version = cache.get(key)
+    if version is None:
+        version = _new_version()
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+async def aget_version(key):
+    cache = get_cache()
+    version = await cache.aget(key)
+    if version is None:
+        version = _new_version()
+        if not await cache.aadd(key, version, timeout=None):
+            version = await cache.aget(key, version)
+    return version
+
+
+def bump_version(key):
+    """Bumps the change counter under ``key`` once the current transaction commits."""
+    def bump():
+        cache = get_cache()
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _new_version(), timeout=None)
+    transaction.on_commit(bump)
+
+
+async def abump_version(key):
+    """bump_version() for the async views, which run outside transactions: bumps right away."""
+    cache = get_cache()
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        await cache.aadd(key, _new_version(), timeout=None)
+
+
+def snapshot_version(user_id, day=None):
+    return get_version(version_key(user_id, day or timezone.localdate()))
+
+
+def asnapshot_version(user_id, day=None):
+    return aget_version(version_key(user_id, day or timezone.localdate()))
+
+
+def get_today_snapshot(user_id, day=None):
+    """Returns the snapshot of the user's day (today by default), building it on a miss."""
+    day = day or timezone.localdate()
+    cache = get_cache()
+    key = snapshot_key(user_id, day)
+    version = get_version(version_key(user_id, day))
+    snapshot = cache.get(key, version=version)
+    if snapshot is not None:
+        _count(HITS_KEY)
+        return snapshot
+    _count(MISSES_KEY)
+    snapshot = build_snapshot(user_id, day)
+    cache.set(key, snapshot, settings.DASHBOARD_SNAPSHOT_TIMEOUT, version=version)
+    return snapshot
+
+
+async def _acount(key):
+    cache = get_cache()
+    if not await cache.aadd(key, 1, timeout=None):
+        try:
+            await cache.aincr(key)
+        except ValueError:
+            await cache.aadd(key, 1, timeout=None)
+
+
+async def aget_today_snapshot(user_id, day=None):
+    """Async counterpart of get_today_snapshot for the async views."""
+    day = day or timezone.localdate()
+    cache = get_cache()
+    key = snapshot_key(user_id, day)
+    version = await aget_version(version_key(user_id, day))
+    snapshot = await cache.aget(key, version=version)
+    if snapshot is not None:
+        await _acount(HITS_KEY)
+        return snapshot
+    await _acount(MISSES_KEY)
+    snapshot = await abuild_snapshot(user_id, day)
+    await cache.aset(key, snapshot, settings.DASHBOARD_SNAPSHOT_TIMEOUT, version=version)
+    return snapshot
+
+
+def invalidate_snapshot(user_id, day=None):
+    """Invalidates the user's snapshot of the day once the current transaction commits."""
+    bump_version(version_key(user_id, day or timezone.localdate()))
+
+
+async def ainvalidate_snapshot(user_id, day=None):
+    await abump_version(version_key(user_id, day or timezone.localdate()))
+
+
+def logsheet_queue_version():
+    """Change counter of the logsheets, bumped whenever one is submitted or processed."""
+    return get_version(LOGSHEET_QUEUE_KEY)
+
+
+def invalidate_logsheet_queue():
+    bump_version(LOGSHEET_QUEUE_KEY)
+
+
+def get_snapshot_stats():
+    cache = get_cache()
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / total, 4) if total else None,
+    }
+
+
+def reset_snapshot_stats():
+    get_cache().delete_many([HITS_KEY, MISSES_KEY])
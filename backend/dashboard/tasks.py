@@ -0,0 +1,69 @@
+"""
+Handlers of the background jobs queued when a logsheet is submitted.
+"""
+from django.core.mail import EmailMessage
+
+from .events import MANAGERS_CHANNEL, publish_event, user_channel
+from .jobs import job
+from .models import LogSheetApproval, User
+from .services import rebuild_daily_summary
+from .snapshots import invalidate_logsheet_queue, invalidate_snapshot
+from .tracker import get_tracker
+
+
+def logsheet_jobs(logsheet):
+    """The jobs to queue for a submitted logsheet, for enqueue_many()."""
+    payload = {'logsheet_id': logsheet.pk}
+    return [
+        ('validate_jira_key', payload),
+        ('notify_managers', payload),
+        ('refresh_logsheet_hours', payload),
+    ]
+
+
+@job('validate_jira_key')
+def validate_jira_key(logsheet_id):
+    logsheet = LogSheetApproval.objects.filter(pk=logsheet_id).first()
+    if logsheet is None:
+        return
+    jira_status = 'valid' if get_tracker().issue_exists(logsheet.jira_key) else 'invalid'
+    # Unless the logsheet was resubmitted with another key meanwhile
+    if LogSheetApproval.objects.filter(pk=logsheet_id, jira_key=logsheet.jira_key).update(jira_status=jira_status):
+        invalidate_logsheet_queue()
+        publish_event([MANAGERS_CHANNEL, user_channel(logsheet.user_id)], 'logsheet_jira_checked', {
+            'id': logsheet_id, 'jira_key': logsheet.jira_key, 'jira_status': jira_status,
+        })
+
+
+@job('notify_managers')
+def notify_managers(logsheet_id):
+    logsheet = LogSheetApproval.objects.select_related('user').filter(pk=logsheet_id, status='pending').first()
+    if logsheet is None:
+        return
+    recipients = list(
+        User.objects.filter(is_manager=True, is_active=True).exclude(email='').values_list('email', flat=True)
+    )
+    if not recipients:
+        return
+    EmailMessage(
+        subject=f'Logsheet submitted by {logsheet.user.username} for {logsheet.date}',
+        body=(
+            f'{logsheet.user.username} submitted {logsheet.hours_worked:.2f} hours on {logsheet.jira_key} '
+            f'for {logsheet.date}. It is waiting for approval.'
+        ),
+        bcc=recipients,
+    ).send()
+
+
+@job('refresh_logsheet_hours')
+def refresh_logsheet_hours(logsheet_id):
+    """Rebuilds the day summary from the raw punches and corrects the hours of the pending logsheet."""
+    logsheet = LogSheetApproval.objects.filter(pk=logsheet_id).first()
+    if logsheet is None:
+        return
+    summary = rebuild_daily_summary(logsheet.user_id, logsheet.date)
+    invalidate_snapshot(logsheet.user_id, logsheet.date)
+    if LogSheetApproval.objects.filter(pk=logsheet_id, status='pending').exclude(
+        hours_worked=summary.hours_worked
+    ).update(hours_worked=summary.hours_worked):
+        invalidate_logsheet_queue()
@@ -1,3 +1,1297 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import json
+import logging
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from io import StringIO
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import addModuleCleanup, mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import Permission
+from django.core import mail
+from django.core.management import CommandError, call_command
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import QuerySet
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path, resolve, reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from . import urls as dashboard_urls
+from .models import User, TimeLog, LogSheetApproval, DailyWorkSummary, ArchivedMonth, ArchivedTimeLog, Job
+from .authentication import check_auth_cache, revoke_tokens
+from .db import ReplicaRouter, reporting_reads
+from .events import MANAGERS_CHANNEL, get_broker, user_channel
+from .jobs import enqueue, run_pending
+from .partitions import DEFAULT_PARTITION, create_partitions, is_partitioned, partition_name
+from .renderers import ORJSONRenderer
+from .seeding import TIMELOG_COLUMNS, _copy_value, copy_rows
+from .serializers import MyTokenObtainPairSerializer
+from .reports import build_report
+from .services import (
+    CHECKED_OUT, OFF_DUTY, ON_BREAK, WORKING, PunchError, find_summary_mismatches, get_day_state, ingest_punches,
+    STATE_AFTER, arecord_punch, process_logsheets, record_punch,
+)
+from .snapshots import get_cache
+from .throttling import get_bucket_store
+from .tracker import FakeTracker
+from .views import BatchTimeLogsView
+from .workdays import day_bounds, user_work_date
+
+request_logger = logging.getLogger('dashboard.requests')
+
+
+def setUpModule():
+    # Keeps the JSON line of every test request out of the test output;
+    # assertLogs() still sees them
+    addModuleCleanup(request_logger.setLevel, request_logger.level)
+    request_logger.setLevel(logging.WARNING)
+
+
+class QueryBudgetMixin:
+    """
+    Adds ``assertQueryBudget`` to a test case: the block fails the test if it
+    runs more than ``budget`` database queries, listing the SQL it ran.
+    """
+
+    @contextmanager
+    def assertQueryBudget(self, budget, label='Block'):
+        with CaptureQueriesContext(connection) as context:
+            yield context
+        if len(context) > budget:
+            queries = '\n'.join(query['sql'] for query in context.captured_queries)
+            self.fail(f'{label} ran {len(context)} queries, budget is {budget}:\n{queries}')
+
+
+class PunchStateMachineTests(TestCase):
+    def setUp(self):
+        get_bucket_store().clear()
+        self.user = User.objects.create_user('employee', password='secret')
+
+    def test_a_full_day(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        for url_name in ('check-in', 'break-start', 'break-end', 'check-out'):
+            self.assertEqual(client.post(reverse(url_name)).status_code, 201, url_name)
+        self.assertEqual(
+            list(TimeLog.objects.filter(user=self.user).order_by('id').values_list('type', flat=True)),
+            ['check_in', 'break_start', 'break_end', 'check_out'],
+        )
+        self.assertEqual(get_day_state(self.user), CHECKED_OUT)
+        response = client.post(reverse('check-in'))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['detail'], 'You have already checked in today.')
+
+    def test_invalid_transitions_are_rejected(self):
+        cases = [
+            ([], 'break_start', OFF_DUTY),
+            ([], 'break_end', OFF_DUTY),
+            ([], 'check_out', OFF_DUTY),
+            (['check_in'], 'check_in', WORKING),
+            (['check_in'], 'break_end', WORKING),
+            (['check_in', 'break_start'], 'break_start', ON_BREAK),
+            (['check_in', 'break_start'], 'check_out', ON_BREAK),
+            (['check_in', 'check_out'], 'check_in', CHECKED_OUT),
+            (['check_in', 'check_out'], 'break_start', CHECKED_OUT),
+        ]
+        for index, (punches, punch_type, state) in enumerate(cases):
+            with self.subTest(punches=punches, punch_type=punch_type):
+                user = User.objects.create_user(f'case{index}')
+                for done in punches:
+                    record_punch(user, done)
+                with self.assertRaises(PunchError) as raised:
+                    record_punch(user, punch_type)
+                self.assertEqual(raised.exception.state, state)
+                self.assertEqual(TimeLog.objects.filter(user=user).count(), len(punches))
+                self.assertEqual(get_day_state(user), state)
+
+    def test_days_punched_before_summaries_existed_follow_the_log(self):
+        today = user_work_date(self.user)
+        check_in = timezone.now() - timedelta(hours=1)
+        # As left by a deploy before DailyWorkSummary: a log and no summary
+        TimeLog.objects.create(user=self.user, type='check_in', timestamp=check_in, work_date=today)
+        self.assertEqual(get_day_state(self.user), WORKING)
+
+        with self.assertRaises(PunchError) as raised:
+            record_punch(self.user, 'check_in')
+        self.assertEqual(raised.exception.state, WORKING)
+        self.assertFalse(DailyWorkSummary.objects.exists())
+
+        record_punch(self.user, 'break_start')
+        self.assertEqual(
+            list(TimeLog.objects.filter(user=self.user).order_by('id').values_list('type', flat=True)),
+            ['check_in', 'break_start'],
+        )
+        summary = DailyWorkSummary.objects.get(user=self.user, work_date=today)
+        self.assertEqual((summary.state, summary.first_punch_at), (ON_BREAK, check_in))
+        self.assertGreaterEqual(summary.worked_seconds, 3600)
+        self.assertEqual(list(find_summary_mismatches(DailyWorkSummary.objects.all(), TimeLog.objects.all())), [])
+
+    def test_the_user_row_is_locked_before_the_state_is_read(self):
+        with mock.patch.object(
+            QuerySet, 'select_for_update', autospec=True, side_effect=QuerySet.select_for_update,
+        ) as lock, CaptureQueriesContext(connection) as queries:
+            record_punch(self.user, 'check_in')
+        self.assertEqual([call.args[0].model for call in lock.call_args_list], [User, DailyWorkSummary])
+        summary_reads = [
+            index for index, query in enumerate(queries.captured_queries)
+            if query['sql'].startswith('SELECT') and DailyWorkSummary._meta.db_table in query['sql']
+        ]
+        user_reads = [
+            index for index, query in enumerate(queries.captured_queries)
+            if query['sql'].startswith('SELECT') and User._meta.db_table in query['sql']
+        ]
+        self.assertLess(user_reads[0], summary_reads[0])
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentPunchTests(TransactionTestCase):
+    def test_concurrent_check_ins_are_serialized(self):
+        user = User.objects.create_user('employee')
+        barrier = threading.Barrier(2)
+        results = []
+
+        def check_in():
+            barrier.wait()
+            try:
+                record_punch(user, 'check_in')
+                results.append('recorded')
+            except PunchError:
+                results.append('rejected')
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=check_in) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(results), ['recorded', 'rejected'])
+        self.assertEqual(TimeLog.objects.filter(user=user).count(), 1)
+
+
+class WorkDateMigrationTests(TransactionTestCase):
+    before = [('dashboard', '0001_initial')]
+    after = [('dashboard', '0002_timelog_work_date')]
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    @override_settings(TIME_ZONE='America/New_York')
+    def test_work_date_is_backfilled_from_the_local_timestamp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        apps = executor.loader.project_state(self.before).apps
+        user = apps.get_model('dashboard', 'User').objects.create(username='employee')
+        OldTimeLog = apps.get_model('dashboard', 'TimeLog')
+        moments = [datetime(2026, 3, 2, 14, tzinfo=dt_timezone.utc), datetime(2026, 3, 3, 2, tzinfo=dt_timezone.utc)]
+        for moment in moments:
+            log = OldTimeLog.objects.create(user=user, type='check_in')
+            # timestamp is auto_now_add
+            OldTimeLog.objects.filter(pk=log.pk).update(timestamp=moment)
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+        apps = executor.loader.project_state(self.after).apps
+        work_dates = apps.get_model('dashboard', 'TimeLog').objects.order_by('timestamp').values_list('work_date', flat=True)
+        # 02:00 UTC is still the previous day in New York
+        self.assertEqual(list(work_dates), [date(2026, 3, 2), date(2026, 3, 2)])
+
+
+class DailyWorkSummaryTests(TestCase):
+    day = date(2026, 3, 2)
+
+    def setUp(self):
+        self.user = User.objects.create_user('employee', password='secret', timezone='UTC')
+
+    def punch_day(self, user, punches):
+        for punch_type, hour, minute in punches:
+            moment = datetime(2026, 3, 2, hour, minute, tzinfo=dt_timezone.utc)
+            with mock.patch('django.utils.timezone.now', return_value=moment):
+                record_punch(user, punch_type)
+
+    def check(self, *args):
+        stdout = StringIO()
+        call_command('check_daily_summaries', *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_totals_follow_the_punches(self):
+        self.punch_day(self.user, [('check_in', 9, 0), ('break_start', 12, 0), ('break_end', 12, 30)])
+        summary = DailyWorkSummary.objects.get(user=self.user, work_date=self.day)
+        self.assertEqual((summary.worked_seconds, summary.break_seconds, summary.state), (3 * 3600, 1800, WORKING))
+        self.punch_day(self.user, [('check_out', 17, 30)])
+        summary.refresh_from_db()
+        self.assertEqual((summary.worked_seconds, summary.break_seconds, summary.state), (8 * 3600, 1800, CHECKED_OUT))
+        self.assertEqual(summary.first_punch_at, datetime(2026, 3, 2, 9, tzinfo=dt_timezone.utc))
+        self.assertEqual(summary.last_punch_at, datetime(2026, 3, 2, 17, 30, tzinfo=dt_timezone.utc))
+        self.assertEqual(summary.hours_worked, 8.0)
+
+    def test_reads_do_not_write_summaries(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.assertEqual(client.post(reverse('submit-logsheet'), {'jira_key': 'PM-1'}, format='json').status_code, 400)
+        self.assertFalse(DailyWorkSummary.objects.exists())
+        # Days punched before summaries existed are summarized from the log
+        TimeLog.objects.create(user=self.user, type='check_in', timestamp=timezone.now(), work_date=user_work_date(self.user))
+        self.assertEqual(get_day_state(self.user), WORKING)
+        self.assertFalse(DailyWorkSummary.objects.exists())
+
+    def test_check_and_rebuild(self):
+        other = User.objects.create_user('other', timezone='UTC')
+        self.punch_day(self.user, [('check_in', 9, 0), ('check_out', 17, 0)])
+        self.punch_day(other, [('check_in', 10, 0)])
+        self.assertIn('All daily summaries match', self.check())
+
+        DailyWorkSummary.objects.filter(user=self.user).update(worked_seconds=60)
+        DailyWorkSummary.objects.filter(user=other).delete()
+        stray = DailyWorkSummary.objects.create(user=other, work_date=self.day - timedelta(days=1), state=WORKING)
+        with self.assertRaisesMessage(CommandError, '3 daily summaries are inconsistent'):
+            self.check()
+        with self.assertRaises(CommandError):
+            self.check('--user', str(other.pk))
+
+        # Only the selected days are rebuilt
+        call_command('rebuild_daily_summaries', '--from', '2026-03-03', stdout=StringIO())
+        self.assertEqual(DailyWorkSummary.objects.get(user=self.user).worked_seconds, 60)
+        call_command('rebuild_daily_summaries', '--from', '2026-03-02', '--to', '2026-03-02', stdout=StringIO())
+        self.assertEqual(DailyWorkSummary.objects.get(user=self.user).worked_seconds, 8 * 3600)
+        self.assertEqual(DailyWorkSummary.objects.get(user=other, work_date=self.day).state, WORKING)
+
+        # The stray summary has no punches left to rebuild it from
+        with self.assertRaisesMessage(CommandError, '1 daily summaries are inconsistent'):
+            self.check()
+        stray.delete()
+        self.assertIn('All daily summaries match', self.check('--from', '2026-03-02'))
+
+    def test_dates_are_validated(self):
+        for command in ('rebuild_daily_summaries', 'check_daily_summaries'):
+            with self.subTest(command=command), self.assertRaisesMessage(CommandError, "Invalid date '2026-13-01'"):
+                call_command(command, '--from', '2026-13-01', stdout=StringIO())
+
+
+class ManagerQueueTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user('manager', is_manager=True)
+        cls.employees = [User.objects.create_user(f'employee{i}') for i in range(3)]
+        # Several logsheets per date, so pages split ties on the id
+        LogSheetApproval.objects.bulk_create([
+            LogSheetApproval(
+                user=user, date=date(2026, 3, day), jira_key=f'PM-{index}', hours_worked=8.0,
+                status='approved' if day == 5 else 'pending',
+            )
+            for day in range(1, 6)
+            for index, user in enumerate(cls.employees)
+        ])
+
+    def setUp(self):
+        get_cache().clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.manager)
+
+    def get(self, **params):
+        return self.client.get(reverse('manager-logsheets'), params)
+
+    def test_cursors_walk_every_row_once(self):
+        expected = list(
+            LogSheetApproval.objects.filter(status='pending').order_by('-date', '-id').values_list('id', flat=True)
+        )
+        ids, cursor, pages = [], None, 0
+        while True:
+            response = self.get(page_size=5, **({'cursor': cursor} if cursor else {}))
+            self.assertEqual(response.data['count'], len(expected))
+            ids += [row['id'] for row in response.data['results']]
+            cursor = response.data['next_cursor']
+            pages += 1
+            if cursor is None:
+                break
+        self.assertEqual((ids, pages), (expected, 3))
+        self.assertNotIn('count', self.get(count='false').data)
+
+    def test_filters(self):
+        employee = self.employees[1]
+        cases = [
+            ({'status': 'approved'}, LogSheetApproval.objects.filter(status='approved')),
+            ({'user': employee.pk}, LogSheetApproval.objects.filter(status='pending', user=employee)),
+            ({'jira_key': 'PM-2'}, LogSheetApproval.objects.filter(status='pending', jira_key='PM-2')),
+            (
+                {'date_from': '2026-03-02', 'date_to': '2026-03-03'},
+                LogSheetApproval.objects.filter(status='pending', date__range=(date(2026, 3, 2), date(2026, 3, 3))),
+            ),
+        ]
+        for params, queryset in cases:
+            with self.subTest(params=params):
+                response = self.get(**params)
+                self.assertEqual(
+                    [row['id'] for row in response.data['results']],
+                    list(queryset.order_by('-date', '-id').values_list('id', flat=True)),
+                )
+
+    def test_invalid_parameters(self):
+        for params in (
+            {'status': 'lost'}, {'user': 'me'}, {'date_from': '03/02/2026'}, {'cursor': 'not-a-cursor'},
+            {'page_size': 'all'},
+        ):
+            with self.subTest(params=params):
+                self.assertEqual(self.get(**params).status_code, 400)
+        self.assertEqual(len(self.get(page_size=1000).data['results']), 12)
+        employee = APIClient()
+        employee.force_authenticate(self.employees[0])
+        self.assertEqual(employee.get(reverse('manager-logsheets')).status_code, 403)
+
+
+class DashboardTestCase(QueryBudgetMixin, TestCase):
+    """
+    Base for endpoint tests. The database holds many rows per user and
+    request() fails the test if an endpoint runs more queries than its budget,
+    so a query per row (N+1) blows it.
+    """
+    ROWS = 30
+
+    # url name -> maximum number of queries per request
+    BUDGETS = {
+        'user-profile': 0,
+        'check-in': 7,
+        'break-start': 6,
+        'break-end': 6,
+        'check-out': 6,
+        'time-logs': 3,
+        'submit-logsheet': 6,
+        'logsheet-status': 3,
+        'manager-logsheets': 2,
+        'approve-reject-logsheet': 4,
+        'event-stream': 0,
+        'event-stream-ticket': 0,
+        'ingest-punches': 10,
+        'manager-reports': 3,
+        'db-pool-stats': 0,
+        'export-logsheets': 1,
+        'bulk-approve-reject-logsheets': 4,
+        'user-time-logs': 2,
+        'batch-time-logs': 2,
+        'employee-bootstrap': 3,
+        'manager-bootstrap': 2,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user('manager', password='secret', is_manager=True)
+        cls.employee = User.objects.create_user('employee', password='secret')
+        cls.others = User.objects.bulk_create(
+            [User(username=f'employee{i}') for i in range(cls.ROWS)]
+        )
+        today = timezone.localdate()
+        LogSheetApproval.objects.bulk_create([
+            LogSheetApproval(
+                user=user,
+                date=today - timedelta(days=day),
+                jira_key=f'PM-{day}',
+                hours_worked=8.0,
+                manager=cls.manager if day % 2 else None,
+            )
+            for user in cls.others
+            for day in range(1, 3)
+        ])
+        TimeLog.objects.bulk_create([
+            TimeLog(user=cls.others[0], type=punch_type, work_date=user_work_date(cls.others[0]))
+            for _ in range(cls.ROWS)
+            for punch_type in ('check_in', 'break_start', 'break_end', 'check_out')
+        ])
+
+    def setUp(self):
+        get_cache().clear()
+        get_bucket_store().clear()
+
+    def request(self, user, method, url_name, budget_name=None, data=None, **kwargs):
+        client = APIClient()
+        client.force_authenticate(user)
+        url = reverse(url_name, kwargs=kwargs or None)
+        budget = self.BUDGETS[budget_name or url_name]
+        with self.assertQueryBudget(budget, label=f'{method.upper()} {url}'):
+            if method == 'get':
+                response = client.get(url, data)
+            else:
+                response = client.post(url, data, format='json')
+        self.assertLess(response.status_code, 300, response.data)
+        return response
+
+
+class EndpointQueryBudgetTests(DashboardTestCase):
+    def test_every_endpoint_has_a_budget(self):
+        url_names = {pattern.name for pattern in dashboard_urls.urlpatterns}
+        self.assertEqual(url_names, set(self.BUDGETS))
+
+    def test_user_profile(self):
+        self.request(self.employee, 'get', 'user-profile')
+
+    def test_punch_and_submit(self):
+        for url_name in ('check-in', 'break-start', 'break-end', 'check-out', 'submit-logsheet'):
+            self.request(self.employee, 'post', url_name, data={'jira_key': 'PM-1'})
+
+    def test_time_logs(self):
+        self.request(self.others[0], 'get', 'time-logs')
+
+    def test_logsheet_status(self):
+        self.request(self.employee, 'get', 'logsheet-status')
+
+    def test_manager_logsheets(self):
+        response = self.request(self.manager, 'get', 'manager-logsheets', data={'page_size': 200})
+        self.assertEqual(len(response.data['results']), self.ROWS * 2)
+
+    def test_approve_reject_logsheet(self):
+        logsheet = LogSheetApproval.objects.first()
+        self.request(
+            self.manager, 'post', 'approve-reject-logsheet',
+            data={'action': 'approve', 'work_day_credit': 1.0}, pk=logsheet.pk,
+        )
+
+    def test_user_time_logs(self):
+        self.request(
+            self.manager, 'get', 'user-time-logs',
+            user_id=self.others[0].pk, date_str=timezone.localdate().isoformat(),
+        )
+
+
+class BulkApproveRejectTests(DashboardTestCase):
+    def test_bulk_approve_reject_logsheets(self):
+        ids = list(LogSheetApproval.objects.values_list('id', flat=True))
+        LogSheetApproval.objects.filter(id=ids[0]).update(status='rejected')
+        response = self.request(
+            self.manager, 'post', 'bulk-approve-reject-logsheets',
+            data={'ids': ids + [0], 'action': 'approve', 'work_day_credit': 0.5},
+        )
+        self.assertEqual(response.data['processed'], len(ids) - 1)
+        results = {item['id']: item['result'] for item in response.data['results']}
+        self.assertEqual(results[ids[0]], 'already_processed')
+        self.assertEqual(results[0], 'not_found')
+        self.assertFalse(LogSheetApproval.objects.filter(status='pending').exists())
+
+
+@override_settings(DASHBOARD_EVENT_STREAM_LIFETIME=0.05)
+class EventStreamTests(DashboardTestCase):
+    def test_event_stream_needs_asgi(self):
+        with self.assertQueryBudget(self.BUDGETS['event-stream']):
+            response = self.client.get(reverse('event-stream'))
+        self.assertEqual(response.status_code, 501)
+
+    def test_punch_and_logsheet_events_reach_subscribers(self):
+        broker = get_broker()
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+
+        async def subscribe(channels):
+            return broker.subscribe(channels)
+
+        async def drain(subscription):
+            events = []
+            while (event := await broker.listen(subscription, 0.01)) is not None:
+                events.append(event)
+            return events
+
+        employee_channels = [user_channel(self.employee.pk)]
+        manager_channels = [user_channel(self.manager.pk), MANAGERS_CHANNEL]
+        employee = loop.run_until_complete(subscribe(employee_channels))
+        manager = loop.run_until_complete(subscribe(manager_channels))
+        self.addCleanup(broker.unsubscribe, employee_channels, employee)
+        self.addCleanup(broker.unsubscribe, manager_channels, manager)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for url_name in ('check-in', 'check-out', 'submit-logsheet'):
+                self.request(self.employee, 'post', url_name, data={'jira_key': 'PM-1'})
+        logsheet = LogSheetApproval.objects.get(user=self.employee)
+        with self.captureOnCommitCallbacks(execute=True):
+            process_logsheets(self.manager, [logsheet.pk], 'approve', 1.0)
+
+        events = loop.run_until_complete(drain(employee))
+        self.assertEqual(
+            [event['type'] for event in events],
+            ['punch', 'punch', 'logsheet_submitted', 'logsheet_processed'],
+        )
+        self.assertEqual([event['data']['state'] for event in events[:2]], [WORKING, CHECKED_OUT])
+        self.assertEqual(events[3]['data'], {'id': logsheet.pk, 'status': 'approved', 'work_day_credit': 1.0})
+        events = loop.run_until_complete(drain(manager))
+        self.assertEqual([event['type'] for event in events], ['logsheet_submitted', 'logsheets_processed'])
+        self.assertEqual((events[0]['data']['id'], events[0]['data']['previous_status']), (logsheet.pk, None))
+        self.assertEqual(events[1]['data']['ids'], [logsheet.pk])
+
+    def ticket(self, user):
+        response = self.request(user, 'post', 'event-stream-ticket')
+        self.assertEqual(response.data['expires_in'], settings.DASHBOARD_EVENT_TICKET_TTL)
+        return response.data['ticket']
+
+    async def stream(self, **kwargs):
+        response = await AsyncClient().get(reverse('event-stream'), **kwargs)
+        if response.status_code != 200:
+            return response.status_code, response.json()['detail']
+        return 200, b''.join([chunk async for chunk in response.streaming_content])
+
+    async def test_stream_opens_with_a_ticket_and_ends_after_its_lifetime(self):
+        ticket = await sync_to_async(self.ticket)(self.employee)
+        status_code, content = await self.stream(data={'ticket': ticket})
+        self.assertEqual(status_code, 200)
+        self.assertTrue(content.startswith(b'retry: 5000\n\n'))
+
+        access = await sync_to_async(lambda: str(MyTokenObtainPairSerializer.get_token(self.employee).access_token))()
+        self.assertEqual((await self.stream(headers={'Authorization': f'Bearer {access}'}))[0], 200)
+        # Access tokens are not accepted in the URL
+        self.assertEqual(await self.stream(data={'token': access}), (401, 'Authentication credentials were not provided.'))
+
+    async def test_expired_forged_and_revoked_tickets_are_rejected(self):
+        ticket = await sync_to_async(self.ticket)(self.employee)
+        later = timezone.now().timestamp() + settings.DASHBOARD_EVENT_TICKET_TTL + 1
+        with mock.patch('django.core.signing.time.time', return_value=later):
+            self.assertEqual(await self.stream(data={'ticket': ticket}), (401, 'Invalid or expired stream ticket.'))
+        self.assertEqual(await self.stream(data={'ticket': ticket + 'x'}), (401, 'Invalid or expired stream ticket.'))
+        await sync_to_async(revoke_tokens)(self.employee.pk)
+        self.assertEqual(await self.stream(data={'ticket': ticket}), (401, 'Token has been revoked'))
+
+
+class AsyncURLconf:
+    """dashboard.urls with DASHBOARD_ASYNC_VIEWS on."""
+    urlpatterns = [path('api/', include(dashboard_urls.with_async_views(dashboard_urls.urlpatterns)))]
+
+
+@override_settings(ROOT_URLCONF=AsyncURLconf)
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        get_bucket_store().clear()
+        self.user = User.objects.create_user('employee', password='secret')
+        self.client = AsyncClient()
+        self.authorization = f'Bearer {MyTokenObtainPairSerializer.get_token(self.user).access_token}'
+
+    async def post(self, url_name, **headers):
+        return await self.client.post(reverse(url_name), headers={'Authorization': self.authorization, **headers})
+
+    async def get(self, url_name, **headers):
+        return await self.client.get(reverse(url_name), headers={'Authorization': self.authorization, **headers})
+
+    def test_routes_are_async(self):
+        for url_name in dashboard_urls.ASYNC_ROUTES:
+            self.assertIs(resolve(reverse(url_name), urlconf=AsyncURLconf).func, dashboard_urls.ASYNC_ROUTES[url_name])
+
+    async def test_punches(self):
+        response = await self.post('check-in')
+        self.assertEqual((response.status_code, response.json()), (201, {'detail': 'Checked in successfully.'}))
+        response = await self.post('check-in')
+        self.assertEqual((response.status_code, response.json()), (400, {'detail': 'You have already checked in today.'}))
+        for url_name in ('break-start', 'break-end', 'check-out'):
+            self.assertEqual((await self.post(url_name)).status_code, 201, url_name)
+
+        types = [punch_type async for punch_type in TimeLog.objects.order_by('id').values_list('type', flat=True)]
+        self.assertEqual(types, ['check_in', 'break_start', 'break_end', 'check_out'])
+        summary = await DailyWorkSummary.objects.aget(user=self.user)
+        self.assertEqual(summary.state, CHECKED_OUT)
+        self.assertEqual(
+            await sync_to_async(lambda: list(find_summary_mismatches(DailyWorkSummary.objects.all(), TimeLog.objects.all())))(),
+            [],
+        )
+
+    async def test_unauthenticated_and_replayed_punches(self):
+        response = await self.client.post(reverse('check-in'))
+        self.assertEqual(response.status_code, 401)
+        first = await self.post('check-in', **{'Idempotency-Key': 'check-in-1'})
+        replay = await self.post('check-in', **{'Idempotency-Key': 'check-in-1'})
+        self.assertEqual((replay.status_code, replay.json()), (201, first.json()))
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertEqual(await TimeLog.objects.acount(), 1)
+
+    async def test_conditional_get(self):
+        for url_name in ('time-logs', 'logsheet-status'):
+            with self.subTest(url_name=url_name):
+                response = await self.get(url_name)
+                self.assertEqual(response.status_code, 200)
+                etag = response['ETag']
+                response = await self.get(url_name, **{'If-None-Match': etag})
+                self.assertEqual((response.status_code, response['ETag']), (304, etag))
+
+        etag = (await self.get('time-logs'))['ETag']
+        await self.post('check-in')
+        response = await self.get('time-logs', **{'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([log['type'] for log in response.json()], ['check_in'])
+        self.assertEqual((await self.get('logsheet-status')).json(), {'has_submitted': False})
+
+    @override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {
+        **settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], 'punch_user': '2/min',
+    }})
+    async def test_punches_are_throttled(self):
+        for store in ('dashboard.throttling.InProcessBucketStore', 'dashboard.throttling.CacheBucketStore'):
+            with self.subTest(store=store), override_settings(DASHBOARD_THROTTLE_STORE=store):
+                statuses = [(await self.post('break-end')).status_code for _ in range(3)]
+                self.assertEqual(statuses, [400, 400, 429])
+                response = await self.post('break-end')
+                self.assertEqual((response.status_code, response['Retry-After']), (429, '30'))
+
+    @override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {
+        **settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], 'punch_user': '2/min',
+    }})
+    async def test_replays_do_not_use_up_throttle_tokens(self):
+        headers = {'Idempotency-Key': 'check-in-1'}
+        statuses = [(await self.post('check-in', **headers)).status_code for _ in range(6)]
+        self.assertEqual(statuses, [201] * 6)
+        self.assertEqual((await self.post('break-start')).status_code, 201)
+        self.assertEqual((await self.post('break-end')).status_code, 429)
+        self.assertEqual((await self.post('check-in', **headers)).status_code, 201)
+
+
+class ConcurrentAsyncPunchTests(TransactionTestCase):
+    async def test_racing_punches_are_checked_against_the_winners_state(self):
+        user = await User.objects.acreate(username='employee')
+        results = await asyncio.gather(
+            *(arecord_punch(user, 'check_in') for _ in range(3)), return_exceptions=True,
+        )
+        self.assertEqual(sorted(type(result).__name__ for result in results), ['PunchError', 'PunchError', 'TimeLog'])
+        results = await asyncio.gather(
+            arecord_punch(user, 'break_start'), arecord_punch(user, 'check_out'), return_exceptions=True,
+        )
+        self.assertEqual(sum(isinstance(result, PunchError) for result in results), 1)
+        self.assertEqual(await TimeLog.objects.filter(user=user).acount(), 2)
+        summary = await DailyWorkSummary.objects.aget(user=user)
+        self.assertEqual(summary.state, STATE_AFTER[(await TimeLog.objects.filter(user=user).alatest('id')).type])
+
+    async def test_days_punched_before_summaries_existed_follow_the_log(self):
+        user = await User.objects.acreate(username='employee')
+        today = user_work_date(user)
+        await TimeLog.objects.acreate(user=user, type='check_in', timestamp=timezone.now(), work_date=today)
+        with self.assertRaises(PunchError) as raised:
+            await arecord_punch(user, 'check_in')
+        self.assertEqual(raised.exception.state, WORKING)
+        await arecord_punch(user, 'break_start')
+        summary = await DailyWorkSummary.objects.aget(user=user, work_date=today)
+        self.assertEqual(summary.state, ON_BREAK)
+        self.assertEqual(await TimeLog.objects.filter(user=user).acount(), 2)
+
+    async def test_the_summary_does_not_move_without_its_log(self):
+        user = await User.objects.acreate(username='employee')
+        await arecord_punch(user, 'check_in')
+        with mock.patch.object(TimeLog.objects, 'create', side_effect=DatabaseError('connection lost')):
+            with self.assertRaises(DatabaseError):
+                await arecord_punch(user, 'break_start')
+        summary = await DailyWorkSummary.objects.aget(user=user)
+        self.assertEqual(summary.state, WORKING)
+        await arecord_punch(user, 'break_start')
+        self.assertEqual(
+            await sync_to_async(lambda: list(find_summary_mismatches(DailyWorkSummary.objects.all(), TimeLog.objects.all())))(),
+            [],
+        )
+
+
+class TodaySnapshotTests(DashboardTestCase):
+    def test_today_snapshot_is_cached_until_a_punch(self):
+        self.request(self.employee, 'get', 'time-logs')
+        with self.assertQueryBudget(0, label='Cached time-logs'):
+            response = self.request(self.employee, 'get', 'time-logs')
+        self.assertEqual(response.data, [])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.request(self.employee, 'post', 'check-in')
+        response = self.request(self.employee, 'get', 'time-logs')
+        self.assertEqual([log['type'] for log in response.data], ['check_in'])
+
+
+class ExportLogsheetsTests(DashboardTestCase):
+    def test_export_logsheets(self):
+        LogSheetApproval.objects.update(status='approved')
+        today = timezone.localdate()
+        client = APIClient()
+        client.force_authenticate(self.manager)
+        for output, expected_lines in (('csv', self.ROWS * 2 + 1), ('ndjson', self.ROWS * 2)):
+            with self.assertQueryBudget(self.BUDGETS['export-logsheets'], label=f'{output} export'):
+                response = client.get(reverse('export-logsheets'), {
+                    'output': output,
+                    'date_from': (today - timedelta(days=7)).isoformat(),
+                    'date_to': today.isoformat(),
+                })
+                content = b''.join(response.streaming_content).decode()
+            self.assertEqual(len(content.splitlines()), expected_lines)
+
+    def test_export_payroll_command(self):
+        LogSheetApproval.objects.update(status='approved')
+        today = timezone.localdate()
+        stdout = StringIO()
+        call_command(
+            'export_payroll', '--from', (today - timedelta(days=7)).isoformat(), '--to', today.isoformat(),
+            '--format', 'ndjson', stdout=stdout,
+        )
+        exported = {json.loads(line)['logsheet_id'] for line in stdout.getvalue().splitlines()}
+        self.assertEqual(exported, set(LogSheetApproval.objects.values_list('id', flat=True)))
+
+
+class IngestPunchesTests(DashboardTestCase):
+    def test_ingest_punches(self):
+        kiosk = User.objects.create_user('kiosk')
+        kiosk.user_permissions.add(Permission.objects.get(codename='ingest_punches'))
+        start = timezone.now().replace(hour=8, minute=0, second=0, microsecond=0) - timedelta(days=1)
+        punches = [
+            {
+                'user': user.pk,
+                'type': punch_type,
+                'timestamp': (start + timedelta(hours=step * 2)).isoformat(),
+                'idempotency_key': f'{user.pk}-{step}',
+            }
+            for user in self.others[1:]
+            for step, punch_type in enumerate(('check_in', 'break_start', 'break_end', 'check_out'))
+        ]
+        punches += [
+            dict(punches[0]),
+            {**punches[0], 'idempotency_key': 'again', 'timestamp': (start + timedelta(hours=9)).isoformat()},
+            {**punches[0], 'type': 'lunch'},
+        ]
+        response = self.request(kiosk, 'post', 'ingest-punches', data={'device_id': 'lobby-1', 'punches': punches})
+        accepted = (self.ROWS - 1) * 4
+        self.assertEqual(response.data['accepted'], accepted)
+        self.assertEqual(response.data['duplicates'], [accepted])
+        self.assertEqual(
+            response.data['rejected'],
+            [{'index': accepted + 1, 'reason': 'invalid_transition_from_checked_out'},
+             {'index': accepted + 2, 'reason': 'invalid'}],
+        )
+        summary = DailyWorkSummary.objects.get(user=self.others[1], work_date=timezone.localdate(start))
+        self.assertEqual((summary.worked_seconds, summary.break_seconds), (4 * 3600, 2 * 3600))
+
+
+class ManagerReportsTests(DashboardTestCase):
+    def test_manager_reports(self):
+        LogSheetApproval.objects.update(status='approved', work_day_credit=1.0)
+        today = timezone.localdate()
+        call_command('rebuild_daily_summaries', stdout=StringIO())
+        response = self.request(self.manager, 'get', 'manager-reports', data={
+            'period': 'month',
+            'date_from': (today - timedelta(days=60)).isoformat(),
+            'date_to': today.isoformat(),
+        })
+        credit = sum(row['work_day_credit'] for row in response.data)
+        self.assertEqual(credit, self.ROWS * 2)
+        worker = [row for row in response.data if row['user']['id'] == self.others[0].pk and row['days_worked']]
+        self.assertEqual(len(worker), 1)
+
+    def test_late_check_ins_follow_the_users_work_day(self):
+        utc = User.objects.create_user('utc')
+        new_york = User.objects.create_user('new_york', timezone='America/New_York')
+        night = User.objects.create_user('night', timezone='America/New_York', day_starts_at=time(12))
+        days = [
+            # 09:00 and 10:00 in New York (UTC-5), 14:00 and 15:00 UTC
+            (utc, date(2026, 1, 5), datetime(2026, 1, 5, 9, 0)),
+            (utc, date(2026, 1, 6), datetime(2026, 1, 6, 10, 0)),
+            (new_york, date(2026, 1, 5), datetime(2026, 1, 5, 14, 0)),
+            (new_york, date(2026, 1, 6), datetime(2026, 1, 6, 15, 0)),
+            # 21:00, 23:00 and 01:00 in New York, late after 21:30
+            (night, date(2026, 1, 5), datetime(2026, 1, 6, 2, 0)),
+            (night, date(2026, 1, 6), datetime(2026, 1, 7, 4, 0)),
+            (night, date(2026, 1, 7), datetime(2026, 1, 8, 6, 0)),
+        ]
+        DailyWorkSummary.objects.bulk_create([
+            DailyWorkSummary(user=user, work_date=day, first_punch_at=moment.replace(tzinfo=dt_timezone.utc),
+                             last_punch_at=moment.replace(tzinfo=dt_timezone.utc), state=WORKING)
+            for user, day, moment in days
+        ])
+        report = build_report('month', date(2026, 1, 1), date(2026, 1, 31))
+        late = {row['user']['username']: row['late_check_ins'] for row in report}
+        self.assertEqual(late, {'utc': 1, 'new_york': 1, 'night': 2})
+
+
+class RequestProfilingTests(DashboardTestCase):
+    def test_server_timing_and_request_log(self):
+        client = APIClient()
+        client.force_authenticate(self.manager)
+        url = reverse('manager-logsheets')
+        with self.assertLogs('dashboard.requests') as logs, CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        self.assertIn(f'desc="{len(queries)} queries"', response['Server-Timing'])
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'manager-logsheets')
+        self.assertEqual(record['db_queries'], len(queries))
+        self.assertEqual(record['response_bytes'], len(response.content))
+
+
+class DatabasePoolTests(DashboardTestCase):
+    def test_db_pool_stats(self):
+        response = self.request(self.manager, 'get', 'db-pool-stats')
+        self.assertFalse(response.data['default']['pooled'])
+
+
+class BatchTimeLogsTests(DashboardTestCase):
+    def test_batch_time_logs(self):
+        today = timezone.localdate()
+        yesterday = today - timedelta(days=1)
+        pairs = [
+            {'user': user.pk, 'date': day.isoformat()}
+            for user in self.others
+            for day in (today, yesterday)
+        ]
+        response = self.request(self.manager, 'post', 'batch-time-logs', data={'pairs': pairs})
+        self.assertEqual(len(response.data), self.ROWS)
+        busy = response.data[str(self.others[0].pk)][today.isoformat()]
+        self.assertEqual(len(busy['logs']), self.ROWS * 4)
+        self.assertEqual(response.data[str(self.others[1].pk)][yesterday.isoformat()], {'logs': [], 'total_hours': 0.0})
+
+        response = self.request(self.manager, 'post', 'batch-time-logs', data={
+            'users': [self.others[0].pk], 'date_from': yesterday.isoformat(), 'date_to': today.isoformat(),
+        })
+        self.assertEqual(set(response.data[str(self.others[0].pk)]), {yesterday.isoformat(), today.isoformat()})
+
+    def test_oversized_batches_are_rejected_before_parsing(self):
+        client = APIClient()
+        client.force_authenticate(self.manager)
+        pairs = [{'user': 'not a number', 'date': 'not a date'}] * (BatchTimeLogsView.max_days + 1)
+        with self.assertQueryBudget(0, 'Oversized batch'):
+            response = client.post(reverse('batch-time-logs'), {'pairs': pairs}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['detail'], f'Ask for 1 to {BatchTimeLogsView.max_days} user-days at once.')
+
+
+class ConditionalGetTests(DashboardTestCase):
+    def test_conditional_get(self):
+        employee, manager = APIClient(), APIClient()
+        employee.force_authenticate(self.employee)
+        manager.force_authenticate(self.manager)
+        urls = [
+            (employee, reverse('time-logs')),
+            (employee, reverse('logsheet-status')),
+            (employee, reverse('user-profile')),
+            (manager, reverse('manager-logsheets') + '?status=pending'),
+        ]
+        etags = {url: client.get(url)['ETag'] for client, url in urls}
+        for client, url in urls:
+            with self.assertQueryBudget(0, label=f'Revalidated GET {url}'):
+                response = client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            self.assertEqual(response.status_code, 304, url)
+            self.assertEqual(response['ETag'], etags[url])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for url_name in ('check-in', 'break-start', 'break-end', 'check-out', 'submit-logsheet'):
+                employee.post(reverse(url_name), {'jira_key': 'PM-1'}, format='json')
+        for client, url in urls:
+            response = client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            expected = 304 if url == reverse('user-profile') else 200
+            self.assertEqual(response.status_code, expected, url)
+
+        etag = manager.get(urls[3][1])['ETag']
+        logsheet = LogSheetApproval.objects.filter(status='pending').first()
+        with self.captureOnCommitCallbacks(execute=True):
+            manager.post(
+                reverse('approve-reject-logsheet', args=[logsheet.pk]), {'action': 'reject'}, format='json',
+            )
+        self.assertEqual(manager.get(urls[3][1], HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class BootstrapTests(DashboardTestCase):
+    def test_employee_bootstrap(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            record_punch(self.employee, 'check_in')
+        response = self.request(self.employee, 'get', 'employee-bootstrap')
+        self.assertEqual(response.data['profile']['username'], 'employee')
+        self.assertEqual(response.data['state'], 'working')
+        self.assertEqual([log['type'] for log in response.data['logs']], ['check_in'])
+        self.assertFalse(response.data['has_submitted'])
+        with self.assertQueryBudget(0, label='Cached employee bootstrap'):
+            self.request(self.employee, 'get', 'employee-bootstrap')
+
+    def test_manager_bootstrap(self):
+        LogSheetApproval.objects.filter(pk=LogSheetApproval.objects.earliest('id').pk).update(status='approved')
+        response = self.request(self.manager, 'get', 'manager-bootstrap', data={'page_size': 20})
+        first_page = response.data['pending']
+        self.assertEqual(first_page['count'], self.ROWS * 2 - 1)
+        self.assertEqual(len(first_page['results']), 20)
+        next_page = self.request(
+            self.manager, 'get', 'manager-logsheets', data={'page_size': 20, 'cursor': first_page['next_cursor']},
+        )
+        ids = [row['id'] for row in first_page['results'] + next_page.data['results']]
+        expected = LogSheetApproval.objects.filter(status='pending').order_by('-date', '-id').values_list('id', flat=True)[:40]
+        self.assertEqual(ids, list(expected))
+
+    def test_manager_bootstrap_without_count(self):
+        client = APIClient()
+        client.force_authenticate(self.manager)
+        with self.assertQueryBudget(1, label='Manager bootstrap without count'):
+            response = client.get(reverse('manager-bootstrap'), {'count': 'false'})
+        self.assertNotIn('count', response.data['pending'])
+        self.assertNotEqual(response['ETag'], client.get(reverse('manager-bootstrap'))['ETag'])
+
+
+class ArchiveTimeLogsTests(TestCase):
+    def test_closed_months_move_to_the_archive(self):
+        user = User.objects.create_user('employee', password='secret')
+        old_day = timezone.localdate().replace(day=1) - timedelta(days=200)
+        check_in = timezone.make_aware(datetime.combine(old_day, datetime.min.time())) + timedelta(hours=9)
+        TimeLog.objects.bulk_create([
+            TimeLog(user=user, type='check_in', timestamp=check_in, work_date=old_day),
+            TimeLog(user=user, type='check_out', timestamp=check_in + timedelta(hours=8), work_date=old_day),
+        ])
+        record_punch(user, 'check_in')
+
+        call_command('archive_timelogs', months=3, stdout=StringIO())
+
+        self.assertEqual(list(TimeLog.objects.values_list('type', flat=True)), ['check_in'])
+        self.assertEqual(ArchivedTimeLog.objects.filter(user=user, work_date=old_day).count(), 2)
+        self.assertEqual(ArchivedMonth.objects.get().month, old_day.replace(day=1))
+        summary = DailyWorkSummary.objects.get(user=user, work_date=old_day)
+        self.assertEqual(summary.worked_seconds, 8 * 3600)
+        call_command('check_daily_summaries', stdout=StringIO())
+
+    def old_punch(self, user, day, hour):
+        moment = timezone.make_aware(datetime.combine(day, time(hour)))
+        return TimeLog.objects.create(user=user, type='check_in', timestamp=moment, work_date=day)
+
+    def read_archives(self, directory):
+        files = {}
+        for name in sorted(os.listdir(directory)):
+            with gzip.open(os.path.join(directory, name), 'rt') as archive:
+                files[name] = [json.loads(line)['id'] for line in archive]
+        return files
+
+    def test_files_are_published_on_commit_and_never_appended_to(self):
+        user = User.objects.create_user('employee')
+        old_day = date(2025, 1, 6)
+        first = self.old_punch(user, old_day, 9)
+        directory = self.enterContext(tempfile.TemporaryDirectory())
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            call_command('archive_timelogs', months=3, to_dir=directory, stdout=StringIO())
+            # Nothing is published before the commit
+            self.assertEqual([name.endswith('.tmp') for name in os.listdir(directory)], [True])
+        for callback in callbacks:
+            callback()
+        late = self.old_punch(user, old_day + timedelta(days=1), 9)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('archive_timelogs', months=3, to_dir=directory, stdout=StringIO())
+
+        self.assertEqual(self.read_archives(directory), {
+            'timelog-2025-01.ndjson.gz': [first.pk],
+            'timelog-2025-01-2.ndjson.gz': [late.pk],
+        })
+        self.assertEqual(ArchivedMonth.objects.get().rows, 2)
+
+    def test_a_failed_archive_leaves_no_file(self):
+        user = User.objects.create_user('employee')
+        self.old_punch(user, date(2025, 1, 6), 9)
+        directory = self.enterContext(tempfile.TemporaryDirectory())
+        with mock.patch.object(ArchivedMonth.objects, 'get_or_create', side_effect=RuntimeError('disk full')):
+            with self.assertRaises(RuntimeError):
+                call_command('archive_timelogs', months=3, to_dir=directory, stdout=StringIO())
+        self.assertEqual(os.listdir(directory), [])
+        self.assertEqual(TimeLog.objects.count(), 1)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'TimeLog is only partitioned on Postgres')
+class TimeLogPartitionTests(TestCase):
+    def count(self, table):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}')
+            return cursor.fetchone()[0]
+
+    def test_rows_in_the_default_partition_move_to_the_new_month(self):
+        self.assertTrue(is_partitioned(connection))
+        user = User.objects.create_user('employee')
+        month = date(2031, 5, 1)
+        day = date(2031, 5, 12)
+        log = TimeLog.objects.create(user=user, type='check_in', timestamp=timezone.now(), work_date=day)
+        self.assertEqual(self.count(DEFAULT_PARTITION), 1)
+
+        self.assertEqual(create_partitions(connection, month, date(2031, 6, 1)), [month, date(2031, 6, 1)])
+        self.assertEqual(self.count(DEFAULT_PARTITION), 0)
+        self.assertEqual(self.count(partition_name(month)), 1)
+        self.assertEqual(TimeLog.objects.get(work_date=day).pk, log.pk)
+        self.assertEqual(create_partitions(connection, month, month), [])
+
+
+@override_settings(DASHBOARD_JOB_EXECUTOR='dashboard.jobs.InProcessExecutor')
+class BackgroundJobTests(TestCase):
+    def setUp(self):
+        self.manager = User.objects.create_user('manager', email='manager@example.com', is_manager=True)
+        self.employee = User.objects.create_user('employee', password='secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.employee)
+        for punch_type in ('check_in', 'check_out'):
+            record_punch(self.employee, punch_type)
+
+    def submit(self, jira_key):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('submit-logsheet'), {'jira_key': jira_key}, format='json')
+        self.assertEqual(response.status_code, 201)
+        return LogSheetApproval.objects.get(pk=response.data['id'])
+
+    def test_submission_side_effects_run_as_jobs(self):
+        logsheet = self.submit('PM-42')
+        self.assertEqual(logsheet.jira_status, 'valid')
+        self.assertEqual(set(Job.objects.values_list('name', 'status')), {
+            ('validate_jira_key', 'done'), ('notify_managers', 'done'), ('refresh_logsheet_hours', 'done'),
+        })
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].bcc, ['manager@example.com'])
+
+        self.assertEqual(self.submit('not a key').jira_status, 'invalid')
+
+    @override_settings(DASHBOARD_JOB_EXECUTOR='dashboard.jobs.DatabaseExecutor')
+    def test_worker_retries_with_backoff(self):
+        logsheet = self.submit('PM-42')
+        self.assertEqual(logsheet.jira_status, 'unchecked')
+
+        with mock.patch.object(FakeTracker, 'outages', 1):
+            call_command('run_jobs', once=True, stdout=StringIO())
+        validation = Job.objects.get(name='validate_jira_key')
+        self.assertEqual((validation.status, validation.attempts), ('queued', 1))
+        self.assertIn('TrackerError', validation.last_error)
+        self.assertGreater(validation.run_at, timezone.now())
+
+        Job.objects.filter(pk=validation.pk).update(run_at=timezone.now())
+        call_command('run_jobs', once=True, stdout=StringIO())
+        validation.refresh_from_db()
+        self.assertEqual((validation.status, validation.attempts), ('done', 2))
+        logsheet.refresh_from_db()
+        self.assertEqual(logsheet.jira_status, 'valid')
+
+    def test_jobs_fail_after_the_last_attempt(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            queued = enqueue('no_such_job')
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, 'queued')
+        for _ in range(queued.max_attempts - 1):
+            Job.objects.filter(pk=queued.pk).update(run_at=timezone.now())
+            run_pending()
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), ('failed', queued.max_attempts))
+
+
+class BenchmarkSuiteTests(TestCase):
+    def setUp(self):
+        get_bucket_store().clear()
+
+    def test_every_endpoint_is_benchmarked(self):
+        stdout = StringIO()
+        call_command('benchmark_api', users=3, days=2, requests=2, stdout=stdout)
+        report = json.loads(stdout.getvalue())
+        results = report['results']['client']
+        url_names = {pattern.name for pattern in dashboard_urls.urlpatterns}
+        self.assertEqual(set(results) | set(report['skipped']), url_names)
+        for name, result in results.items():
+            self.assertTrue(all(int(code) < 300 for code in result['statuses']), (name, result['statuses']))
+        self.assertFalse(User.objects.filter(username__startswith='bench').exists())
+
+    def test_values_serialization_matches_the_serializers(self):
+        stdout = StringIO()
+        call_command('benchmark_serializers', rows=40, days=2, repeat=1, stdout=stdout)
+        results = json.loads(stdout.getvalue())['results']
+        self.assertEqual({name: result['identical'] for name, result in results.items()}, {'timelogs': True, 'logsheets': True})
+
+    def test_orjson_renderer_matches_json_renderer(self):
+        data = {
+            'at': timezone.now(),
+            'day': timezone.localdate(),
+            'hours': Decimal('7.50'),
+            'detail': gettext_lazy('Token has been revoked'),
+            'text': 'line\u2028break',
+            1: [None, 1.5, True],
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+
+class CachedUserAuthenticationTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.user = User.objects.create_user('employee', password='secret')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token()}')
+
+    def access_token(self):
+        return str(MyTokenObtainPairSerializer.get_token(self.user).access_token)
+
+    def test_user_is_served_from_the_cache(self):
+        self.assertEqual(self.client.get(reverse('user-profile')).status_code, 200)
+        with self.assertQueryBudget(0, 'Cached profile'):
+            response = self.client.get(reverse('user-profile'))
+        self.assertEqual(response.data['username'], 'employee')
+
+    def test_deactivation_applies_on_the_next_request(self):
+        self.client.get(reverse('user-profile'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertEqual(self.client.get(reverse('user-profile')).status_code, 401)
+
+    def test_revoked_tokens_are_rejected(self):
+        self.client.get(reverse('user-profile'))
+        revoke_tokens(self.user.pk)
+        self.assertEqual(self.client.get(reverse('user-profile')).status_code, 401)
+        self.user.refresh_from_db()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token()}')
+        self.assertEqual(self.client.get(reverse('user-profile')).status_code, 200)
+
+    def test_deploy_check_requires_a_shared_cache(self):
+        locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        with override_settings(CACHES=locmem):
+            self.assertEqual([error.id for error in check_auth_cache(None)], ['dashboard.E001'])
+        redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache'}}
+        with override_settings(CACHES=redis):
+            self.assertEqual(check_auth_cache(None), [])
+
+
+class ThrottleAndIdempotencyTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        get_cache().clear()
+        get_bucket_store().clear()
+        self.user = User.objects.create_user('employee', password='secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    @override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {
+        **settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], 'punch_user': '2/min',
+    }})
+    def test_punches_are_throttled_per_user(self):
+        self.assertEqual(self.client.post(reverse('check-in')).status_code, 201)
+        self.assertEqual(self.client.post(reverse('break-start')).status_code, 201)
+        response = self.client.post(reverse('break-end'))
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+        # Other users have their own bucket
+        other = APIClient()
+        other.force_authenticate(User.objects.create_user('other'))
+        self.assertEqual(other.post(reverse('check-in')).status_code, 201)
+
+    @override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {
+        **settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], 'token_user': '2/min',
+    }})
+    def test_login_attempts_are_throttled_per_username(self):
+        client = APIClient()
+        for _ in range(2):
+            self.assertEqual(client.post('/api/token/', {'username': 'Employee', 'password': 'wrong'}).status_code, 401)
+        response = client.post('/api/token/', {'username': 'employee', 'password': 'secret'})
+        self.assertEqual(response.status_code, 429)
+
+    def test_repeated_idempotency_key_replays_the_result(self):
+        headers = {'HTTP_IDEMPOTENCY_KEY': 'check-in-1'}
+        first = self.client.post(reverse('check-in'), **headers)
+        self.assertEqual(first.status_code, 201)
+        with self.assertQueryBudget(0, 'Replayed punch'):
+            replay = self.client.post(reverse('check-in'), **headers)
+        self.assertEqual((replay.status_code, replay.data), (201, first.data))
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertEqual(TimeLog.objects.filter(user=self.user).count(), 1)
+        # Without the key, the same punch is refused by the state machine
+        self.assertEqual(self.client.post(reverse('check-in')).status_code, 400)
+        self.assertEqual(self.client.post(reverse('break-start'), **headers).status_code, 422)
+
+    @override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {
+        **settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], 'punch_user': '2/min',
+    }})
+    def test_replays_do_not_use_up_throttle_tokens(self):
+        headers = {'HTTP_IDEMPOTENCY_KEY': 'check-in-1'}
+        self.assertEqual(self.client.post(reverse('check-in'), **headers).status_code, 201)
+        for _ in range(5):
+            self.assertEqual(self.client.post(reverse('check-in'), **headers).status_code, 201)
+        # One token is left for a new punch, then the bucket is empty
+        self.assertEqual(self.client.post(reverse('break-start')).status_code, 201)
+        self.assertEqual(self.client.post(reverse('break-end')).status_code, 429)
+        self.assertEqual(self.client.post(reverse('check-in'), **headers).status_code, 201)
+
+
+class WorkDayTests(TestCase):
+    def at(self, *args):
+        return datetime(*args, tzinfo=dt_timezone.utc)
+
+    def test_night_shift_is_one_work_day(self):
+        # 22:00 to 06:00 in New York (UTC-5), days starting at noon
+        user = User.objects.create_user('night', timezone='America/New_York', day_starts_at=time(12))
+        for punch_type, moment in [('check_in', self.at(2026, 3, 3, 3)), ('check_out', self.at(2026, 3, 3, 11))]:
+            with mock.patch('django.utils.timezone.now', return_value=moment):
+                record_punch(user, punch_type)
+        self.assertEqual(set(TimeLog.objects.filter(user=user).values_list('work_date', flat=True)), {date(2026, 3, 2)})
+        summary = DailyWorkSummary.objects.get(user=user)
+        self.assertEqual((summary.work_date, summary.hours_worked), (date(2026, 3, 2), 8.0))
+
+        ingest_punches('kiosk-1', [
+            {'user': user.pk, 'type': punch_type, 'timestamp': moment, 'idempotency_key': punch_type}
+            for punch_type, moment in [('check_in', self.at(2026, 3, 4, 3)), ('check_out', self.at(2026, 3, 4, 11))]
+        ])
+        self.assertEqual(DailyWorkSummary.objects.get(user=user, work_date=date(2026, 3, 3)).hours_worked, 8.0)
+
+    def test_day_bounds_follow_daylight_saving_time(self):
+        self.assertEqual(
+            day_bounds('America/New_York', time(0), date(2026, 3, 8)),
+            (self.at(2026, 3, 8, 5), self.at(2026, 3, 9, 4)),
+        )
+
+    def test_today_is_the_users_local_day(self):
+        user = User.objects.create_user('tokyo', timezone='Asia/Tokyo')
+        client = APIClient()
+        client.force_authenticate(user)
+        with mock.patch('django.utils.timezone.now', return_value=self.at(2026, 3, 2, 20)):
+            response = client.get(reverse('employee-bootstrap'))
+        self.assertEqual(response.data['date'], date(2026, 3, 3))
+
+
+class SeedDataTests(TestCase):
+    def seeded(self, prefix):
+        logs = TimeLog.objects.filter(user__username__startswith=prefix).order_by('user__username', 'timestamp')
+        logsheets = LogSheetApproval.objects.filter(user__username__startswith=prefix).order_by('user__username', 'date')
+        return (
+            list(logs.values_list('user__username', 'timestamp', 'work_date', 'type', 'device_id')),
+            list(logsheets.values_list('user__username', 'date', 'jira_key', 'hours_worked', 'status')),
+        )
+
+    def test_seed_is_deterministic_and_consistent(self):
+        options = {'users': 12, 'managers': 2, 'days': 15, 'seed': 7, 'until': '2026-03-13', 'stdout': StringIO()}
+        call_command('seed_data', prefix='a-', chunk_size=5, **options)
+        call_command('seed_data', prefix='b-', chunk_size=12, batch_size=7, **options)
+        logs, logsheets = self.seeded('a-')
+        self.assertEqual(
+            ([row[1:] for row in logs], [row[1:] for row in logsheets]),
+            tuple([row[1:] for row in rows] for rows in self.seeded('b-')),
+        )
+        self.assertGreater(len(logs), 12 * 15 * 3)
+        self.assertEqual({row[4] for row in logsheets}, {'pending', 'approved', 'rejected'})
+        summaries = DailyWorkSummary.objects.filter(user__username__startswith='a-')
+        self.assertEqual(summaries.count(), len({(row[0], row[2]) for row in logs}))
+        self.assertEqual(list(find_summary_mismatches(summaries, TimeLog.objects.filter(user__username__startswith='a-'))), [])
+
+        with self.assertRaises(CommandError):
+            call_command('seed_data', prefix='a-', **options)
+        call_command('seed_data', prefix='a-', replace=True, **{**options, 'users': 1})
+        self.assertEqual(User.objects.filter(username__startswith='a-employee').count(), 1)
+
+    def test_copy_text_format(self):
+        moment = datetime(2026, 3, 2, 14, 5, 30, 120, tzinfo=dt_timezone.utc)
+        row = (None, True, False, 42, 7.25, 'tab\tline\nback\\slash\r', date(2026, 3, 2), moment)
+        self.assertEqual(
+            '\t'.join(map(_copy_value, row)),
+            '\\N\tt\tf\t42\t7.25\ttab\\tline\\nback\\\\slash\\r\t2026-03-02\t2026-03-02T14:05:30.000120+00:00',
+        )
+        with self.assertRaises(KeyError):
+            _copy_value(Decimal('1.5'))
+
+    @skipUnless(connection.vendor == 'postgresql', 'COPY needs Postgres')
+    def test_copy_rows_round_trips(self):
+        user = User.objects.create_user('employee')
+        moment = timezone.now()
+        rows = [
+            (user.pk, moment, date(2026, 3, 2), 'check_in', 'kiosk\t1', 'key\\1'),
+            (user.pk, moment + timedelta(hours=8), date(2026, 3, 2), 'check_out', '', None),
+        ]
+        copy_rows(TimeLog, TIMELOG_COLUMNS, rows)
+        self.assertEqual(list(TimeLog.objects.order_by('timestamp').values_list(*TIMELOG_COLUMNS)), rows)
+
+
+class ReplicaRouterTests(TransactionTestCase):
+    # Outside of TestCase's transaction, which would keep every read on the primary
+
+    def test_only_reporting_reads_go_to_the_replica(self):
+        router = ReplicaRouter()
+        with override_settings(DATABASES={**settings.DATABASES, 'replica': settings.DATABASES['default']}):
+            self.assertIsNone(router.db_for_read(LogSheetApproval))
+            with reporting_reads():
+                self.assertEqual(router.db_for_read(LogSheetApproval), 'replica')
+                with transaction.atomic():
+                    self.assertIsNone(router.db_for_read(LogSheetApproval))
+        with reporting_reads():
+            self.assertIsNone(router.db_for_read(LogSheetApproval))
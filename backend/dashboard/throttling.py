@@ -0,0 +1,183 @@
+"""
+Token-bucket throttling of the punch and token endpoints.
+
+A rate of ``n/period`` in REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] is a
+bucket of n tokens, refilled at n per period: a client may burst n requests,
+then one more every period/n. A bucket is two floats (tokens left, last
+update), so the memory per client is fixed whatever its request rate, unlike
+DRF's throttles which keep a timestamp per request.
+
+DASHBOARD_THROTTLE_STORE names where buckets live: InProcessBucketStore
+(this process only, at most DASHBOARD_THROTTLE_MAX_KEYS buckets) or
+CacheBucketStore (the Django cache DASHBOARD_THROTTLE_CACHE, shared by every
+worker when it is Redis or Memcached).
+"""
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+def _take(bucket, capacity, rate, now):
+    """Takes a token from ``bucket`` (tokens, updated) if there is one; returns (allowed, wait, new bucket)."""
+    tokens, updated = bucket if bucket is not None else (capacity, now)
+    tokens = min(capacity, tokens + max(0.0, now - updated) * rate)
+    if tokens >= 1:
+        return True, 0.0, (tokens - 1, now)
+    return False, (1 - tokens) / rate, (tokens, now)
+
+
+class InProcessBucketStore:
+    """
+    Buckets of this process, least recently used first out beyond
+    ``max_keys`` (an evicted client starts over with a full bucket). With
+    several worker processes, every process applies the limit on its own.
+    """
+
+    def __init__(self):
+        self.max_keys = settings.DASHBOARD_THROTTLE_MAX_KEYS
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()
+
+    def take(self, key, capacity, rate):
+        with self._lock:
+            allowed, wait, self._buckets[key] = _take(self._buckets.pop(key, None), capacity, rate, time.monotonic())
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, wait
+
+    async def atake(self, key, capacity, rate):
+        # In memory, so never waits on I/O
+        return self.take(key, capacity, rate)
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBucketStore:
+    """
+    Buckets in a Django cache. The read and write of a bucket are not atomic,
+    so concurrent requests of one client may get slightly more than the rate.
+    """
+
+    def take(self, key, capacity, rate):
+        cache = caches[settings.DASHBOARD_THROTTLE_CACHE]
+        key = f'dashboard:throttle:{key}'
+        allowed, wait, bucket = _take(cache.get(key), capacity, rate, time.time())
+        # An untouched bucket is full again after capacity / rate seconds
+        cache.set(key, bucket, math.ceil(capacity / rate) + 1)
+        return allowed, wait
+
+    async def atake(self, key, capacity, rate):
+        cache = caches[settings.DASHBOARD_THROTTLE_CACHE]
+        key = f'dashboard:throttle:{key}'
+        allowed, wait, bucket = _take(await cache.aget(key), capacity, rate, time.time())
+        await cache.aset(key, bucket, math.ceil(capacity / rate) + 1)
+        return allowed, wait
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_bucket_store():
+    path = settings.DASHBOARD_THROTTLE_STORE
+    store = _stores.get(path)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(path) or _stores.setdefault(path, import_string(path)())
+    return store
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    def get_rate(self):
+        # Read at every request rather than at import, like the other settings
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def allow_request(self, request, view):
+        bucket = self.get_bucket(request)
+        if bucket is None:
+            return True
+        allowed, self.wait_seconds = get_bucket_store().take(*bucket)
+        return allowed
+
+    async def aallow_request(self, request):
+        bucket = self.get_bucket(request)
+        if bucket is None:
+            return True
+        allowed, self.wait_seconds = await get_bucket_store().atake(*bucket)
+        return allowed
+
+    def get_bucket(self, request):
+        """(key, capacity, refill rate) of the request's bucket, or None if it is not throttled."""
+        if self.rate is None:
+            return None
+        ident = self.get_ident_key(request)
+        if ident is None:
+            return None
+        return f'{self.scope}:{ident}', self.num_requests, self.num_requests / self.duration
+
+    def get_ident_key(self, request):
+        raise NotImplementedError
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class UserThrottle(TokenBucketThrottle):
+    def get_ident_key(self, request):
+        user = getattr(request, 'user', None)
+        return user.pk if user is not None and user.is_authenticated else None
+
+
+class IPThrottle(TokenBucketThrottle):
+    def get_ident_key(self, request):
+        return self.get_ident(request)
+
+
+class PunchUserThrottle(UserThrottle):
+    scope = 'punch_user'
+
+
+class PunchIPThrottle(IPThrottle):
+    scope = 'punch_ip'
+
+
+class TokenUsernameThrottle(TokenBucketThrottle):
+    """Login attempts per username, whatever the address they come from."""
+    scope = 'token_user'
+
+    def get_ident_key(self, request):
+        username = request.data.get('username') if hasattr(request.data, 'get') else None
+        if not isinstance(username, str) or not username:
+            return None
+        # Usernames may hold characters cache keys cannot
+        return hashlib.md5(username.lower().encode(), usedforsecurity=False).hexdigest()
+
+
+class TokenIPThrottle(IPThrottle):
+    scope = 'token_ip'
+
+
+PUNCH_THROTTLES = [PunchUserThrottle, PunchIPThrottle]
+TOKEN_THROTTLES = [TokenUsernameThrottle, TokenIPThrottle]
+
+
+async def athrottle_wait(throttle_classes, request):
+    """
+    Checks the throttles for the async punch views, which run outside DRF;
+    returns the seconds to wait if one refuses the request, else None.
+    """
+    waits = []
+    for throttle in (throttle_class() for throttle_class in throttle_classes):
+        if not await throttle.aallow_request(request):
+            waits.append(throttle.wait())
+    return max(waits) if waits else None
@@ -0,0 +1,69 @@
+"""
+Issue tracker clients, used to check the JIRA keys of submitted logsheets.
+
+DASHBOARD_ISSUE_TRACKER names the class: JiraTracker asks the JIRA REST API at
+JIRA_URL, FakeTracker answers locally (tests, development without JIRA).
+issue_exists() raises TrackerError when the tracker gives no answer, which
+makes the job retry.
+"""
+import base64
+import re
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+KEY_PATTERN = re.compile(r'^[A-Z][A-Z0-9_]*-[1-9][0-9]*$')
+
+
+class TrackerError(Exception):
+    pass
+
+
+class JiraTracker:
+    def __init__(self):
+        self.base_url = settings.JIRA_URL.rstrip('/')
+        credentials = f'{settings.JIRA_USER}:{settings.JIRA_API_TOKEN}'.encode()
+        self.headers = {
+            'Accept': 'application/json',
+            'Authorization': 'Basic ' + base64.b64encode(credentials).decode(),
+        }
+
+    def issue_exists(self, key):
+        if not KEY_PATTERN.match(key):
+            return False
+        request = urllib.request.Request(
+            f'{self.base_url}/rest/api/2/issue/{urllib.parse.quote(key)}?fields=summary', headers=self.headers,
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=settings.JIRA_TIMEOUT):
+                return True
+        except urllib.error.HTTPError as exc:
+            if exc.code == 404:
+                return False
+            raise TrackerError(f'JIRA answered {exc.code} for {key}') from exc
+        except (urllib.error.URLError, TimeoutError) as exc:
+            raise TrackerError(f'JIRA is unreachable: {exc}') from exc
+
+
+class FakeTracker:
+    """
+    Knows every well-formed key (``PROJECT-123``), or only those in ``issues``
+    when it is set. The next ``outages`` calls fail as if JIRA were down.
+    """
+    issues = None
+    outages = 0
+
+    def issue_exists(self, key):
+        if FakeTracker.outages:
+            FakeTracker.outages -= 1
+            raise TrackerError('The fake tracker is down')
+        if self.issues is not None:
+            return key in self.issues
+        return bool(KEY_PATTERN.match(key))
+
+
+def get_tracker():
+    return import_string(settings.DASHBOARD_ISSUE_TRACKER)()
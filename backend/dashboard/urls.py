@@ -1,12 +1,22 @@
+from django.conf import settings
 from django.urls import path
 from .views import (
-    CheckInView, BreakStartView, BreakEndView, CheckOutView,
+    CheckInView, BreakStartView, BreakEndView, CheckOutView, IngestPunchesView,
     TimeLogView, SubmitLogsheetView, ManagerLogsheetsView,
     ApproveRejectLogsheetView,
+    BulkApproveRejectLogsheetsView,
+    ExportLogsheetsView,
+    ReportsView,
+    DatabasePoolStatsView,
     UserProfileView,
     UserTimeLogsView,
-    LogsheetStatusView
+    BatchTimeLogsView,
+    LogsheetStatusView,
+    EmployeeBootstrapView,
+    EventStreamTicketView,
+    ManagerBootstrapView,
 )
+from . import async_views
 
 urlpatterns = [
     # Employee Endpoints
@@ -18,9 +28,44 @@ urlpatterns = [
     path('time-logs/', TimeLogView.as_view(), name='time-logs'),
     path('submit-logsheet/', SubmitLogsheetView.as_view(), name='submit-logsheet'),
     path('logsheet-status/', LogsheetStatusView.as_view(), name='logsheet-status'),
+    path('events/', async_views.event_stream, name='event-stream'),
+    path('events/ticket/', EventStreamTicketView.as_view(), name='event-stream-ticket'),
+    path('bootstrap/employee/', EmployeeBootstrapView.as_view(), name='employee-bootstrap'),
+
+    # Device Endpoints
+    path('ingest/punches/', IngestPunchesView.as_view(), name='ingest-punches'),
 
     # Manager Endpoints
     path('manager/logsheets/', ManagerLogsheetsView.as_view(), name='manager-logsheets'),
     path('manager/logsheets/<int:pk>/', ApproveRejectLogsheetView.as_view(), name='approve-reject-logsheet'),
+    path('manager/logsheets/bulk/', BulkApproveRejectLogsheetsView.as_view(), name='bulk-approve-reject-logsheets'),
+    path('manager/logsheets/export/', ExportLogsheetsView.as_view(), name='export-logsheets'),
+    path('manager/reports/', ReportsView.as_view(), name='manager-reports'),
+    path('bootstrap/manager/', ManagerBootstrapView.as_view(), name='manager-bootstrap'),
+    path('manager/db-pool/', DatabasePoolStatsView.as_view(), name='db-pool-stats'),
+    path('time-logs/batch/', BatchTimeLogsView.as_view(), name='batch-time-logs'),
     path('time-logs/<int:user_id>/<str:date_str>/', UserTimeLogsView.as_view(), name='user-time-logs'),
-]
\ No newline at end of file
+]
+
+# The hot employee endpoints, served by async views (under core.asgi) when
+# DASHBOARD_ASYNC_VIEWS is on
+ASYNC_ROUTES = {
+    'check-in': async_views.check_in,
+    'break-start': async_views.break_start,
+    'break-end': async_views.break_end,
+    'check-out': async_views.check_out,
+    'time-logs': async_views.time_logs,
+    'logsheet-status': async_views.logsheet_status,
+}
+
+
+def with_async_views(patterns):
+    return [
+        path(str(pattern.pattern), ASYNC_ROUTES[pattern.name], name=pattern.name)
+        if pattern.name in ASYNC_ROUTES else pattern
+        for pattern in patterns
+    ]
+
+
+if settings.DASHBOARD_ASYNC_VIEWS:
+    urlpatterns = with_async_views(urlpatterns)
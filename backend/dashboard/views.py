@@ -1,103 +1,185 @@
+from django.conf import settings
 from django.shortcuts import render
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from .models import TimeLog, LogSheetApproval
-from .serializers import TimeLogSerializer, LogSheetApprovalSerializer
-from datetime import date
+from .models import TimeLog, LogSheetApproval, DailyWorkSummary
+from .serializers import LogSheetApprovalSerializer, IngestedPunchSerializer
+from .rows import LOGSHEET_FIELDS, TIMELOG_FIELDS, serialize_logsheets, serialize_timelogs
+from .exports import EXPORT_FORMATS, aiterate, stream_export
+from .reports import PERIODS as REPORT_PERIODS, build_report
+from .bootstrap import build_employee_bootstrap, build_manager_bootstrap
+from .events import MANAGERS_CHANNEL, publish_event, user_channel
+from .pagination import DateKeysetPagination
+from .db import pool_stats, reporting_reads
+from .snapshots import (
+    get_today_snapshot, invalidate_logsheet_queue, invalidate_snapshot, logsheet_queue_version, snapshot_version,
+)
+from .conditional import digest, is_fresh, make_etag, not_modified, with_etag
+from .jobs import enqueue_many
+from .idempotency import HEADER as IDEMPOTENCY_HEADER, IdempotencyError, find_replay, run_idempotent
+from .throttling import PUNCH_THROTTLES
+from .authentication import issue_stream_ticket
+from .tasks import logsheet_jobs
+from .workdays import user_work_date
+from .services import (
+    record_punch, arecord_punch, PunchError, ingest_punches, get_daily_summary, get_day_logs, summarize_logs,
+    process_logsheets, CHECKED_OUT, LOGSHEET_ACTIONS,
+)
+from datetime import date, timedelta
 from datetime import datetime 
-from django.utils import timezone
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
 
 # Create your views here.
 from .serializers import UserSerializer
 class UserProfileView(APIView):
     permission_classes = [IsAuthenticated]
     def get(self, request):
-        serializer = UserSerializer(request.user)
-        return Response(serializer.data)
+        user = request.user
+        etag = make_etag('profile', user.pk, digest(f'{user.username}|{user.is_manager}'))
+        if is_fresh(request, etag):
+            return not_modified(etag)
+        serializer = UserSerializer(user)
+        return with_etag(Response(serializer.data), etag)
     
-class CheckInView(APIView):
+class PunchView(APIView):
+    """
+    Base view for the punch endpoints. Subclasses set the punch type and the
+    success message; validation is done by the punch state machine.
+    """
     permission_classes = [IsAuthenticated]
+    throttle_classes = PUNCH_THROTTLES
+    punch_type = None
+    success_message = None
+
+    @classmethod
+    def punch(cls, user):
+        """Records the punch; returns (status code, data)."""
+        try:
+            record_punch(user, cls.punch_type)
+        except PunchError as exc:
+            return status.HTTP_400_BAD_REQUEST, {'detail': str(exc)}
+        return status.HTTP_201_CREATED, {'detail': cls.success_message}
+
+    @classmethod
+    async def apunch(cls, user):
+        """punch() for the async views."""
+        try:
+            await arecord_punch(user, cls.punch_type)
+        except PunchError as exc:
+            return status.HTTP_400_BAD_REQUEST, {'detail': str(exc)}
+        return status.HTTP_201_CREATED, {'detail': cls.success_message}
+
+    def check_throttles(self, request):
+        # Replays are answered from the cache and cost no throttle tokens
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if key and find_replay(request.user.pk, key, request.path) is not None:
+            return
+        super().check_throttles(request)
 
     def post(self, request):
-        user = request.user
-        today = timezone.localdate()
-        if TimeLog.objects.filter(user=user, type='check_in', timestamp__date=today).exists():
-            return Response({'detail': 'You have already checked in today.'}, status=status.HTTP_400_BAD_REQUEST)
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            status_code, data = self.punch(request.user)
+            return Response(data, status=status_code)
+        try:
+            status_code, data, replayed = run_idempotent(
+                request.user.pk, key, request.path, lambda: self.punch(request.user),
+            )
+        except IdempotencyError as exc:
+            return Response({'detail': exc.detail}, status=exc.status_code)
+        response = Response(data, status=status_code)
+        if replayed:
+            response['Idempotent-Replayed'] = 'true'
+        return response
 
-        TimeLog.objects.create(user=user, type='check_in')
-        return Response({'detail': 'Checked in successfully.'}, status=status.HTTP_201_CREATED)
 
+class CheckInView(PunchView):
+    punch_type = 'check_in'
+    success_message = 'Checked in successfully.'
 
 
-class BreakStartView(APIView):
-    permission_classes = [IsAuthenticated]
+class BreakStartView(PunchView):
+    punch_type = 'break_start'
+    success_message = 'Break started.'
 
-    def post(self, request):
-        user = request.user
-        today = timezone.localdate()
-        
-        is_checked_in = TimeLog.objects.filter(user=user, type='check_in', timestamp__date=today).exists()
-        has_active_break = TimeLog.objects.filter(user=user, type='break_start', timestamp__date=today).exists() and \
-                          not TimeLog.objects.filter(user=user, type='break_end', timestamp__date=today).exists()
-        has_checked_out = TimeLog.objects.filter(user=user, type='check_out', timestamp__date=today).exists()
-        
-        if not is_checked_in or has_checked_out or has_active_break:
-            return Response({'detail': 'You cannot start a break at this time.'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        TimeLog.objects.create(user=user, type='break_start')
-        return Response({'detail': 'Break started.'}, status=status.HTTP_201_CREATED)
 
-class BreakEndView(APIView):
-    permission_classes = [IsAuthenticated]
+class BreakEndView(PunchView):
+    punch_type = 'break_end'
+    success_message = 'Break ended.'
 
-    def post(self, request):
-        user = request.user
-        
-        # Get the most recent TimeLog entry for the user on the current day
-        try:
-            last_log = TimeLog.objects.filter(user=user, timestamp__date=timezone.localdate()).latest('timestamp')
-        except TimeLog.DoesNotExist:
-            return Response({'detail': 'You are not currently on a break.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Check if the last log entry was a 'break_start'
-        if last_log.type != 'break_start':
-            return Response({'detail': 'You are not currently on a break.'}, status=status.HTTP_400_BAD_REQUEST)
+class CheckOutView(PunchView):
+    punch_type = 'check_out'
+    success_message = 'Checked out successfully.'
 
-        # Create the new 'break_end' TimeLog entry
-        TimeLog.objects.create(user=user, type='break_end')
-        return Response({'detail': 'Break ended.'}, status=status.HTTP_201_CREATED)
 
-class CheckOutView(APIView):
+class IngestPunchesView(APIView):
+    """
+    Batch ingestion of punches recorded offline by kiosks and badge readers.
+    Expects ``device_id`` and a list of ``punches`` (user, type, timestamp,
+    idempotency_key); invalid punches are reported per item.
+    """
     permission_classes = [IsAuthenticated]
+    max_punches = 5000
 
     def post(self, request):
-        user = request.user
-        today = timezone.localdate()
-        
-        is_checked_in = TimeLog.objects.filter(user=user, type='check_in', timestamp__date=today).exists()
-        has_checked_out = TimeLog.objects.filter(user=user, type='check_out', timestamp__date=today).exists()
-        has_active_break = TimeLog.objects.filter(user=user, type='break_start', timestamp__date=today).exists() and \
-                          not TimeLog.objects.filter(user=user, type='break_end', timestamp__date=today).exists()
-        
-        if not is_checked_in or has_checked_out or has_active_break:
-            return Response({'detail': 'You cannot check out at this time.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not request.user.has_perm('dashboard.ingest_punches'):
+            return Response({'detail': 'You do not have permission to perform this action.'}, status=status.HTTP_403_FORBIDDEN)
 
-        TimeLog.objects.create(user=user, type='check_out')
-        return Response({'detail': 'Checked out successfully.'}, status=status.HTTP_201_CREATED)
+        device_id = request.data.get('device_id')
+        punches = request.data.get('punches')
+        if not isinstance(device_id, str) or not 0 < len(device_id) <= 64:
+            return Response({'detail': 'device_id is required (at most 64 characters).'}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(punches, list) or not punches:
+            return Response({'detail': 'punches must be a non-empty list.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(punches) > self.max_punches:
+            return Response({'detail': f'At most {self.max_punches} punches can be ingested at once.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        valid = []
+        indexes = []
+        rejected = []
+        for index, punch in enumerate(punches):
+            serializer = IngestedPunchSerializer(data=punch)
+            if serializer.is_valid():
+                valid.append(serializer.validated_data)
+                indexes.append(index)
+            else:
+                rejected.append((index, 'invalid'))
+
+        accepted, duplicates, invalid = ingest_punches(device_id, valid)
+        rejected += [(indexes[position], reason) for position, reason in invalid]
+        rejected.sort()
+        return Response({
+            'accepted': accepted,
+            'duplicates': [indexes[position] for position in duplicates],
+            'rejected': [{'index': index, 'reason': reason} for index, reason in rejected],
+        }, status=status.HTTP_200_OK)
+
+
+class EventStreamTicketView(APIView):
+    """Short-lived ticket that opens the event stream, so the access token never goes in its URL."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        return Response({
+            'ticket': issue_stream_ticket(request.user),
+            'expires_in': settings.DASHBOARD_EVENT_TICKET_TTL,
+        })
 
 
 class TimeLogView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        today = timezone.localdate() # Get today's date in the local timezone
-        logs = TimeLog.objects.filter(user=request.user, timestamp__date=today).order_by('timestamp')
-        print(f"Logs fetched for user {request.user.username} on {today}: {logs}")
-        print(logs)
-        serializer = TimeLogSerializer(logs, many=True)
-        return Response(serializer.data)
+        today = user_work_date(request.user)
+        etag = make_etag('time-logs', request.user.pk, snapshot_version(request.user.pk, today))
+        if is_fresh(request, etag):
+            return not_modified(etag)
+        snapshot = get_today_snapshot(request.user.pk, today)
+        return with_etag(Response(snapshot['logs']), etag)
 
 
 
@@ -107,39 +189,20 @@ class SubmitLogsheetView(APIView):
 
     def post(self, request):
         user = request.user
-        today = timezone.localdate()
+        today = user_work_date(user)
         jira_key = request.data.get('jira_key')
         
         if not jira_key:
             return Response({'detail': 'JIRA key is required.'}, status=status.HTTP_400_BAD_REQUEST)
             
         # Check for completed day
-        check_in_log = TimeLog.objects.filter(user=user, type='check_in', timestamp__date=today).first()
-        check_out_log = TimeLog.objects.filter(user=user, type='check_out', timestamp__date=today).first()
-
-        if not check_in_log or not check_out_log:
+        summary = get_daily_summary(user.pk, today)
+        if summary.state != CHECKED_OUT:
             return Response({'detail': 'You must have both a check-in and a check-out to submit a logsheet.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Calculate total hours worked
-        all_logs = TimeLog.objects.filter(user=user, timestamp__date=today).order_by('timestamp')
-        total_work_seconds = 0
-        last_time = None
-
-        for log in all_logs:
-            if log.type == 'check_in':
-                last_time = log.timestamp
-            elif log.type == 'break_start':
-                if last_time:
-                    total_work_seconds += (log.timestamp - last_time).total_seconds()
-                last_time = log.timestamp
-            elif log.type == 'break_end' or log.type == 'check_out':
-                if last_time:
-                    total_work_seconds += (log.timestamp - last_time).total_seconds()
-                last_time = log.timestamp
-
-        hours_worked = total_work_seconds / 3600
+        hours_worked = summary.hours_worked
         
-        logsheet, created = LogSheetApproval.objects.get_or_create(
+        logsheet, created = LogSheetApproval.objects.select_related('user', 'manager').get_or_create(
             user=user,
             date=today,
             defaults={
@@ -149,13 +212,25 @@ class SubmitLogsheetView(APIView):
             }
         )
         
+        previous_status = None if created else logsheet.status
         if not created:
             logsheet.jira_key = jira_key
             logsheet.hours_worked = hours_worked
             logsheet.status = 'pending'
+            logsheet.jira_status = 'unchecked'
             logsheet.save()
         
+        # Key validation, manager notification and the recomputed hours
+        # follow in background jobs
+        enqueue_many(logsheet_jobs(logsheet))
+        invalidate_snapshot(user.pk, today)
+        invalidate_logsheet_queue()
         serializer = LogSheetApprovalSerializer(logsheet)
+        # previous_status lets the manager dashboard keep its pending count
+        publish_event(
+            [MANAGERS_CHANNEL, user_channel(user.pk)], 'logsheet_submitted',
+            {**serializer.data, 'previous_status': previous_status},
+        )
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 class LogsheetStatusView(APIView):
@@ -165,17 +240,32 @@ class LogsheetStatusView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, *args, **kwargs):
+        # Served from the cached snapshot of the user's day
+        today = user_work_date(request.user)
+        etag = make_etag('logsheet-status', request.user.pk, snapshot_version(request.user.pk, today))
+        if is_fresh(request, etag):
+            return not_modified(etag)
+        has_submitted = get_today_snapshot(request.user.pk, today)['has_submitted']
+        return with_etag(Response({'has_submitted': has_submitted}), etag)
+
+
+class EmployeeBootstrapView(APIView):
+    """
+    Profile, today's logs, punch state, hours and logsheet status in one
+    response, for the employee dashboard to load with a single request.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
         user = request.user
-        # Correct way to get today's date in the current timezone
-        today = timezone.localdate() 
-        
-        # Check if a logsheet exists for the user today
-        has_submitted = LogSheetApproval.objects.filter(
-            user=user,
-            date=today
-        ).exists()
-        print(has_submitted)
-        return Response({'has_submitted': has_submitted})
+        today = user_work_date(user)
+        etag = make_etag(
+            'employee-bootstrap', user.pk, snapshot_version(user.pk, today),
+            digest(f'{user.username}|{user.is_manager}'),
+        )
+        if is_fresh(request, etag):
+            return not_modified(etag)
+        return with_etag(Response(build_employee_bootstrap(user, today)), etag)
 
 
 
@@ -188,9 +278,59 @@ class ManagerLogsheetsView(APIView):
         if not request.user.is_manager:
             return Response({'detail': 'You do not have permission to view this.'}, status=status.HTTP_403_FORBIDDEN)
         
-        logsheets = LogSheetApproval.objects.filter(status='pending').order_by('-date')
-        serializer = LogSheetApprovalSerializer(logsheets, many=True)
-        return Response(serializer.data)
+        # The queue counter changes with every submission or decision
+        etag = make_etag('logsheets', logsheet_queue_version(), digest(request.META.get('QUERY_STRING', '')))
+        if is_fresh(request, etag):
+            return not_modified(etag)
+
+        params = request.query_params
+        logsheet_status = params.get('status', 'pending')
+        if logsheet_status not in dict(LogSheetApproval.STATUS_CHOICES):
+            return Response({'detail': 'Invalid status.'}, status=status.HTTP_400_BAD_REQUEST)
+        logsheets = LogSheetApproval.objects.filter(status=logsheet_status)
+
+        if params.get('user'):
+            if not params['user'].isdigit():
+                return Response({'detail': 'Invalid user id.'}, status=status.HTTP_400_BAD_REQUEST)
+            logsheets = logsheets.filter(user_id=params['user'])
+        if params.get('jira_key'):
+            logsheets = logsheets.filter(jira_key=params['jira_key'])
+        try:
+            if params.get('date_from'):
+                logsheets = logsheets.filter(date__gte=datetime.strptime(params['date_from'], '%Y-%m-%d').date())
+            if params.get('date_to'):
+                logsheets = logsheets.filter(date__lte=datetime.strptime(params['date_to'], '%Y-%m-%d').date())
+        except ValueError:
+            return Response({'detail': 'Invalid date format. Use YYYY-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        paginator = DateKeysetPagination()
+        page = paginator.paginate_queryset(logsheets.values(*LOGSHEET_FIELDS), request, view=self)
+        return with_etag(paginator.get_paginated_response(serialize_logsheets(page)), etag)
+
+
+class ManagerBootstrapView(APIView):
+    """
+    Profile and the first page of pending logsheets, with their count unless
+    ``count=false``; further pages come from manager-logsheets with
+    next_cursor.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        user = request.user
+        if not user.is_manager:
+            return Response({'detail': 'You do not have permission to view this.'}, status=status.HTTP_403_FORBIDDEN)
+
+        pagination = DateKeysetPagination()
+        page_size = pagination.get_page_size(request)
+        include_count = pagination.get_include_count(request)
+        etag = make_etag(
+            'manager-bootstrap', logsheet_queue_version(), page_size, int(include_count),
+            digest(f'{user.pk}|{user.username}|{user.is_manager}'),
+        )
+        if is_fresh(request, etag):
+            return not_modified(etag)
+        return with_etag(Response(build_manager_bootstrap(user, page_size, include_count)), etag)
 
 
 
@@ -202,32 +342,120 @@ class ApproveRejectLogsheetView(APIView):
         if not request.user.is_manager:
             return Response({'detail': 'You do not have permission to perform this action.'}, status=status.HTTP_403_FORBIDDEN)
         
-        try:
-            logsheet = LogSheetApproval.objects.get(pk=pk, status='pending')
-        except LogSheetApproval.DoesNotExist:
+        action = request.data.get('action')
+        work_day_credit = request.data.get('work_day_credit')
+
+        if action not in LOGSHEET_ACTIONS:
+            return Response({'detail': 'Invalid action.'}, status=status.HTTP_400_BAD_REQUEST)
+        if action == 'approve' and work_day_credit not in [1.0, 0.5]:
+            return Response({'detail': 'Work day credit must be 1.0 or 0.5'}, status=status.HTTP_400_BAD_REQUEST)
+
+        [(_, result)] = process_logsheets(request.user, [pk], action, work_day_credit)
+        if result != LOGSHEET_ACTIONS[action]:
             return Response({'detail': 'Logsheet not found or already processed.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'detail': f'Logsheet {result}.'}, status=status.HTTP_200_OK)
+
+
+class BulkApproveRejectLogsheetsView(APIView):
+    """
+    Approves or rejects many pending logsheets in one request. Expects
+    ``ids``, ``action`` and, for approvals, ``work_day_credit``.
+    """
+    permission_classes = [IsAuthenticated]
+    max_ids = 500
 
+    def post(self, request):
+        if not request.user.is_manager:
+            return Response({'detail': 'You do not have permission to perform this action.'}, status=status.HTTP_403_FORBIDDEN)
+
+        ids = request.data.get('ids')
         action = request.data.get('action')
         work_day_credit = request.data.get('work_day_credit')
 
-        if action == 'approve':
-            if work_day_credit not in [1.0, 0.5]:
-                return Response({'detail': 'Work day credit must be 1.0 or 0.5'}, status=status.HTTP_400_BAD_REQUEST)
-            
-            logsheet.status = 'approved'
-            logsheet.work_day_credit = work_day_credit
-            logsheet.manager = request.user
-            logsheet.save()
-            return Response({'detail': 'Logsheet approved.'}, status=status.HTTP_200_OK)
-        
-        elif action == 'reject':
-            logsheet.status = 'rejected'
-            logsheet.work_day_credit = 0.0
-            logsheet.manager = request.user
-            logsheet.save()
-            return Response({'detail': 'Logsheet rejected.'}, status=status.HTTP_200_OK)
+        if not isinstance(ids, list) or not ids or not all(isinstance(pk, int) for pk in ids):
+            return Response({'detail': 'ids must be a non-empty list of logsheet ids.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > self.max_ids:
+            return Response({'detail': f'At most {self.max_ids} logsheets can be processed at once.'}, status=status.HTTP_400_BAD_REQUEST)
+        if action not in LOGSHEET_ACTIONS:
+            return Response({'detail': 'Invalid action.'}, status=status.HTTP_400_BAD_REQUEST)
+        if action == 'approve' and work_day_credit not in [1.0, 0.5]:
+            return Response({'detail': 'Work day credit must be 1.0 or 0.5'}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = process_logsheets(request.user, list(dict.fromkeys(ids)), action, work_day_credit)
+        processed = sum(1 for _, result in results if result == LOGSHEET_ACTIONS[action])
+        return Response({
+            'processed': processed,
+            'results': [{'id': pk, 'result': result} for pk, result in results],
+        }, status=status.HTTP_200_OK)
+
+class ExportLogsheetsView(APIView):
+    """
+    Streams approved logsheets between ``date_from`` and ``date_to`` as CSV
+    (default) or NDJSON (``output=ndjson``) for payroll.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if not (request.user.is_manager or request.user.is_staff):
+            return Response({'detail': 'You do not have permission to view this.'}, status=status.HTTP_403_FORBIDDEN)
+
+        export_format = request.query_params.get('output', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return Response({'detail': 'output must be csv or ndjson.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            date_from = datetime.strptime(request.query_params['date_from'], '%Y-%m-%d').date()
+            date_to = datetime.strptime(request.query_params['date_to'], '%Y-%m-%d').date()
+        except KeyError:
+            return Response({'detail': 'date_from and date_to are required.'}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError:
+            return Response({'detail': 'Invalid date format. Use YYYY-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        with reporting_reads():
+            blocks = stream_export(export_format, date_from, date_to)
+        if isinstance(request._request, ASGIRequest):
+            blocks = aiterate(blocks)
+        response = StreamingHttpResponse(blocks, content_type=EXPORT_FORMATS[export_format])
+        response['Content-Disposition'] = f'attachment; filename="payroll_{date_from}_{date_to}.{export_format}"'
+        return response
 
-        return Response({'detail': 'Invalid action.'}, status=status.HTTP_400_BAD_REQUEST)
+class ReportsView(APIView):
+    """
+    Weekly or monthly totals per employee (``period=week|month``) between
+    ``date_from`` and ``date_to``, optionally for a single ``user``.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if not request.user.is_manager:
+            return Response({'detail': 'You do not have permission to view this.'}, status=status.HTTP_403_FORBIDDEN)
+
+        period = request.query_params.get('period', 'week')
+        if period not in REPORT_PERIODS:
+            return Response({'detail': 'period must be week or month.'}, status=status.HTTP_400_BAD_REQUEST)
+        user_id = request.query_params.get('user')
+        if user_id is not None and not user_id.isdigit():
+            return Response({'detail': 'Invalid user id.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            date_from = datetime.strptime(request.query_params['date_from'], '%Y-%m-%d').date()
+            date_to = datetime.strptime(request.query_params['date_to'], '%Y-%m-%d').date()
+        except KeyError:
+            return Response({'detail': 'date_from and date_to are required.'}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError:
+            return Response({'detail': 'Invalid date format. Use YYYY-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        with reporting_reads():
+            report = build_report(period, date_from, date_to, user_id)
+        return Response(report)
+
+
+class DatabasePoolStatsView(APIView):
+    """Connection settings and pool saturation of the process serving the request."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if not (request.user.is_manager or request.user.is_staff):
+            return Response({'detail': 'You do not have permission to view this.'}, status=status.HTTP_403_FORBIDDEN)
+        return Response(pool_stats())
 
 # view for detail time logs of a user for a specific date 
 # for manager to view
@@ -244,33 +472,79 @@ class UserTimeLogsView(APIView):
         except ValueError:
             return Response({'detail': 'Invalid date format. Use YYYY-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
         
-        logs = TimeLog.objects.filter(
+        logs = list(TimeLog.objects.filter(
             user__id=user_id,
-            timestamp__date=log_date
-        ).order_by('timestamp')
+            work_date=log_date
+        ).order_by('timestamp').values(*TIMELOG_FIELDS))
         
-        # Calculate total hours worked
-        total_work_seconds = 0
-        last_time = None
-        for log in logs:
-            if log.type == 'check_in':
-                last_time = log.timestamp
-            elif log.type == 'break_start':
-                if last_time:
-                    total_work_seconds += (log.timestamp - last_time).total_seconds()
-                last_time = log.timestamp
-            elif log.type == 'break_end' or log.type == 'check_out':
-                if last_time:
-                    total_work_seconds += (log.timestamp - last_time).total_seconds()
-                last_time = log.timestamp
+        # Totals are maintained on the day summary; days without one are
+        # summarized from the logs fetched above
+        summary = DailyWorkSummary.objects.filter(user_id=user_id, work_date=log_date).first()
+        if summary is not None:
+            total_work_seconds = summary.worked_seconds
+        else:
+            total_work_seconds = summarize_logs((log['type'], log['timestamp']) for log in logs)['worked_seconds']
         
         hours_worked = round(total_work_seconds / 3600, 2)
         
         # Serialize the logs and include the total hours
-        serializer = TimeLogSerializer(logs, many=True)
         response_data = {
-            'logs': serializer.data,
+            'logs': serialize_timelogs(logs),
             'total_hours': hours_worked
         }
 
-        return Response(response_data)
\ No newline at end of file
+        return Response(response_data)
+
+
+class BatchTimeLogsView(APIView):
+    """
+    Time logs and hours of many user-days in one call: either ``pairs`` (a
+    list of {user, date}) or ``users`` with ``date_from`` and ``date_to``.
+    Returns {user_id: {date: {logs, total_hours}}}.
+    """
+    permission_classes = [IsAuthenticated]
+    max_days = 1000
+
+    def post(self, request):
+        pairs = request.data.get('pairs')
+        users = request.data.get('users')
+        try:
+            if pairs is not None:
+                if not isinstance(pairs, list) or not pairs:
+                    return Response({'detail': 'pairs must be a non-empty list.'}, status=status.HTTP_400_BAD_REQUEST)
+                if len(pairs) > self.max_days:
+                    return Response({'detail': f'Ask for 1 to {self.max_days} user-days at once.'}, status=status.HTTP_400_BAD_REQUEST)
+                days = {
+                    (int(pair['user']), datetime.strptime(pair['date'], '%Y-%m-%d').date())
+                    for pair in pairs
+                }
+            elif users is not None:
+                if not isinstance(users, list) or not users:
+                    return Response({'detail': 'users must be a non-empty list.'}, status=status.HTTP_400_BAD_REQUEST)
+                date_from = datetime.strptime(request.data['date_from'], '%Y-%m-%d').date()
+                date_to = datetime.strptime(request.data['date_to'], '%Y-%m-%d').date()
+                span = (date_to - date_from).days + 1
+                if span < 1 or len(users) * span > self.max_days:
+                    return Response({'detail': f'Ask for 1 to {self.max_days} user-days at once.'}, status=status.HTTP_400_BAD_REQUEST)
+                days = {
+                    (int(user_id), date_from + timedelta(days=offset))
+                    for user_id in users
+                    for offset in range(span)
+                }
+            else:
+                return Response({'detail': 'Either pairs or users is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        except (KeyError, TypeError):
+            return Response({'detail': 'Each pair needs a user and a date; a range needs date_from and date_to.'}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError:
+            return Response({'detail': 'Invalid user id or date. Dates use YYYY-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not request.user.is_manager and any(user_id != request.user.id for user_id, _ in days):
+            return Response({'detail': 'You do not have permission to view these logs.'}, status=status.HTTP_403_FORBIDDEN)
+
+        result = {}
+        for (user_id, day), (logs, worked_seconds) in sorted(get_day_logs(days).items()):
+            result.setdefault(str(user_id), {})[day.isoformat()] = {
+                'logs': serialize_timelogs(logs),
+                'total_hours': round(worked_seconds / 3600, 2),
+            }
+        return Response(result)
@@ -0,0 +1,57 @@
+"""
+Work days of a user, in the user's time zone.
+
+A work day runs from the user's ``day_starts_at`` local time to the same time
+the next day, and is dated by the day it starts: with ``day_starts_at`` at
+12:00, a night shift from 22:00 to 06:00 is a single work day. Users without
+a ``timezone`` use TIME_ZONE.
+
+The bounds of a day are computed once, as a UTC range [start, end), and
+cached; the work date of a punch is stored in TimeLog.work_date when it is
+recorded, so day lookups stay on the indexed column and never convert
+timestamps in the database.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, available_timezones
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+
+def validate_timezone(value):
+    if value and value not in available_timezones():
+        raise ValidationError(f'Unknown time zone "{value}".')
+
+
+@lru_cache(maxsize=None)
+def get_zone(name):
+    return ZoneInfo(name)
+
+
+@lru_cache(maxsize=4096)
+def day_bounds(zone_name, day_starts_at, day):
+    """UTC [start, end) of the work day ``day`` (23 or 25 hours long across DST changes)."""
+    zone = get_zone(zone_name)
+    start = datetime.combine(day, day_starts_at, tzinfo=zone)
+    end = datetime.combine(day + timedelta(days=1), day_starts_at, tzinfo=zone)
+    return start.astimezone(dt_timezone.utc), end.astimezone(dt_timezone.utc)
+
+
+def work_date(zone_name, day_starts_at, moment):
+    """The work day ``moment`` (an aware datetime) falls in."""
+    day = moment.astimezone(get_zone(zone_name)).date()
+    start, _ = day_bounds(zone_name, day_starts_at, day)
+    # Before the day's start time, the moment belongs to the previous day
+    return day - timedelta(days=1) if moment < start else day
+
+
+def user_calendar(user):
+    """(time zone name, day_starts_at) of a user, the first arguments of work_date() and day_bounds()."""
+    return user.timezone or settings.TIME_ZONE, user.day_starts_at
+
+
+def user_work_date(user, moment=None):
+    """The user's work day at ``moment``, now by default."""
+    return work_date(*user_calendar(user), moment or timezone.now())
@@ -0,0 +1,45 @@
+import axiosInstance from './axios';
+
+const RETRY_DELAY = 5000;
+
+// Opens the live event stream with a short-lived ticket, never the access
+// token, and reconnects with a fresh ticket whenever the stream drops (the
+// server also closes it periodically so the user is re-authenticated).
+// `listeners` maps event types to handlers. Returns a function that closes
+// the stream for good.
+export function openEventStream(listeners) {
+    let events = null;
+    let retry = null;
+    let closed = false;
+
+    const connect = async () => {
+        let ticket;
+        try {
+            const response = await axiosInstance.post('events/ticket/');
+            ticket = response.data.ticket;
+        } catch (error) {
+            // Signed out: stop here, the dashboard sends the user to the login page
+            if (!closed && error.response?.status !== 401) {
+                retry = setTimeout(connect, RETRY_DELAY);
+            }
+            return;
+        }
+        if (closed) return;
+        events = new EventSource(`${axiosInstance.defaults.baseURL}events/?ticket=${encodeURIComponent(ticket)}`);
+        Object.entries(listeners).forEach(([type, handler]) => events.addEventListener(type, handler));
+        events.onerror = () => {
+            // EventSource would retry with the same, by now expired, ticket
+            events.close();
+            if (!closed) {
+                retry = setTimeout(connect, RETRY_DELAY);
+            }
+        };
+    };
+
+    connect();
+    return () => {
+        closed = true;
+        clearTimeout(retry);
+        if (events) events.close();
+    };
+}
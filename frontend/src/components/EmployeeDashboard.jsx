@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import axiosInstance from '../api/axios';
+import { openEventStream } from '../api/events';
 import { useNavigate } from 'react-router-dom';
 
 const EmployeeDashboard = ({ onLogout }) => {
@@ -10,39 +11,26 @@ const EmployeeDashboard = ({ onLogout }) => {
     const [isLogsheetSubmitted, setIsLogsheetSubmitted] = useState(false);
     const navigate = useNavigate();
 
-    // Fetches time logs and sets the current work status
-    const fetchLogsAndSetStatus = async () => {
-        const response = await axiosInstance.get('time-logs/');
-        setLogs(response.data);
-        if (response.data.length > 0) {
-            const lastLog = response.data[response.data.length - 1];
-            if (lastLog.type === 'check_in' || lastLog.type === 'break_end') {
-                setStatus('checked-in');
-            } else if (lastLog.type === 'break_start') {
-                setStatus('on-break');
-            } else if (lastLog.type === 'check_out') {
-                setStatus('checked-out');
-            }
-        } else {
-            setStatus('unchecked-in');
-        }
+    // Punch state reported by the API -> dashboard status
+    const STATUS_BY_STATE = {
+        off_duty: 'unchecked-in',
+        working: 'checked-in',
+        on_break: 'on-break',
+        checked_out: 'checked-out',
     };
-    
-    // Checks the logsheet submission status for the current day
-    const checkLogsheetStatus = async () => {
-        const response = await axiosInstance.get('logsheet-status/');
-        setIsLogsheetSubmitted(response.data.has_submitted); // Note: I've updated this to use 'has_submitted' based on your backend code
+
+    // Fetches today's logs, work status and logsheet status in one request
+    const fetchDashboard = async () => {
+        const response = await axiosInstance.get('bootstrap/employee/');
+        setLogs(response.data.logs);
+        setStatus(STATUS_BY_STATE[response.data.state]);
+        setIsLogsheetSubmitted(response.data.has_submitted);
     };
     
-    // Use a single async function with Promise.all for initial load
     useEffect(() => {
         const fetchAllData = async () => {
             try {
-                // Wait for both requests to complete successfully
-                await Promise.all([
-                    fetchLogsAndSetStatus(),
-                    checkLogsheetStatus(),
-                ]);
+                await fetchDashboard();
             } catch (error) {
                 console.error('Initial data fetch failed:', error);
                 // Handle 401 or other errors for all initial requests
@@ -56,6 +44,18 @@ const EmployeeDashboard = ({ onLogout }) => {
         fetchAllData();
     }, [navigate]); // The dependency array is correct
 
+    // Live updates for punches made elsewhere (e.g. another tab) and logsheet decisions
+    useEffect(() => {
+        return openEventStream({
+            punch: () => fetchDashboard(),
+            logsheet_submitted: () => setIsLogsheetSubmitted(true),
+            logsheet_processed: (event) => {
+                const { status } = JSON.parse(event.data);
+                setMessage(`Your logsheet has been ${status}.`);
+            },
+        });
+    }, []);
+
     // You can add a separate useEffect to monitor state changes for debugging
     useEffect(() => {
         console.log('Is logsheet submitted:', isLogsheetSubmitted);
@@ -83,15 +83,16 @@ const EmployeeDashboard = ({ onLogout }) => {
                 return;
             }
 
-            const response = await axiosInstance.post(endpoint);
+            // Same key for a repeated click on the same button, so the punch is recorded once
+            const idempotencyKey = `${new Date().toDateString()}:${logs.length}:${action}`;
+            const response = await axiosInstance.post(endpoint, null, {
+                headers: { 'Idempotency-Key': idempotencyKey },
+            });
             setMessage(response.data.detail);
             
             setStatus(newStatus);
             // Re-fetch all data after a successful action
-            await Promise.all([
-                fetchLogsAndSetStatus(),
-                checkLogsheetStatus(),
-            ]);
+            await fetchDashboard();
 
         } catch (error) {
             setMessage(error.response?.data?.detail || 'An error occurred.');
@@ -105,7 +106,7 @@ const EmployeeDashboard = ({ onLogout }) => {
             setMessage('Logsheet submitted for approval!');
             setJiraKey('');
             setIsLogsheetSubmitted(true);
-            await fetchLogsAndSetStatus();
+            await fetchDashboard();
         } catch (error) {
             setMessage(error.response?.data?.detail || 'Failed to submit logsheet.');
         }
@@ -24,16 +24,16 @@ const Login = ({ onLoginSuccess }) => {
       const decodedToken = jwtDecode(response.data.access);
       console.log('Decoded token:', decodedToken);
 
-      const profile = await axiosInstance.get('user/profile/');
-      console.log('Profile data:', profile.data);
+      // The token response carries the profile
+      const profile = response.data.user;
       const userInfo = {
-        username: profile.data.username,
-        is_manager: profile.data.is_manager,
+        username: profile.username,
+        is_manager: profile.is_manager,
       };
       localStorage.setItem('user', JSON.stringify(userInfo));
       onLoginSuccess();
 
-      if (profile.data.is_manager === true) {
+      if (profile.is_manager === true) {
         console.log('Redirecting to manager dashboard');
         navigate('/manager-dashboard');
       } else {
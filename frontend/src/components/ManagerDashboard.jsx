@@ -1,19 +1,30 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import axiosInstance from '../api/axios';
+import { openEventStream } from '../api/events';
 import { useNavigate } from 'react-router-dom';
 
 const ManagerDashboard = ({ onLogout }) => {
     const [logsheets, setLogsheets] = useState([]);
+    const [nextCursor, setNextCursor] = useState(null);
+    const [pendingCount, setPendingCount] = useState(null);
+    // Ids already taken off the queue: our own actions are applied at once
+    // and then come back on the event stream
+    const processedIds = useRef(new Set());
     const [message, setMessage] = useState('');
     const [selectedLogsheetLogs, setSelectedLogsheetLogs] = useState(null);
+    // Logs and hours by user id and date, fetched in one call per page
+    const [dayLogs, setDayLogs] = useState({});
     const [showConfirmDialog, setShowConfirmDialog] = useState(false);
     const [pendingAction, setPendingAction] = useState(null);
     const navigate = useNavigate();
 
-    const fetchLogsheets = async () => {
+    const fetchLogsheets = async (cursor = null) => {
         try {
-            const response = await axiosInstance.get('manager/logsheets/');
-            setLogsheets(response.data);
+            const params = cursor ? { cursor } : {};
+            const response = await axiosInstance.get('manager/logsheets/', { params });
+            setLogsheets((previous) => (cursor ? [...previous, ...response.data.results] : response.data.results));
+            setNextCursor(response.data.next_cursor);
+            fetchDayLogs(response.data.results.map((logsheet) => ({ user: logsheet.user.id, date: logsheet.date })));
         } catch (error) {
             setMessage(error.response.data.detail || 'Failed to fetch logsheets.');
             if (error.response && error.response.status === 401) {
@@ -22,8 +33,70 @@ const ManagerDashboard = ({ onLogout }) => {
         }
     };
 
+    const fetchDayLogs = async (pairs) => {
+        if (pairs.length === 0) return {};
+        try {
+            const response = await axiosInstance.post('time-logs/batch/', { pairs });
+            setDayLogs((previous) => {
+                const merged = { ...previous };
+                Object.entries(response.data).forEach(([userId, days]) => {
+                    merged[userId] = { ...merged[userId], ...days };
+                });
+                return merged;
+            });
+            return response.data;
+        } catch (error) {
+            console.error('Error fetching detailed logs:', error);
+            return {};
+        }
+    };
+
+    // First page of the queue and the pending count in one request
+    const fetchBootstrap = async () => {
+        try {
+            const response = await axiosInstance.get('bootstrap/manager/');
+            setPendingCount(response.data.pending.count);
+            setLogsheets(response.data.pending.results);
+            setNextCursor(response.data.pending.next_cursor);
+            fetchDayLogs(response.data.pending.results.map((logsheet) => ({ user: logsheet.user.id, date: logsheet.date })));
+        } catch (error) {
+            setMessage(error.response?.data?.detail || 'Failed to fetch logsheets.');
+            if (error.response && error.response.status === 401) {
+                navigate('/login');
+            }
+        }
+    };
+
     useEffect(() => {
-        fetchLogsheets();
+        fetchBootstrap();
+    }, []);
+
+    const applyProcessed = (ids) => {
+        const fresh = ids.filter((id) => !processedIds.current.has(id));
+        if (fresh.length === 0) return;
+        fresh.forEach((id) => processedIds.current.add(id));
+        setLogsheets((previous) => previous.filter((logsheet) => !fresh.includes(logsheet.id)));
+        setPendingCount((count) => (count === null ? count : Math.max(0, count - fresh.length)));
+    };
+
+    const applySubmitted = (logsheet) => {
+        processedIds.current.delete(logsheet.id);
+        if (logsheet.previous_status !== 'pending') {
+            setPendingCount((count) => (count === null ? count : count + 1));
+        }
+        // Newest first, like the queue; the pages loaded so far stay in place
+        setLogsheets((previous) => [logsheet, ...previous.filter((item) => item.id !== logsheet.id)].sort(
+            (a, b) => (a.date === b.date ? b.id - a.id : (a.date < b.date ? 1 : -1)),
+        ));
+        fetchDayLogs([{ user: logsheet.user.id, date: logsheet.date }]);
+    };
+
+    // Keep the loaded queue current as logsheets are submitted or processed elsewhere
+    useEffect(() => {
+        return openEventStream({
+            logsheet_submitted: (event) => applySubmitted(JSON.parse(event.data)),
+            logsheets_processed: (event) => applyProcessed(JSON.parse(event.data).ids),
+        });
     }, []);
 
     const handleAction = (id, action, credit = null) => {
@@ -31,18 +104,31 @@ const ManagerDashboard = ({ onLogout }) => {
         setShowConfirmDialog(true);
     };
 
+    const handleBulkAction = (action, credit = null) => {
+        setPendingAction({ ids: logsheets.map((logsheet) => logsheet.id), action, credit });
+        setShowConfirmDialog(true);
+    };
+
     const confirmAction = async () => {
         if (!pendingAction) return;
 
-        const { id, action, credit } = pendingAction;
+        const { id, ids, action, credit } = pendingAction;
         try {
             const data = { action };
             if (credit !== null) {
                 data.work_day_credit = credit;
             }
-            await axiosInstance.post(`manager/logsheets/${id}/`, data);
-            setMessage(`Logsheet ${id} has been ${action}d.`);
-            fetchLogsheets();
+            if (ids) {
+                const response = await axiosInstance.post('manager/logsheets/bulk/', { ...data, ids });
+                const skipped = ids.length - response.data.processed;
+                setMessage(`${response.data.processed} logsheets have been ${action}d` + (skipped ? `, ${skipped} were already processed.` : '.'));
+                // Ids processed meanwhile by someone else leave the queue too
+                applyProcessed(response.data.results.filter(({ result }) => result !== 'not_found').map(({ id: pk }) => pk));
+            } else {
+                await axiosInstance.post(`manager/logsheets/${id}/`, data);
+                setMessage(`Logsheet ${id} has been ${action}d.`);
+                applyProcessed([id]);
+            }
             setSelectedLogsheetLogs(null);
         } catch (error) {
             setMessage(error.response.data.detail || 'An error occurred.');
@@ -63,12 +149,15 @@ const ManagerDashboard = ({ onLogout }) => {
     };
 
     const handleViewLogs = async (userId, logDate) => {
-        try {
-            const response = await axiosInstance.get(`time-logs/${userId}/${logDate}/`);
-            setSelectedLogsheetLogs(response.data);
+        let logs = dayLogs[userId]?.[logDate];
+        if (!logs) {
+            const fetched = await fetchDayLogs([{ user: userId, date: logDate }]);
+            logs = fetched[userId]?.[logDate];
+        }
+        if (logs) {
+            setSelectedLogsheetLogs(logs);
             setMessage(`Showing logs for user ${userId} on ${logDate}`);
-        } catch (error) {
-            console.error('Error fetching detailed logs:', error);
+        } else {
             setMessage('Failed to fetch detailed logs.');
         }
     };
@@ -78,7 +167,12 @@ const ManagerDashboard = ({ onLogout }) => {
             <div className="max-w-6xl mx-auto space-y-8">
                 {/* Header and Logout Button */}
                 <div className="flex items-center justify-between p-4 bg-white rounded-lg shadow-md">
-                    <h2 className="text-2xl font-bold text-gray-800">Manager Dashboard - Pending Logsheets</h2>
+                    <div>
+                        <h2 className="text-2xl font-bold text-gray-800">Manager Dashboard - Pending Logsheets</h2>
+                        {pendingCount !== null && (
+                            <p className="text-sm text-gray-600">{pendingCount} pending</p>
+                        )}
+                    </div>
                     <button
                         onClick={handleLogout}
                         className="px-4 py-2 text-sm font-medium text-white bg-red-600 rounded-md hover:bg-red-700 transition duration-200"
@@ -94,6 +188,24 @@ const ManagerDashboard = ({ onLogout }) => {
                     </div>
                 )}
 
+                {/* Bulk Actions */}
+                {logsheets.length > 0 && (
+                    <div className="flex justify-end space-x-2">
+                        <button
+                            onClick={() => handleBulkAction('approve', 1.0)}
+                            className="px-4 py-2 text-sm font-semibold text-white bg-green-500 rounded-lg hover:bg-green-600 transition duration-200"
+                        >
+                            Approve All (Full)
+                        </button>
+                        <button
+                            onClick={() => handleBulkAction('reject')}
+                            className="px-4 py-2 text-sm font-semibold text-white bg-red-500 rounded-lg hover:bg-red-600 transition duration-200"
+                        >
+                            Reject All
+                        </button>
+                    </div>
+                )}
+
                 {/* Logsheets List */}
                 {logsheets.length === 0 ? (
                     <div className="p-6 bg-white rounded-lg shadow-md text-center text-gray-500">
@@ -112,6 +224,9 @@ const ManagerDashboard = ({ onLogout }) => {
                                     </p>
                                     <p>
                                         <span className="font-semibold text-gray-700">JIRA Key:</span> {logsheet.jira_key}
+                                        {logsheet.jira_status === 'invalid' && (
+                                            <span className="ml-2 text-sm text-red-600">(not found in JIRA)</span>
+                                        )}
                                     </p>
                                     <p>
                                         <span className="font-semibold text-gray-700">Hours Worked:</span> {logsheet.hours_worked.toFixed(2)}
@@ -148,6 +263,17 @@ const ManagerDashboard = ({ onLogout }) => {
                     </div>
                 )}
 
+                {nextCursor && (
+                    <div className="text-center">
+                        <button
+                            onClick={() => fetchLogsheets(nextCursor)}
+                            className="px-4 py-2 text-sm font-medium text-white bg-blue-600 rounded-md hover:bg-blue-700 transition duration-200"
+                        >
+                            Load More
+                        </button>
+                    </div>
+                )}
+
                 {/* Detailed Timestamps Modal/Card */}
                 {selectedLogsheetLogs && (
                     <div className="fixed inset-0 bg-gray-600 bg-opacity-50 flex items-center justify-center p-4 z-40">